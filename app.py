@@ -13,7 +13,10 @@ from typing import Any, Dict, Optional, Tuple
 import streamlit as st
 
 try:
-    from src.rag import get_rag_chain
+    from src.metadata_store import raw_narrative, resolve_metadata
+    from src.rag import get_rag_chain, index_version
+    from src.singleflight import SingleFlight, make_key
+    from src.spikes import load_alerts
     from src.utils import parse_deepseek_response
 except ImportError as exc:
     st.error(f"Setup Error: {exc}")
@@ -32,6 +35,24 @@ with st.sidebar:
         "Select Product", ["All Products", "Credit Card", "Mortgage", "Student Loan"]
     )
     st.markdown("---")
+    st.subheader("📈 Volume Alerts")
+    alerts = load_alerts()[:5]
+    if not alerts:
+        st.caption("No complaint-volume spikes flagged.")
+    for alert in alerts:
+        scope = alert["product"]
+        if alert["sub_product"]:
+            scope += f" › {alert['sub_product']}"
+        period = (
+            alert["start"]
+            if alert["start"] == alert["end"]
+            else f"{alert['start']} – {alert['end']}"
+        )
+        st.warning(
+            f"**{scope}**: {alert['peak_count']} complaints on the peak day "
+            f"(expected ~{alert['expected']:g}, z={alert['z']:g}), {period}"
+        )
+    st.markdown("---")
     st.info("A production-ready RAG system for complaint intelligence.")
     st.markdown("---")
     if st.button("🗑️ Clear Conversation"):
@@ -68,7 +89,19 @@ def load_qa_chain() -> Any:
         return None
 
 
+@st.cache_resource
+def load_query_flight() -> SingleFlight:
+    """Share one request-coalescing layer across all browser sessions.
+
+    Returns:
+        A process-wide :class:`~src.singleflight.SingleFlight` so that
+        identical questions asked concurrently run the chain once.
+    """
+    return SingleFlight()
+
+
 qa = load_qa_chain()
+flight = load_query_flight()
 
 # ---------------------------------------------------------------------------
 # Display History
@@ -100,7 +133,10 @@ if prompt := st.chat_input("Ask a question about the complaints..."):
                         else prompt
                     )
 
-                    response: Dict[str, Any] = qa.invoke({"query": full_query})
+                    response: Dict[str, Any] = flight.do(
+                        make_key(prompt, {"product": product}, index_version()),
+                        lambda: qa.invoke({"query": full_query}),
+                    )
                     raw_answer: str = response["result"]
                     sources = response["source_documents"]
 
@@ -121,7 +157,19 @@ if prompt := st.chat_input("Ask a question about the complaints..."):
                     with st.expander("🔍 View Source Evidence"):
                         for i, doc in enumerate(sources):
                             st.markdown(f"**Evidence #{i + 1}**")
-                            st.caption(doc.page_content[:400] + "...")
+                            # Row references resolve against the snapshot's
+                            # metadata sidecar only when evidence is shown.
+                            meta = resolve_metadata(doc.metadata)
+                            details = " · ".join(
+                                str(meta[key])
+                                for key in ("product", "company", "date")
+                                if meta.get(key)
+                            )
+                            if details:
+                                st.caption(details)
+                            # Chunks are normalized; show the complaint as filed.
+                            text = raw_narrative(doc.metadata) or doc.page_content
+                            st.caption(text[:400] + "...")
                             st.divider()
 
                 except Exception as exc:
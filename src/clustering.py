@@ -0,0 +1,393 @@
+"""Offline topic clustering of complaint chunk embeddings.
+
+Runs mini-batch k-means (vectorized NumPy, one model per product) over
+the chunk vectors computed during ingestion and persists centroids,
+cluster sizes, representative chunks and cached LLM-generated labels.
+"Top issues" questions are then answered from these summaries without
+any per-query retrieval or LLM call.
+"""
+
+import hashlib
+import json
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+
+import numpy as np
+from langchain_core.documents import Document
+
+from src.config import (
+    CLUSTER_BATCH_SIZE,
+    CLUSTER_ITERATIONS,
+    CLUSTER_REPRESENTATIVES,
+    CLUSTERS_DIR,
+    CLUSTERS_PER_PRODUCT,
+    LLM_REPO_ID,
+)
+from src.logger import logger
+from src.metadata_store import MetadataStore
+
+Labeler = Callable[[List[str]], str]
+
+LABEL_PROMPT: str = """\
+<s>[INST] The following customer complaints were grouped together because
+they describe the same underlying issue.  Reply with a short label of at
+most six words naming that issue.  Reply with the label only.
+
+{complaints}
+[/INST]
+"""
+
+_WORD_PATTERN = re.compile(r"[a-z]{3,}")
+
+
+@dataclass
+class ProductClusters:
+    """Cluster summary for a single product.
+
+    Attributes:
+        centroids: Unit-normalized centroids, shape ``(k, dim)``.
+        sizes: Number of chunks assigned to each cluster, shape ``(k,)``.
+        rep_vectors: Vectors of the representative chunks, shape
+            ``(k, r, dim)``.
+        rep_texts: Representative chunk texts per cluster.
+        labels: Human-readable label per cluster.
+    """
+
+    centroids: np.ndarray
+    sizes: np.ndarray
+    rep_vectors: np.ndarray
+    rep_texts: List[List[str]]
+    labels: List[str] = field(default_factory=list)
+
+
+@dataclass
+class ClusterIndex:
+    """Persisted topic clusters for every product.
+
+    Attributes:
+        products: Mapping of product name to its clusters.
+        seen_ids: Complaint IDs already folded into the clusters.
+        label_cache: Mapping of representative-text hash to label, so
+            unchanged clusters are never relabelled.
+    """
+
+    products: Dict[str, ProductClusters] = field(default_factory=dict)
+    seen_ids: Set[str] = field(default_factory=set)
+    label_cache: Dict[str, str] = field(default_factory=dict)
+
+
+def _normalize_rows(x: np.ndarray) -> np.ndarray:
+    """Scale each row of *x* to unit L2 norm."""
+    norms = np.linalg.norm(x, axis=-1, keepdims=True)
+    return x / np.maximum(norms, 1e-12)
+
+
+def _nearest(x: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Return the index of the most similar centroid for each row of *x*."""
+    return np.argmax(x @ _normalize_rows(centroids).T, axis=1)
+
+
+def minibatch_kmeans(
+    x: np.ndarray,
+    k: int,
+    batch_size: int = CLUSTER_BATCH_SIZE,
+    n_iter: int = CLUSTER_ITERATIONS,
+    seed: int = 42,
+) -> np.ndarray:
+    """Cluster unit-normalized vectors with mini-batch k-means.
+
+    Uses per-centre learning rates (Sculley, 2010) and a fully
+    vectorized batch update, so each iteration costs one matrix
+    multiply plus a scatter-add.
+
+    Args:
+        x: Unit-normalized data, shape ``(n, dim)``.
+        k: Number of clusters (capped at *n*).
+        batch_size: Rows sampled per iteration.
+        n_iter: Number of mini-batch iterations.
+        seed: Random seed for initialization and sampling.
+
+    Returns:
+        Unit-normalized centroids, shape ``(min(k, n), dim)``.
+    """
+    rng = np.random.default_rng(seed)
+    k = min(k, len(x))
+    centroids = x[rng.choice(len(x), size=k, replace=False)].astype(np.float64)
+    counts = np.zeros(k)
+
+    for _ in range(n_iter):
+        batch = x[rng.choice(len(x), size=min(batch_size, len(x)), replace=False)]
+        labels = _nearest(batch, centroids)
+
+        batch_counts = np.bincount(labels, minlength=k).astype(np.float64)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, batch)
+
+        counts += batch_counts
+        touched = batch_counts > 0
+        eta = (batch_counts[touched] / counts[touched])[:, None]
+        means = sums[touched] / batch_counts[touched][:, None]
+        centroids[touched] += eta * (means - centroids[touched])
+
+    return _normalize_rows(centroids).astype(np.float32)
+
+
+def _representatives(x: np.ndarray, texts: List[str], centroid: np.ndarray) -> tuple:
+    """Pick the ``CLUSTER_REPRESENTATIVES`` rows closest to *centroid*."""
+    order = np.argsort(-(x @ centroid))[:CLUSTER_REPRESENTATIVES]
+    return x[order], [texts[i] for i in order]
+
+
+def _pad(vectors: np.ndarray) -> np.ndarray:
+    """Pad a ``(r, dim)`` block to ``CLUSTER_REPRESENTATIVES`` rows with zeros."""
+    padded = np.zeros((CLUSTER_REPRESENTATIVES, vectors.shape[1]), dtype=np.float32)
+    padded[: len(vectors)] = vectors
+    return padded
+
+
+def _cluster_product(x: np.ndarray, texts: List[str]) -> ProductClusters:
+    """Run k-means for one product and summarise the resulting clusters."""
+    centroids = minibatch_kmeans(x, CLUSTERS_PER_PRODUCT)
+    labels = _nearest(x, centroids)
+    sizes = np.bincount(labels, minlength=len(centroids))
+
+    rep_vectors, rep_texts = [], []
+    for c in range(len(centroids)):
+        members = np.flatnonzero(labels == c)
+        vectors, reps = _representatives(
+            x[members], [texts[i] for i in members], centroids[c]
+        )
+        rep_vectors.append(_pad(vectors))
+        rep_texts.append(reps)
+
+    return ProductClusters(
+        centroids=centroids,
+        sizes=sizes,
+        rep_vectors=np.stack(rep_vectors),
+        rep_texts=rep_texts,
+    )
+
+
+def _update_product(clusters: ProductClusters, x: np.ndarray, texts: List[str]) -> None:
+    """Fold new vectors into existing clusters with a running-mean update."""
+    labels = _nearest(x, clusters.centroids)
+    k = len(clusters.centroids)
+
+    batch_counts = np.bincount(labels, minlength=k)
+    sums = np.zeros_like(clusters.centroids, dtype=np.float64)
+    np.add.at(sums, labels, x)
+
+    new_sizes = clusters.sizes + batch_counts
+    touched = batch_counts > 0
+    centroids = clusters.centroids.astype(np.float64)
+    centroids[touched] += (
+        sums[touched] - batch_counts[touched][:, None] * centroids[touched]
+    ) / new_sizes[touched][:, None]
+    clusters.centroids = _normalize_rows(centroids).astype(np.float32)
+    clusters.sizes = new_sizes
+
+    for c in np.flatnonzero(touched):
+        members = np.flatnonzero(labels == c)
+        n_old = len(clusters.rep_texts[c])
+        vectors, reps = _representatives(
+            np.concatenate([clusters.rep_vectors[c][:n_old], x[members]]),
+            clusters.rep_texts[c] + [texts[i] for i in members],
+            clusters.centroids[c],
+        )
+        clusters.rep_vectors[c] = _pad(vectors)
+        clusters.rep_texts[c] = reps
+
+
+def update_clusters(
+    index: ClusterIndex,
+    chunks: List[Document],
+    vectors: np.ndarray,
+    metadata: Optional[MetadataStore] = None,
+) -> int:
+    """Add chunks from previously unseen complaints to the cluster index.
+
+    Products without clusters yet are clustered from scratch; existing
+    products are updated incrementally (centroids move by a running
+    mean and representatives are re-ranked).
+
+    Args:
+        index: Index to update in place.
+        chunks: Chunk documents with ``product`` and ``complaint_id``
+            metadata, or ``row`` references into *metadata*.
+        vectors: Embeddings of *chunks*, shape ``(len(chunks), dim)``.
+        metadata: Sidecar store resolving ``row`` references.
+
+    Returns:
+        Number of chunks folded into the index.
+    """
+    x = _normalize_rows(np.asarray(vectors, dtype=np.float32))
+    metas = [
+        metadata.resolve(c.metadata) if metadata is not None else c.metadata
+        for c in chunks
+    ]
+    by_product: Dict[str, List[int]] = {}
+    for i, meta in enumerate(metas):
+        if str(meta.get("complaint_id", "")) in index.seen_ids:
+            continue
+        by_product.setdefault(meta.get("product", "Unknown"), []).append(i)
+
+    for product, rows in by_product.items():
+        texts = [chunks[i].page_content for i in rows]
+        if product in index.products:
+            _update_product(index.products[product], x[rows], texts)
+        else:
+            index.products[product] = _cluster_product(x[rows], texts)
+
+    added = sum(len(rows) for rows in by_product.values())
+    index.seen_ids.update(
+        str(metas[i].get("complaint_id", ""))
+        for rows in by_product.values()
+        for i in rows
+    )
+    logger.info(f"Clustered {added} new chunks across {len(by_product)} products.")
+    return added
+
+
+def keyword_label(texts: List[str]) -> str:
+    """Label a cluster by its most frequent content words.
+
+    Used when no LLM is available.
+
+    Args:
+        texts: Representative chunk texts.
+
+    Returns:
+        Up to three frequent words joined with ``" / "``.
+    """
+    from wordcloud import STOPWORDS
+
+    words = Counter(
+        word
+        for text in texts
+        for word in _WORD_PATTERN.findall(text.lower())
+        if word not in STOPWORDS and word != "xxxx"
+    )
+    return " / ".join(word for word, _ in words.most_common(3)) or "Miscellaneous"
+
+
+def llm_labeler() -> Labeler:
+    """Return a labeler backed by the configured LLM.
+
+    Falls back to :func:`keyword_label` when no API token is set or the
+    Router returns an error.
+
+    Returns:
+        Callable mapping representative texts to a short label.
+    """
+    token: Optional[str] = os.getenv("HUGGINGFACEHUB_API_TOKEN")
+    if not token:
+        logger.warning("No HuggingFace token; using keyword cluster labels.")
+        return keyword_label
+
+    from src.custom_llm import HuggingFaceAPIWrapper
+    from src.utils import parse_deepseek_response
+
+    llm = HuggingFaceAPIWrapper(repo_id=LLM_REPO_ID, api_token=token, temperature=0.0)
+
+    def label(texts: List[str]) -> str:
+        """Ask the LLM for a short issue label."""
+        complaints = "\n\n".join(f"- {text}" for text in texts)
+        raw = llm.invoke(LABEL_PROMPT.format(complaints=complaints))
+        _, answer = parse_deepseek_response(raw)
+        answer = answer.strip().strip('"').splitlines()[0] if answer.strip() else ""
+        if not answer or answer.startswith("Error"):
+            return keyword_label(texts)
+        return answer
+
+    return label
+
+
+def label_clusters(index: ClusterIndex, labeler: Labeler) -> int:
+    """Label every cluster, reusing cached labels where possible.
+
+    Args:
+        index: Index to label in place.
+        labeler: Callable producing a label from representative texts.
+
+    Returns:
+        Number of labeler calls made (cache misses).
+    """
+    calls = 0
+    for clusters in index.products.values():
+        labels: List[str] = []
+        for texts in clusters.rep_texts:
+            key = hashlib.sha1("\x1f".join(texts).encode("utf-8")).hexdigest()
+            if key not in index.label_cache:
+                index.label_cache[key] = labeler(texts)
+                calls += 1
+            labels.append(index.label_cache[key])
+        clusters.labels = labels
+    logger.info(f"Labelled clusters ({calls} new labels generated).")
+    return calls
+
+
+def save_clusters(index: ClusterIndex, clusters_dir: Path = CLUSTERS_DIR) -> None:
+    """Persist a cluster index to disk.
+
+    Args:
+        index: Index to save.
+        clusters_dir: Target directory.  Defaults to
+            ``config.CLUSTERS_DIR``.
+
+    Returns:
+        None.  Side-effect: writes ``clusters.json`` and
+        ``clusters.npz``.
+    """
+    clusters_dir.mkdir(parents=True, exist_ok=True)
+    products = list(index.products)
+    arrays: Dict[str, np.ndarray] = {}
+    for i, product in enumerate(products):
+        clusters = index.products[product]
+        arrays[f"{i}_centroids"] = clusters.centroids
+        arrays[f"{i}_sizes"] = clusters.sizes
+        arrays[f"{i}_rep_vectors"] = clusters.rep_vectors
+
+    np.savez(clusters_dir / "clusters.npz", **arrays)
+    summary = {
+        "products": products,
+        "rep_texts": [index.products[p].rep_texts for p in products],
+        "labels": [index.products[p].labels for p in products],
+        "seen_ids": sorted(index.seen_ids),
+        "label_cache": index.label_cache,
+    }
+    (clusters_dir / "clusters.json").write_text(json.dumps(summary), encoding="utf-8")
+    logger.info(f"Saved clusters for {len(products)} products to {clusters_dir}")
+
+
+def load_clusters(clusters_dir: Path = CLUSTERS_DIR) -> Optional[ClusterIndex]:
+    """Load a cluster index saved by :func:`save_clusters`.
+
+    Args:
+        clusters_dir: Directory to read from.
+
+    Returns:
+        The :class:`ClusterIndex`, or ``None`` if none has been built.
+    """
+    summary_path = clusters_dir / "clusters.json"
+    if not summary_path.exists():
+        logger.info(f"No clusters found at {clusters_dir}; top-issue routing disabled.")
+        return None
+
+    summary = json.loads(summary_path.read_text(encoding="utf-8"))
+    arrays = np.load(clusters_dir / "clusters.npz")
+    index = ClusterIndex(
+        seen_ids=set(summary["seen_ids"]), label_cache=summary["label_cache"]
+    )
+    for i, product in enumerate(summary["products"]):
+        index.products[product] = ProductClusters(
+            centroids=arrays[f"{i}_centroids"],
+            sizes=arrays[f"{i}_sizes"],
+            rep_vectors=arrays[f"{i}_rep_vectors"],
+            rep_texts=summary["rep_texts"][i],
+            labels=summary["labels"][i],
+        )
+    return index
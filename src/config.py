@@ -5,7 +5,7 @@ to eliminate magic numbers throughout the codebase.
 """
 
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional
 
 # ---------------------------------------------------------------------------
 # Base project directory
@@ -25,6 +25,9 @@ IMAGES_DIR: Path = BASE_DIR / "images"
 RAW_CSV: Path = DATA_RAW / "complaints.csv"
 FILTERED_CSV: Path = DATA_PROCESSED / "filtered_complaints.csv"
 VECTOR_STORE_DIR: Path = DATA_PROCESSED / "vector_store"
+ROLLUPS_DIR: Path = DATA_PROCESSED / "rollups"
+CLUSTERS_DIR: Path = DATA_PROCESSED / "clusters"
+SWEEP_CACHE_DIR: Path = DATA_PROCESSED / "sweep_cache"
 
 # ---------------------------------------------------------------------------
 # Embedding & Retriever Settings
@@ -35,11 +38,21 @@ RETRIEVER_K: int = 3
 # ---------------------------------------------------------------------------
 # LLM Settings (HuggingFace Router / DeepSeek-R1)
 # ---------------------------------------------------------------------------
+LLM_API_URL: str = "https://router.huggingface.co/v1/chat/completions"
 LLM_REPO_ID: str = "deepseek-ai/DeepSeek-R1"
 LLM_TEMPERATURE: float = 0.1
 LLM_MAX_TOKENS: int = 500
 LLM_TIMEOUT_SECONDS: int = 120
 
+# Hedged requests: if the primary model has not streamed a first token by
+# the deadline, race a faster fallback model and keep whichever finishes
+# first.  Disabled while no fallback model is configured.
+LLM_FALLBACK_REPO_ID: Optional[str] = None
+LLM_HEDGE_PERCENTILE: float = 95.0  # of primary first-token latency
+LLM_HEDGE_INITIAL_DEADLINE_SECONDS: float = 10.0  # until enough samples exist
+LLM_HEDGE_MIN_SAMPLES: int = 20
+LLM_HEDGE_WINDOW: int = 200  # recent first-token latencies kept
+
 # ---------------------------------------------------------------------------
 # Text Chunking Settings
 # ---------------------------------------------------------------------------
@@ -61,3 +74,88 @@ TARGET_PRODUCTS: List[str] = [
     "Money transfer, virtual currency, or money service",
     "Personal loan",
 ]
+
+# ---------------------------------------------------------------------------
+# Aggregate Rollups
+# ---------------------------------------------------------------------------
+# Dimensions (besides product and month) that get their own rollup table.
+ROLLUP_DIMENSIONS: List[str] = ["sub_product", "state", "company"]
+ROLLUP_TOP_N: int = 10
+
+# ---------------------------------------------------------------------------
+# Topic Clustering (mini-batch k-means over chunk embeddings)
+# ---------------------------------------------------------------------------
+CLUSTERS_PER_PRODUCT: int = 8
+CLUSTER_BATCH_SIZE: int = 256
+CLUSTER_ITERATIONS: int = 100
+CLUSTER_REPRESENTATIVES: int = 3
+CLUSTER_TOP_N: int = CLUSTERS_PER_PRODUCT  # listed per product in "top issues"
+
+# ---------------------------------------------------------------------------
+# Near-Duplicate Detection (MinHash + LSH banding)
+# ---------------------------------------------------------------------------
+DEDUP_SHINGLE_SIZE: int = 3  # words per shingle
+DEDUP_NUM_PERM: int = 128
+DEDUP_BANDS: int = 16  # 16 bands x 8 rows -> candidate threshold ~0.71
+DEDUP_THRESHOLD: float = 0.8  # estimated Jaccard needed to collapse
+DEDUP_BATCH_SIZE: int = 250  # documents per worker task
+DEDUP_PARALLEL_MIN: int = 500  # smaller inputs are signed in-process
+
+# ---------------------------------------------------------------------------
+# HTTP API Server
+# ---------------------------------------------------------------------------
+SERVER_HOST: str = "0.0.0.0"
+SERVER_PORT: int = 8000
+SERVER_WORKERS: int = 2
+SERVER_MAX_CONCURRENCY: int = 8  # queries executing at once, per worker
+SERVER_MAX_QUEUE: int = 16  # queries allowed to wait before 429, per worker
+SERVER_MAX_BATCH: int = 50
+SERVER_BATCH_CONCURRENCY: int = 4
+SERVER_RETRY_AFTER_SECONDS: int = 5
+
+# ---------------------------------------------------------------------------
+# Retrieval Parameter Sweep
+# ---------------------------------------------------------------------------
+SWEEP_GRID: Dict[str, List] = {
+    "chunk_size": [300, 500, 800],
+    "chunk_overlap": [0, 50],
+    "embedding_model": [EMBEDDING_MODEL_NAME],
+    "k": [3, 5, 10],
+}
+SWEEP_WORKERS: int = 4
+
+# ---------------------------------------------------------------------------
+# Term Frequencies (word clouds)
+# ---------------------------------------------------------------------------
+TERM_FREQ_BATCH_SIZE: int = 5000  # narratives per worker task
+TERM_FREQ_CSV_CHUNKSIZE: int = 50_000  # rows read per CSV chunk
+
+# ---------------------------------------------------------------------------
+# Index Snapshots (hot-swap)
+# ---------------------------------------------------------------------------
+SNAPSHOTS_DIR: Path = VECTOR_STORE_DIR / "snapshots"
+SNAPSHOT_POINTER: Path = VECTOR_STORE_DIR / "CURRENT"
+SNAPSHOTS_TO_KEEP: int = 3  # published versions retained on disk
+SNAPSHOT_POLL_SECONDS: float = 5.0  # how often running apps check for a new one
+
+# ---------------------------------------------------------------------------
+# Complaint-Volume Spike Detection
+# ---------------------------------------------------------------------------
+SPIKES_DIR: Path = DATA_PROCESSED / "spikes"
+SPIKE_STATE_FILE: Path = SPIKES_DIR / "state.json"
+SPIKE_ALERTS_FILE: Path = SPIKES_DIR / "alerts.json"
+SPIKE_HISTORY_DAYS: int = 180  # daily counts retained per series
+SPIKE_EWMA_ALPHA: float = 0.1  # weight of the newest day in the baseline
+SPIKE_Z_THRESHOLD: float = 3.0
+SPIKE_MIN_COUNT: int = 5  # ignore "spikes" smaller than this many complaints
+SPIKE_WARMUP_DAYS: int = 14  # days of baseline needed before flagging
+
+# ---------------------------------------------------------------------------
+# Profiling
+# ---------------------------------------------------------------------------
+PROFILES_DIR: Path = BASE_DIR / "profiles"
+PROFILE_STACK_DEPTH: int = 40  # deepest call chain kept in collapsed stacks
+PROFILE_TOP_FUNCTIONS: int = 15  # hottest functions listed per stage
+# Call paths under this share of a stage's time are left out of collapsed
+# stacks; without a floor, expanding every path is exponential.
+PROFILE_MIN_STACK_FRACTION: float = 1e-4
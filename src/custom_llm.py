@@ -2,16 +2,128 @@
 
 Provides a direct HTTP-based integration with the HuggingFace Router
 (OpenAI-compatible endpoint), bypassing the occasionally buggy
-``langchain-huggingface`` ``HuggingFaceEndpoint`` class.
+``langchain-huggingface`` ``HuggingFaceEndpoint`` class.  Optionally
+hedges slow requests against a faster fallback model.
 """
 
-import requests
-from typing import Any, Dict, List, Optional
+import json
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
 
+import numpy as np
+import requests
 from langchain_core.callbacks.manager import CallbackManagerForLLMRun
 from langchain_core.language_models.llms import LLM
+from langchain_core.outputs import GenerationChunk
+from pydantic import PrivateAttr
+
+from src.config import (
+    LLM_API_URL,
+    LLM_FALLBACK_REPO_ID,
+    LLM_HEDGE_INITIAL_DEADLINE_SECONDS,
+    LLM_HEDGE_MIN_SAMPLES,
+    LLM_HEDGE_PERCENTILE,
+    LLM_HEDGE_WINDOW,
+    LLM_MAX_TOKENS,
+    LLM_TIMEOUT_SECONDS,
+)
+from src.logger import logger
+
+# (attempt, kind, text) events; kind is "token", "done" or "error".
+Event = Tuple["_Attempt", str, str]
+
+
+def _error_message(exc: Exception) -> str:
+    """Describe a failed Router request the way callers expect."""
+    if isinstance(exc, requests.exceptions.Timeout):
+        return (
+            f"Error: HuggingFace Router request timed out after "
+            f"{LLM_TIMEOUT_SECONDS}s."
+        )
+    if isinstance(exc, requests.exceptions.ConnectionError):
+        return "Error: Unable to connect to the HuggingFace Router API."
+    return f"Error calling Hugging Face Router: {exc}"
+
+
+def _status_error(response: requests.Response) -> str:
+    """Describe a non-200 Router response."""
+    return f"Error {response.status_code} from Router: {response.text[:200]}"
+
+
+def _iter_sse(response: requests.Response) -> Iterator[str]:
+    """Yield the content deltas of a server-sent-event completion stream."""
+    for line in response.iter_lines(decode_unicode=True):
+        if not line or not line.startswith("data:"):
+            continue
+        data: str = line[len("data:") :].strip()
+        if data == "[DONE]":
+            break
+        choices = json.loads(data).get("choices") or [{}]
+        text: Optional[str] = choices[0].get("delta", {}).get("content")
+        if text:
+            yield text
 
-from src.config import LLM_MAX_TOKENS, LLM_TIMEOUT_SECONDS
+
+class _Attempt:
+    """One streamed request to one model, read on a background thread.
+
+    Progress is reported to a shared queue so several attempts can race.
+    :meth:`cancel` closes the HTTP response, which ends the read.
+    """
+
+    def __init__(
+        self,
+        llm: "HuggingFaceAPIWrapper",
+        model: str,
+        prompt: str,
+        events: "queue.Queue[Event]",
+    ) -> None:
+        self.model = model
+        self.tokens: List[str] = []
+        self.started = time.monotonic()
+        self._llm = llm
+        self._prompt = prompt
+        self._events = events
+        self._response: Optional[requests.Response] = None
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        threading.Thread(target=self._run, name=f"llm-{model}", daemon=True).start()
+
+    def cancel(self) -> None:
+        """Abandon the request and close its connection."""
+        self._cancelled.set()
+        with self._lock:
+            response = self._response
+        if response is not None:
+            response.close()
+
+    def _run(self) -> None:
+        try:
+            response = requests.post(
+                self._llm.api_url,
+                headers=self._llm._headers(),
+                json=self._llm._payload(self._prompt, stream=True, model=self.model),
+                timeout=LLM_TIMEOUT_SECONDS,
+                stream=True,
+            )
+            with self._lock:
+                self._response = response
+            with response:
+                if self._cancelled.is_set():
+                    return
+                if response.status_code != 200:
+                    self._events.put((self, "error", _status_error(response)))
+                    return
+                for text in _iter_sse(response):
+                    self.tokens.append(text)
+                    self._events.put((self, "token", text))
+            self._events.put((self, "done", ""))
+        except Exception as exc:
+            if not self._cancelled.is_set():
+                self._events.put((self, "error", _error_message(exc)))
 
 
 class HuggingFaceAPIWrapper(LLM):
@@ -27,17 +139,58 @@ class HuggingFaceAPIWrapper(LLM):
         api_token: Bearer token for authenticating with the
             HuggingFace API.
         temperature: Sampling temperature for generation.
+        api_url: Chat-completions endpoint (defaults to the public
+            HuggingFace Router).
+        fallback_repo_id: Faster model to hedge with.  When set, a
+            request whose first token has not arrived by
+            :meth:`hedge_deadline` (or that fails first) is duplicated
+            to this model; the first to finish wins and the other is
+            cancelled.
+        hedge_after: Fixed hedge deadline in seconds, overriding the
+            percentile-based one.
     """
 
     repo_id: str
     api_token: str
     temperature: float = 0.1
+    api_url: str = LLM_API_URL
+    fallback_repo_id: Optional[str] = LLM_FALLBACK_REPO_ID
+    hedge_after: Optional[float] = None
+
+    _hedge_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _first_token_latencies: Deque[float] = PrivateAttr(
+        default_factory=lambda: deque(maxlen=LLM_HEDGE_WINDOW)
+    )
+    _hedge_counts: Dict[str, int] = PrivateAttr(
+        default_factory=lambda: dict.fromkeys(
+            ["requests", "hedged", "primary_wins", "fallback_wins"], 0
+        )
+    )
 
     @property
     def _llm_type(self) -> str:
         """Return a human-readable identifier for this LLM type."""
         return "huggingface_router"
 
+    def _headers(self) -> Dict[str, str]:
+        """Build the HTTP headers for a Router request."""
+        return {
+            "Authorization": f"Bearer {self.api_token}",
+            "Content-Type": "application/json",
+        }
+
+    def _payload(
+        self, prompt: str, stream: bool, model: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Build the OpenAI-style chat-completions payload."""
+        return {
+            "model": model or self.repo_id,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": self.temperature,
+            "max_tokens": LLM_MAX_TOKENS,
+            "stream": stream,
+        }
+
     def _call(
         self,
         prompt: str,
@@ -58,28 +211,19 @@ class HuggingFaceAPIWrapper(LLM):
             The generated text from the model, or a descriptive error
             string if the API call fails.
         """
-        api_url: str = "https://router.huggingface.co/v1/chat/completions"
-        headers: Dict[str, str] = {
-            "Authorization": f"Bearer {self.api_token}",
-            "Content-Type": "application/json",
-        }
-
-        payload: Dict[str, Any] = {
-            "model": self.repo_id,
-            "messages": [{"role": "user", "content": prompt}],
-            "temperature": self.temperature,
-            "max_tokens": LLM_MAX_TOKENS,
-            "stream": False,
-        }
+        if self.fallback_repo_id:
+            return "".join(self._hedged(prompt, commit_on_first_token=False))
 
         try:
             response = requests.post(
-                api_url, headers=headers, json=payload, timeout=LLM_TIMEOUT_SECONDS
+                self.api_url,
+                headers=self._headers(),
+                json=self._payload(prompt, stream=False),
+                timeout=LLM_TIMEOUT_SECONDS,
             )
 
             if response.status_code != 200:
-                short_error: str = response.text[:200]
-                return f"Error {response.status_code} from Router: {short_error}"
+                return _status_error(response)
 
             result: Dict[str, Any] = response.json()
 
@@ -89,12 +233,191 @@ class HuggingFaceAPIWrapper(LLM):
 
             return str(result)
 
-        except requests.exceptions.Timeout:
-            return (
-                f"Error: HuggingFace Router request timed out after "
-                f"{LLM_TIMEOUT_SECONDS}s."
-            )
-        except requests.exceptions.ConnectionError:
-            return "Error: Unable to connect to the HuggingFace Router API."
         except Exception as e:
-            return f"Error calling Hugging Face Router: {e}"
+            return _error_message(e)
+
+    def _stream(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[GenerationChunk]:
+        """Stream the response token by token via server-sent events.
+
+        Args:
+            prompt: The user prompt to send to the model.
+            stop: Optional list of stop sequences (unused, accepted for
+                LangChain compatibility).
+            run_manager: Optional callback manager; notified of each
+                new token.
+            **kwargs: Additional keyword arguments (unused).
+
+        Yields:
+            ``GenerationChunk`` objects with the incremental text.  API
+            failures are yielded as a single descriptive error chunk,
+            mirroring :meth:`_call`.
+        """
+        if self.fallback_repo_id:
+            tokens = self._hedged(prompt, commit_on_first_token=True)
+        else:
+            tokens = self._stream_primary(prompt)
+        for text in tokens:
+            if run_manager:
+                run_manager.on_llm_new_token(text)
+            yield GenerationChunk(text=text)
+
+    def _stream_primary(self, prompt: str) -> Iterator[str]:
+        """Stream the primary model's tokens (or one error string)."""
+        try:
+            with requests.post(
+                self.api_url,
+                headers=self._headers(),
+                json=self._payload(prompt, stream=True),
+                timeout=LLM_TIMEOUT_SECONDS,
+                stream=True,
+            ) as response:
+                if response.status_code != 200:
+                    yield _status_error(response)
+                    return
+                yield from _iter_sse(response)
+        except Exception as e:
+            yield _error_message(e)
+
+    def hedge_deadline(self) -> float:
+        """Seconds to wait for the primary's first token before hedging.
+
+        Returns:
+            :attr:`hedge_after` if set; otherwise the
+            ``config.LLM_HEDGE_PERCENTILE`` of recent first-token
+            latencies, or ``config.LLM_HEDGE_INITIAL_DEADLINE_SECONDS``
+            until ``config.LLM_HEDGE_MIN_SAMPLES`` have been observed.
+        """
+        if self.hedge_after is not None:
+            return self.hedge_after
+        with self._hedge_lock:
+            samples = list(self._first_token_latencies)
+        if len(samples) < LLM_HEDGE_MIN_SAMPLES:
+            return LLM_HEDGE_INITIAL_DEADLINE_SECONDS
+        return float(np.percentile(samples, LLM_HEDGE_PERCENTILE))
+
+    def hedge_stats(self) -> Dict[str, float]:
+        """Return hedging counters and rates.
+
+        Returns:
+            Dict with ``requests``, ``hedged``, ``primary_wins`` and
+            ``fallback_wins`` counts plus ``hedge_rate`` (hedged /
+            requests) and ``fallback_win_rate`` (fallback wins / hedged).
+        """
+        with self._hedge_lock:
+            stats: Dict[str, float] = dict(self._hedge_counts)
+        stats["hedge_rate"] = (
+            stats["hedged"] / stats["requests"] if stats["requests"] else 0.0
+        )
+        stats["fallback_win_rate"] = (
+            stats["fallback_wins"] / stats["hedged"] if stats["hedged"] else 0.0
+        )
+        return stats
+
+    def _record_first_token(self, seconds: float) -> None:
+        with self._hedge_lock:
+            self._first_token_latencies.append(seconds)
+
+    def _count(self, key: str) -> None:
+        with self._hedge_lock:
+            self._hedge_counts[key] += 1
+
+    def _hedged(self, prompt: str, commit_on_first_token: bool) -> Iterator[str]:
+        """Race the primary against the fallback model once it is late.
+
+        Args:
+            prompt: The user prompt.
+            commit_on_first_token: When streaming, commit to whichever
+                attempt yields a token first (tokens cannot be taken
+                back); otherwise the first attempt to *finish* wins.
+
+        Yields:
+            The winner's tokens, or a single error string if every
+            attempt failed.
+        """
+        events: "queue.Queue[Event]" = queue.Queue()
+        primary = _Attempt(self, self.repo_id, prompt, events)
+        attempts = [primary]
+        deadline = primary.started + self.hedge_deadline()
+        first_token_seen = hedged = False
+        winner: Optional[_Attempt] = None
+        self._count("requests")
+
+        try:
+            while True:
+                waiting = len(attempts) == 1 and not (hedged or first_token_seen)
+                timeout = max(deadline - time.monotonic(), 0.0) if waiting else None
+                try:
+                    attempt, kind, text = events.get(timeout=timeout)
+                except queue.Empty:
+                    logger.info(
+                        f"No first token from {self.repo_id} after "
+                        f"{deadline - primary.started:.1f}s; hedging with "
+                        f"{self.fallback_repo_id}."
+                    )
+                    attempts.append(
+                        _Attempt(self, self.fallback_repo_id, prompt, events)
+                    )
+                    hedged = True
+                    self._count("hedged")
+                    continue
+
+                if attempt not in attempts:
+                    continue  # a cancelled loser's late event
+                if kind == "token" and attempt is primary and not first_token_seen:
+                    first_token_seen = True
+                    self._record_first_token(time.monotonic() - primary.started)
+
+                if kind == "error":
+                    attempts.remove(attempt)
+                    if attempt is primary and not hedged and winner is None:
+                        # Fail over at once instead of waiting for the deadline.
+                        logger.info(f"{self.repo_id} failed; trying fallback model.")
+                        attempts.append(
+                            _Attempt(self, self.fallback_repo_id, prompt, events)
+                        )
+                        hedged = True
+                        self._count("hedged")
+                    if not attempts:
+                        yield text
+                        return
+                    continue
+
+                if winner is None and (kind == "done" or commit_on_first_token):
+                    winner = attempt
+                    if (
+                        winner is not primary
+                        and primary in attempts
+                        and not first_token_seen
+                    ):
+                        # Censored sample for the cancelled primary: its
+                        # first token would have come later still.  Dropping
+                        # it would cut the slow tail and keep lowering the
+                        # deadline.
+                        self._record_first_token(
+                            max(time.monotonic(), deadline) - primary.started
+                        )
+                    for other in attempts:
+                        if other is not winner:
+                            other.cancel()
+                    if hedged:
+                        self._count(
+                            "primary_wins" if winner is primary else "fallback_wins"
+                        )
+                    attempts = [winner]
+
+                if kind == "token" and commit_on_first_token:
+                    yield text
+                elif kind == "done":
+                    if not commit_on_first_token:
+                        yield "".join(attempt.tokens)
+                    return
+        finally:
+            # Also reached when the consumer abandons a stream mid-way.
+            for attempt in attempts:
+                attempt.cancel()
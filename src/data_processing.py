@@ -10,6 +10,7 @@ import pandas as pd
 from langchain_core.documents import Document
 
 from src.logger import logger
+from src.normalize import RAW_NARRATIVE_COLUMN
 
 
 def stratified_sample(df: pd.DataFrame, n_per_class: int = 500) -> pd.DataFrame:
@@ -48,7 +49,9 @@ def create_documents(df: pd.DataFrame) -> List[Document]:
         df: DataFrame containing at minimum a
             ``Consumer complaint narrative`` column.  Optional metadata
             columns: ``Product``, ``Sub-product``, ``Date received``,
-            ``State``, ``Company``, ``Complaint ID``.
+            ``State``, ``Company``, ``Complaint ID``.  If the narrative
+            was normalized (see ``src.normalize``), the original text in
+            ``Raw complaint narrative`` is kept as ``raw_text`` metadata.
 
     Returns:
         List of ``Document`` objects ready for text splitting and
@@ -69,6 +72,8 @@ def create_documents(df: pd.DataFrame) -> List[Document]:
 
         # Clean NaN values in metadata
         meta = {k: (v if pd.notna(v) else "Unknown") for k, v in meta.items()}
+        if RAW_NARRATIVE_COLUMN in row:
+            meta["raw_text"] = str(row[RAW_NARRATIVE_COLUMN])
 
         doc = Document(
             page_content=str(row["Consumer complaint narrative"]), metadata=meta
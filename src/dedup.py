@@ -0,0 +1,236 @@
+"""Near-duplicate detection for complaint narratives.
+
+CFPB narratives contain many templated letters and resubmissions.  This
+module computes MinHash signatures over word shingles (vectorized with
+NumPy, batched across a process pool), finds candidate pairs with LSH
+banding, and collapses each group of near-duplicates into a single
+document before chunking and embedding.
+"""
+
+import re
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from src.config import (
+    DEDUP_BANDS,
+    DEDUP_BATCH_SIZE,
+    DEDUP_NUM_PERM,
+    DEDUP_PARALLEL_MIN,
+    DEDUP_SHINGLE_SIZE,
+    DEDUP_THRESHOLD,
+)
+from src.logger import logger
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def _permutations(num_perm: int, seed: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the ``(a, b)`` coefficients of the universal hash family."""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+    return a, b
+
+
+def _shingle_hashes(text: str) -> np.ndarray:
+    """Hash the word shingles of *text* to 32-bit integers."""
+    tokens = _TOKEN_PATTERN.findall(text.lower())
+    if len(tokens) < DEDUP_SHINGLE_SIZE:
+        tokens = tokens + [""] * (DEDUP_SHINGLE_SIZE - len(tokens))
+    shingles = {
+        " ".join(tokens[i : i + DEDUP_SHINGLE_SIZE])
+        for i in range(len(tokens) - DEDUP_SHINGLE_SIZE + 1)
+    }
+    return np.fromiter(
+        (zlib.crc32(s.encode("utf-8")) for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+
+
+def _signature_batch(texts: List[str], num_perm: int) -> np.ndarray:
+    """Compute MinHash signatures for a batch of texts.
+
+    Args:
+        texts: Documents to sign.
+        num_perm: Number of hash permutations.
+
+    Returns:
+        ``uint32`` array of shape ``(len(texts), num_perm)``.
+    """
+    a, b = _permutations(num_perm)
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint32)
+    for i, text in enumerate(texts):
+        hashes = _shingle_hashes(text)
+        # (n_shingles, num_perm) permuted hashes, min over shingles.
+        permuted = (hashes[:, None] * a[None, :] + b[None, :]) % _MERSENNE_PRIME
+        signatures[i] = (permuted & _MAX_HASH).min(axis=0)
+    return signatures
+
+
+def minhash_signatures(
+    texts: List[str],
+    num_perm: int = DEDUP_NUM_PERM,
+    workers: Optional[int] = None,
+    parallel_min: int = DEDUP_PARALLEL_MIN,
+    batch_size: int = DEDUP_BATCH_SIZE,
+) -> np.ndarray:
+    """Compute MinHash signatures, in parallel for large inputs.
+
+    Inputs of at most *parallel_min* documents (or with ``workers=1``)
+    are processed in-process to avoid pool start-up cost.
+
+    Args:
+        texts: Documents to sign.
+        num_perm: Number of hash permutations.
+        workers: Process-pool size (``None`` = CPU count).
+        parallel_min: Largest input signed without a process pool.
+        batch_size: Documents per worker task.
+
+    Returns:
+        ``uint32`` array of shape ``(len(texts), num_perm)``.
+    """
+    if len(texts) <= parallel_min or workers == 1:
+        return _signature_batch(texts, num_perm)
+
+    batches = [texts[i : i + batch_size] for i in range(0, len(texts), batch_size)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(_signature_batch, batches, [num_perm] * len(batches))
+        return np.concatenate(list(results))
+
+
+def _find(parent: np.ndarray, i: int) -> int:
+    """Union-find root lookup with path halving."""
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def duplicate_groups(
+    signatures: np.ndarray,
+    bands: int = DEDUP_BANDS,
+    threshold: float = DEDUP_THRESHOLD,
+    keys: Optional[Sequence[str]] = None,
+) -> np.ndarray:
+    """Group near-duplicate documents using LSH banding.
+
+    Documents sharing any band bucket are candidates; a candidate is
+    merged into the bucket's first member when their estimated Jaccard
+    similarity (fraction of equal signature slots) reaches *threshold*.
+
+    Args:
+        signatures: Output of :func:`minhash_signatures`.
+        bands: Number of LSH bands (must divide the signature length).
+        threshold: Minimum estimated Jaccard similarity to merge.
+        keys: Optional per-document key (e.g. product); only documents
+            with equal keys can be grouped.
+
+    Returns:
+        Array mapping each document to the index of its group's
+        representative (the lowest index in the group).
+    """
+    n, num_perm = signatures.shape
+    rows = num_perm // bands
+    parent = np.arange(n)
+    key_codes = (
+        np.unique(np.asarray(keys, dtype=str), return_inverse=True)[1]
+        .ravel()
+        .astype(np.uint32)
+        if keys is not None
+        else np.zeros(n, dtype=np.uint32)
+    )
+
+    for band in range(bands):
+        # The key is part of the bucket, so other keys never become candidates.
+        block = np.column_stack(
+            [key_codes, signatures[:, band * rows : (band + 1) * rows]]
+        )
+        _, bucket = np.unique(block, axis=0, return_inverse=True)
+        bucket = bucket.ravel()
+        order = np.argsort(bucket, kind="stable")
+        starts = np.flatnonzero(np.diff(bucket[order], prepend=-1))
+        for members in np.split(order, starts[1:]):
+            if len(members) < 2:
+                continue
+            head = members[0]
+            similarity = (signatures[members[1:]] == signatures[head]).mean(axis=1)
+            for other in members[1:][similarity >= threshold]:
+                ra, rb = _find(parent, head), _find(parent, other)
+                if ra != rb:
+                    parent[max(ra, rb)] = min(ra, rb)
+
+    return np.array([_find(parent, i) for i in range(n)])
+
+
+def collapse_duplicates(
+    docs: List[Document], workers: Optional[int] = None
+) -> Tuple[List[Document], Dict[str, float]]:
+    """Collapse near-duplicate documents into one representative each.
+
+    Only documents of the same ``product`` are merged, so product
+    filters and rollups still see every complaint.  The representative
+    keeps its own metadata plus ``duplicate_count`` (number of collapsed
+    documents) and ``duplicate_ids`` (their comma-separated complaint
+    IDs), so citations can still account for every complaint.
+
+    Args:
+        docs: Source documents (one per complaint).
+        workers: Process-pool size for signature computation.
+
+    Returns:
+        Tuple of ``(kept_docs, stats)`` where *stats* reports document
+        and character counts before/after and the saved fraction of
+        embedding work.
+    """
+    if not docs:
+        return docs, {"documents_in": 0, "documents_out": 0, "embedding_saved": 0.0}
+
+    logger.info(f"Computing MinHash signatures for {len(docs)} documents...")
+    signatures = minhash_signatures([d.page_content for d in docs], workers=workers)
+    roots = duplicate_groups(
+        signatures, keys=[str(d.metadata.get("product", "")) for d in docs]
+    )
+
+    members: Dict[int, List[int]] = {}
+    for i, root in enumerate(roots):
+        members.setdefault(int(root), []).append(i)
+
+    kept: List[Document] = []
+    for root, group in members.items():
+        doc = docs[root]
+        if len(group) > 1:
+            duplicates = [
+                str(docs[i].metadata.get("complaint_id", "")) for i in group[1:]
+            ]
+            doc = Document(
+                page_content=doc.page_content,
+                metadata={
+                    **doc.metadata,
+                    "duplicate_count": len(duplicates),
+                    "duplicate_ids": ",".join(duplicates),
+                },
+            )
+        kept.append(doc)
+
+    chars_in = sum(len(d.page_content) for d in docs)
+    chars_out = sum(len(d.page_content) for d in kept)
+    stats: Dict[str, float] = {
+        "documents_in": len(docs),
+        "documents_out": len(kept),
+        "chars_in": chars_in,
+        "chars_out": chars_out,
+        "embedding_saved": 1.0 - chars_out / chars_in if chars_in else 0.0,
+    }
+    logger.info(
+        f"Collapsed {len(docs) - len(kept)} near-duplicates "
+        f"({len(docs)} -> {len(kept)} documents); "
+        f"embedding work reduced by {stats['embedding_saved']:.1%}."
+    )
+    return kept, stats
@@ -0,0 +1,136 @@
+"""Embedding helpers for the CrediTrust ingestion pipeline.
+
+Provides a caching ``Embeddings`` wrapper so that chunk vectors are
+computed once per ingestion run and can be shared between the Chroma
+index and downstream stages (e.g. topic clustering).  The cache can be
+persisted so that repeated runs (e.g. parameter sweeps) only embed
+chunks they have never seen.
+"""
+
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+def text_key(text: str) -> str:
+    """Return a stable cache key for a piece of text.
+
+    Args:
+        text: Text to be embedded.
+
+    Returns:
+        Hex SHA-1 digest of the UTF-8 encoded text.
+    """
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class CachedEmbeddings(Embeddings):
+    """``Embeddings`` wrapper that memoizes document vectors by content.
+
+    Identical texts are embedded only once; later calls (including the
+    ones Chroma makes while indexing) are served from memory.  Instances
+    may be shared between threads: the cache lock is not held while the
+    base model embeds, so concurrent callers embed in parallel, and a
+    text already being embedded by one caller is awaited by the others
+    rather than embedded twice.
+
+    Attributes:
+        base: The underlying embedding model.
+        cache: Mapping of :func:`text_key` to embedding vector.
+        cache_path: Optional ``.npz`` file the cache is loaded from and
+            written to by :meth:`persist`.
+    """
+
+    def __init__(self, base: Embeddings, cache_path: Optional[Path] = None) -> None:
+        self.base = base
+        self.cache: Dict[str, List[float]] = {}
+        self.cache_path = cache_path
+        self._lock = threading.Lock()
+        self._in_flight: Dict[str, threading.Event] = {}
+        if cache_path is not None and cache_path.exists():
+            stored = np.load(cache_path)
+            self.cache = dict(zip(stored["keys"].tolist(), stored["vectors"].tolist()))
+
+    def persist(self) -> None:
+        """Write the cache to :attr:`cache_path` (no-op if unset or empty)."""
+        with self._lock:
+            cache = dict(self.cache)
+        if self.cache_path is None or not cache:
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez(
+            self.cache_path,
+            keys=np.array(list(cache.keys())),
+            vectors=np.asarray(list(cache.values()), dtype=np.float32),
+        )
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed *texts*, computing only those not already cached.
+
+        Args:
+            texts: Documents to embed.
+
+        Returns:
+            One vector per input text, in input order.
+        """
+        keys = [text_key(text) for text in texts]
+        todo: Dict[str, str] = dict(zip(keys, texts))
+        while todo:
+            claimed: Dict[str, str] = {}
+            waits: Set[threading.Event] = set()
+            done = threading.Event()
+            with self._lock:
+                for key, text in todo.items():
+                    if key in self.cache:
+                        continue
+                    if key in self._in_flight:
+                        waits.add(self._in_flight[key])
+                    else:
+                        claimed[key] = text
+                        self._in_flight[key] = done
+
+            if claimed:
+                try:
+                    vectors = self.base.embed_documents(list(claimed.values()))
+                    with self._lock:
+                        self.cache.update(zip(claimed.keys(), vectors))
+                finally:
+                    with self._lock:
+                        for key in claimed:
+                            del self._in_flight[key]
+                    done.set()
+
+            for event in waits:
+                event.wait()
+            # Texts another caller failed to embed are claimed on the next pass.
+            with self._lock:
+                todo = {k: t for k, t in todo.items() if k not in self.cache}
+
+        with self._lock:
+            return [self.cache[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query (queries are not cached).
+
+        Args:
+            text: Query text.
+
+        Returns:
+            The query embedding vector.
+        """
+        return self.base.embed_query(text)
+
+    def as_array(self, texts: List[str]) -> np.ndarray:
+        """Return the embeddings of *texts* as a ``float32`` matrix.
+
+        Args:
+            texts: Documents to embed (cached where possible).
+
+        Returns:
+            Array of shape ``(len(texts), dim)``.
+        """
+        return np.asarray(self.embed_documents(texts), dtype=np.float32)
@@ -11,9 +11,12 @@ import pandas as pd
 
 from src.config import FILTERED_CSV, RAW_CSV, TARGET_PRODUCTS
 from src.logger import logger
+from src.profiling import Profiler, profile_stage
+from src.rollups import build_rollups, save_rollups
+from src.spikes import update_spike_alerts
 
 
-def run_etl() -> Optional[pd.DataFrame]:
+def run_etl(profiler: Optional[Profiler] = None) -> Optional[pd.DataFrame]:
     """Execute the extract-transform-load pipeline.
 
     Steps:
@@ -22,6 +25,13 @@ def run_etl() -> Optional[pd.DataFrame]:
          ``config.TARGET_PRODUCTS``.
       3. Drop rows missing a consumer complaint narrative.
       4. Save the cleaned DataFrame to ``config.FILTERED_CSV``.
+      5. Build aggregate rollups and save them to ``config.ROLLUPS_DIR``.
+      6. Fold complaints newer than the last run into the rolling daily
+         counts and refresh the volume-spike alerts (see ``src.spikes``).
+
+    Args:
+        profiler: If given, each step is recorded as a profiling stage
+            (see ``src.profiling``).
 
     Returns:
         The filtered ``DataFrame`` on success, or ``None`` if the raw
@@ -32,15 +42,23 @@ def run_etl() -> Optional[pd.DataFrame]:
         return None
 
     logger.info("Loading raw data...")
-    df: pd.DataFrame = pd.read_csv(RAW_CSV, low_memory=False)
+    with profile_stage(profiler, "load_csv"):
+        df: pd.DataFrame = pd.read_csv(RAW_CSV, low_memory=False)
 
     logger.info("Filtering and cleaning...")
-    df = df[df["Product"].isin(TARGET_PRODUCTS)]
-    df = df.dropna(subset=["Consumer complaint narrative"])
+    with profile_stage(profiler, "filter"):
+        df = df[df["Product"].isin(TARGET_PRODUCTS)]
+        df = df.dropna(subset=["Consumer complaint narrative"])
 
-    FILTERED_CSV.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(FILTERED_CSV, index=False)
+    with profile_stage(profiler, "save_csv"):
+        FILTERED_CSV.parent.mkdir(parents=True, exist_ok=True)
+        df.to_csv(FILTERED_CSV, index=False)
     logger.info(f"Saved {len(df)} rows to {FILTERED_CSV}")
+
+    with profile_stage(profiler, "rollups"):
+        save_rollups(build_rollups(df))
+    with profile_stage(profiler, "spikes"):
+        update_spike_alerts(df)
     return df
 
 
@@ -1,11 +1,14 @@
 """Vector-store ingestion pipeline for the CrediTrust RAG system.
 
 Reads the filtered complaint CSV, performs stratified sampling,
-converts rows to LangChain documents, chunks the text, embeds with
-HuggingFace embeddings, and persists a Chroma vector store to disk.
+normalizes the narratives, converts rows to LangChain documents,
+collapses near-duplicate narratives, chunks the text, embeds with
+HuggingFace embeddings, persists a Chroma vector store to a new index
+snapshot, clusters the chunk embeddings into per-product topics, and
+finally publishes the snapshot so running apps swap to it.
 """
 
-import shutil
+import time
 from typing import Optional
 
 import pandas as pd
@@ -13,36 +16,78 @@ from langchain_chroma import Chroma
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+from src.clustering import (
+    ClusterIndex,
+    label_clusters,
+    llm_labeler,
+    load_clusters,
+    save_clusters,
+    update_clusters,
+)
 from src.config import (
     CHUNK_OVERLAP,
     CHUNK_SIZE,
     EMBEDDING_MODEL_NAME,
     FILTERED_CSV,
     SAMPLE_PER_CLASS,
-    VECTOR_STORE_DIR,
 )
 from src.data_processing import create_documents, stratified_sample
+from src.dedup import collapse_duplicates
+from src.embeddings import CachedEmbeddings
 from src.logger import logger
+from src.metadata_store import (
+    METADATA_DIRNAME,
+    RAW_TEXT_KEY,
+    compact_documents,
+    load_metadata_store,
+    save_metadata_store,
+)
+from src.normalize import log_embedding_savings, normalize_frame
+from src.profiling import Profiler, profile_stage
+from src.snapshots import (
+    create_snapshot,
+    current_path,
+    current_version,
+    discard_snapshot,
+    new_version,
+    publish_snapshot,
+)
 
 
-def ingest_data(reset_db: bool = True) -> None:
+def ingest_data(reset_db: bool = True, profiler: Optional[Profiler] = None) -> None:
     """Run the full document ingestion pipeline.
 
     Steps:
       1. Load the filtered CSV produced by ``etl.run_etl()``.
       2. Perform stratified sampling (``config.SAMPLE_PER_CLASS`` per
          product).
-      3. Convert rows to LangChain ``Document`` objects.
-      4. Split documents into chunks of ``config.CHUNK_SIZE`` characters.
-      5. Embed chunks and persist them in a Chroma vector store.
+      3. Normalize the narratives (redaction masks, amounts,
+         boilerplate; see ``src.normalize``), keeping the raw text.
+      4. Convert rows to LangChain ``Document`` objects and collapse
+         near-duplicate narratives (MinHash + LSH) into one document.
+      5. Create a new, unpublished index snapshot and move the
+         per-complaint metadata into its columnar sidecar (see
+         ``src.metadata_store``); documents keep only a row reference.
+      6. Split documents into chunks of ``config.CHUNK_SIZE`` characters.
+      7. Embed chunks and persist them in the snapshot's Chroma store,
+         logging the chunks and embedding time normalization saved.
+      8. Cluster the chunk embeddings per product and label the
+         clusters (labels are cached across runs).
+      9. Publish the snapshot (atomic pointer flip) and prune old ones.
 
     Args:
-        reset_db: If ``True``, delete the existing vector store before
-            ingesting.  Defaults to ``True``.
+        reset_db: If ``True``, start the snapshot from an empty store and
+            rebuild the topic clusters from scratch.  Otherwise the
+            snapshot starts as a copy of the published store and only
+            chunks from unseen complaints are folded into the existing
+            clusters.  Defaults to ``True``.
+        profiler: If given, each step is recorded as a profiling stage
+            (see ``src.profiling``).
 
     Returns:
-        None.  Side-effect: writes a Chroma vector store to
-        ``config.VECTOR_STORE_DIR``.
+        None.  Side-effect: writes a Chroma snapshot under
+        ``config.SNAPSHOTS_DIR``, updates ``config.SNAPSHOT_POINTER`` and
+        writes topic clusters to ``config.CLUSTERS_DIR``.
     """
     if not FILTERED_CSV.exists():
         logger.error(f"Filtered CSV not found at {FILTERED_CSV}. Run etl.py first.")
@@ -50,39 +95,99 @@ def ingest_data(reset_db: bool = True) -> None:
 
     # 1. Load Data
     logger.info(f"Loading data from {FILTERED_CSV}...")
-    df: pd.DataFrame = pd.read_csv(FILTERED_CSV, low_memory=False)
+    with profile_stage(profiler, "load_csv"):
+        df: pd.DataFrame = pd.read_csv(FILTERED_CSV, low_memory=False)
 
     # 2. Stratified Sampling
-    df_sampled: pd.DataFrame = stratified_sample(df, n_per_class=SAMPLE_PER_CLASS)
-
-    # 3. Create Documents w/ Metadata
-    raw_docs = create_documents(df_sampled)
-
-    # 4. Chunking
-    logger.info("Splitting text into chunks...")
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=CHUNK_SIZE,
-        chunk_overlap=CHUNK_OVERLAP,
-    )
-    chunks = splitter.split_documents(raw_docs)
-    logger.info(f"Generated {len(chunks)} text chunks.")
-
-    # 5. Embed & Index
-    logger.info(f"Initializing Vector Store at {VECTOR_STORE_DIR}...")
-
-    if reset_db and VECTOR_STORE_DIR.exists():
-        logger.warning(f"Deleting existing vector store at {VECTOR_STORE_DIR}")
-        shutil.rmtree(VECTOR_STORE_DIR)
-
-    embedding_fn = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME)
-
-    Chroma.from_documents(
-        documents=chunks,
-        embedding=embedding_fn,
-        persist_directory=str(VECTOR_STORE_DIR),
-    )
-
-    logger.info("✅ Ingestion Complete. Vector Store is ready.")
+    with profile_stage(profiler, "sample"):
+        df_sampled: pd.DataFrame = stratified_sample(df, n_per_class=SAMPLE_PER_CLASS)
+
+    # 3. Normalize narratives (the raw text is kept for display)
+    with profile_stage(profiler, "normalize"):
+        df_sampled, _ = normalize_frame(df_sampled)
+
+    # 4. Create Documents w/ Metadata
+    with profile_stage(profiler, "create_documents"):
+        raw_docs = create_documents(df_sampled)
+    with profile_stage(profiler, "dedup"):
+        raw_docs, _ = collapse_duplicates(raw_docs)
+
+    # Steps 5-9 build a new snapshot; a failure discards it so it cannot
+    # take a retention slot from a good one.
+    version = new_version()
+    try:
+        # 5. Start a fresh snapshot (readers keep the current one) and move
+        #    per-complaint metadata into its sidecar; documents keep a row ref.
+        with profile_stage(profiler, "snapshot_metadata"):
+            snapshot_dir = create_snapshot(
+                version, base=None if reset_db else current_path()
+            )
+            metadata_dir = snapshot_dir / METADATA_DIRNAME
+            metadata, raw_docs = compact_documents(
+                raw_docs, load_metadata_store(metadata_dir)
+            )
+            save_metadata_store(metadata, metadata_dir)
+        if not raw_docs:
+            logger.info("No new complaints to ingest; keeping the current snapshot.")
+            discard_snapshot(version)
+            return
+        raw_texts = [metadata.text(RAW_TEXT_KEY, d.metadata["row"]) for d in raw_docs]
+
+        # 6. Chunking
+        logger.info("Splitting text into chunks...")
+        with profile_stage(profiler, "split"):
+            splitter = RecursiveCharacterTextSplitter(
+                chunk_size=CHUNK_SIZE,
+                chunk_overlap=CHUNK_OVERLAP,
+            )
+            chunks = splitter.split_documents(raw_docs)
+            # Chunks the raw text would have produced, for the savings log.
+            raw_chunk_count = sum(len(splitter.split_text(text)) for text in raw_texts)
+        logger.info(f"Generated {len(chunks)} text chunks.")
+
+        # 7. Embed & Index
+        logger.info(f"Initializing Vector Store snapshot at {snapshot_dir}...")
+
+        # Embed once; Chroma and the clustering stage share the cached vectors.
+        with profile_stage(profiler, "embed"):
+            embedding_fn = CachedEmbeddings(
+                HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME)
+            )
+            embed_start = time.perf_counter()
+            vectors = embedding_fn.as_array([chunk.page_content for chunk in chunks])
+            embed_seconds = time.perf_counter() - embed_start
+        log_embedding_savings(raw_chunk_count, len(chunks), embed_seconds)
+
+        with profile_stage(profiler, "chroma_write"):
+            Chroma.from_documents(
+                documents=chunks,
+                embedding=embedding_fn,
+                persist_directory=str(snapshot_dir),
+            )
+
+        # 8. Topic Clusters
+        logger.info("Clustering chunk embeddings...")
+        with profile_stage(profiler, "clusters"):
+            existing = load_clusters()
+            if reset_db or existing is None:
+                clusters = ClusterIndex(
+                    label_cache=existing.label_cache if existing else {}
+                )
+            else:
+                clusters = existing
+            update_clusters(clusters, chunks, vectors, metadata)
+            label_clusters(clusters, llm_labeler())
+            save_clusters(clusters)
+
+        # 9. Publish
+        with profile_stage(profiler, "publish"):
+            publish_snapshot(version)
+    except BaseException:
+        if current_version() != version:
+            discard_snapshot(version)
+        raise
+
+    logger.info(f"✅ Ingestion Complete. Vector Store snapshot {version} is live.")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,363 @@
+"""Load-testing harness for the CrediTrust RAG chain and HTTP API.
+
+Drives either the in-process chain from ``rag.get_rag_chain()`` or a
+running ``src.server`` instance with a question mix read from a JSONL
+file, at a fixed concurrency (closed loop) or a Poisson arrival rate
+(open loop).  The LLM can be replaced by the local Router stand-in in
+``src.stub_router`` with injected latency and errors.
+
+Reports throughput, error rate and p50/p95/p99 latency per stage
+(``queue``, ``retrieval``, ``generation``, ``total``).
+
+Example::
+
+    python -m src.loadtest --questions data/loadtest_questions.jsonl \\
+        --concurrency 20 --requests 200 --stub --stub-latency 2.0
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+import requests
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables import Runnable
+
+from src.logger import logger
+
+Question = Dict[str, Any]
+Sample = Tuple[bool, Dict[str, float]]
+Target = Callable[[Question], Sample]
+
+STAGES: List[str] = ["queue", "retrieval", "generation", "total"]
+
+
+class StageTimer(BaseCallbackHandler):
+    """LangChain callback handler that times retrieval and generation.
+
+    Attributes:
+        durations: Accumulated seconds per stage for one request.
+    """
+
+    def __init__(self) -> None:
+        self.durations: Dict[str, float] = defaultdict(float)
+        self._starts: Dict[UUID, float] = {}
+
+    def _start(self, run_id: UUID) -> None:
+        self._starts[run_id] = time.perf_counter()
+
+    def _stop(self, stage: str, run_id: UUID) -> None:
+        started = self._starts.pop(run_id, None)
+        if started is not None:
+            self.durations[stage] += time.perf_counter() - started
+
+    def on_retriever_start(
+        self, serialized: Any, query: str, *, run_id: UUID, **_: Any
+    ) -> None:
+        self._start(run_id)
+
+    def on_retriever_end(self, documents: Any, *, run_id: UUID, **_: Any) -> None:
+        self._stop("retrieval", run_id)
+
+    def on_retriever_error(
+        self, error: BaseException, *, run_id: UUID, **_: Any
+    ) -> None:
+        self._stop("retrieval", run_id)
+
+    def on_llm_start(
+        self, serialized: Any, prompts: Any, *, run_id: UUID, **_: Any
+    ) -> None:
+        self._start(run_id)
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **_: Any) -> None:
+        self._stop("generation", run_id)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **_: Any) -> None:
+        self._stop("generation", run_id)
+
+
+def load_questions(path: Path) -> List[Question]:
+    """Read the question mix from a JSONL file.
+
+    Each line holds ``{"query": str}`` plus optional ``"product"`` (same
+    meaning as the app's product filter) and ``"weight"`` (relative
+    sampling frequency, default 1).
+
+    Args:
+        path: JSONL file path.
+
+    Returns:
+        List of question dicts.
+    """
+    with open(path, encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+def _is_error(answer: str) -> bool:
+    """Detect the wrapper's descriptive error strings."""
+    return answer.startswith("Error")
+
+
+def chain_target(chain: Runnable) -> Target:
+    """Build a target that invokes the chain in-process.
+
+    Args:
+        chain: Runnable from ``rag.get_rag_chain()``.
+
+    Returns:
+        Callable sending one question and returning ``(ok, durations)``.
+    """
+
+    def send(question: Question) -> Sample:
+        timer = StageTimer()
+        product: Optional[str] = question.get("product")
+        query = (
+            f"{question['query']} (Context: {product})"
+            if product
+            else question["query"]
+        )
+        try:
+            response = chain.invoke({"query": query}, config={"callbacks": [timer]})
+            ok = not _is_error(str(response["result"]))
+        except Exception as exc:
+            logger.warning(f"Load-test request failed: {exc}")
+            ok = False
+        return ok, dict(timer.durations)
+
+    return send
+
+
+def http_target(base_url: str, timeout: float = 300.0) -> Target:
+    """Build a target that calls a running ``src.server`` instance.
+
+    Args:
+        base_url: Server root, e.g. ``"http://127.0.0.1:8000"``.
+        timeout: Per-request timeout in seconds.
+
+    Returns:
+        Callable sending one question and returning ``(ok, durations)``.
+        Only end-to-end timings are available over HTTP.
+    """
+    session = requests.Session()
+
+    def send(question: Question) -> Sample:
+        payload = {"query": question["query"], "product": question.get("product")}
+        try:
+            response = session.post(f"{base_url}/query", json=payload, timeout=timeout)
+            ok = response.status_code == 200 and not _is_error(
+                response.json()["result"]
+            )
+        except requests.RequestException as exc:
+            logger.warning(f"Load-test request failed: {exc}")
+            ok = False
+        return ok, {}
+
+    return send
+
+
+def run_load(
+    target: Target,
+    questions: List[Question],
+    concurrency: int = 10,
+    total_requests: int = 100,
+    rate: Optional[float] = None,
+    duration: Optional[float] = None,
+    seed: int = 42,
+) -> Dict[str, Any]:
+    """Drive *target* with the question mix and summarise the results.
+
+    Without *rate* this is a closed loop: *concurrency* virtual users
+    each send their next question as soon as the previous one returns.
+    With *rate* it is an open loop: questions arrive as a Poisson process
+    of *rate* per second and wait in a queue for one of *concurrency*
+    workers, so queueing delay shows up in the ``queue`` stage.
+
+    Args:
+        target: Callable from :func:`chain_target` or :func:`http_target`.
+        questions: Question mix from :func:`load_questions`.
+        concurrency: Number of concurrent in-flight requests.
+        total_requests: Stop after this many requests.
+        rate: Mean arrivals per second (open loop), or ``None``.
+        duration: Optional wall-clock limit in seconds.
+        seed: Random seed for question sampling and arrivals.
+
+    Returns:
+        Report dict from :func:`summarize`.
+    """
+    rng = random.Random(seed)
+    weights = [q.get("weight", 1.0) for q in questions]
+    samples: List[Sample] = []
+    lock = threading.Lock()
+    start = time.perf_counter()
+
+    def expired() -> bool:
+        return duration is not None and time.perf_counter() - start >= duration
+
+    def execute(question: Question, submitted: float) -> None:
+        queued = time.perf_counter() - submitted
+        ok, durations = target(question)
+        durations["queue"] = queued
+        durations["total"] = time.perf_counter() - submitted
+        with lock:
+            samples.append((ok, durations))
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        if rate:
+            for _ in range(total_requests):
+                if expired():
+                    break
+                pool.submit(
+                    execute, rng.choices(questions, weights)[0], time.perf_counter()
+                )
+                time.sleep(rng.expovariate(rate))
+        else:
+            issued = [0]
+
+            def user() -> None:
+                while True:
+                    with lock:
+                        if issued[0] >= total_requests or expired():
+                            return
+                        issued[0] += 1
+                        question = rng.choices(questions, weights)[0]
+                    execute(question, time.perf_counter())
+
+            for _ in range(concurrency):
+                pool.submit(user)
+
+    return summarize(samples, time.perf_counter() - start)
+
+
+def summarize(samples: List[Sample], wall_seconds: float) -> Dict[str, Any]:
+    """Compute throughput, error rate and latency percentiles.
+
+    Args:
+        samples: ``(ok, durations)`` pairs, one per request.
+        wall_seconds: Elapsed time of the whole run.
+
+    Returns:
+        Dict with ``requests``, ``errors``, ``error_rate``,
+        ``throughput_rps`` (successful requests per second) and
+        ``stages`` mapping each stage to count/mean/p50/p95/p99 seconds.
+    """
+    errors = sum(1 for ok, _ in samples if not ok)
+    stages: Dict[str, Dict[str, float]] = {}
+    for stage in STAGES:
+        values = np.array([d[stage] for _, d in samples if stage in d])
+        if values.size == 0:
+            continue
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        stages[stage] = {
+            "count": int(values.size),
+            "mean": float(values.mean()),
+            "p50": float(p50),
+            "p95": float(p95),
+            "p99": float(p99),
+        }
+
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": errors / len(samples) if samples else 0.0,
+        "throughput_rps": (
+            (len(samples) - errors) / wall_seconds if wall_seconds else 0.0
+        ),
+        "wall_seconds": wall_seconds,
+        "stages": stages,
+    }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Render a report as a Markdown table.
+
+    Args:
+        report: Output of :func:`summarize`.
+
+    Returns:
+        Human-readable summary.
+    """
+    lines = [
+        f"Requests: {report['requests']}  Errors: {report['errors']} "
+        f"({report['error_rate']:.1%})  Throughput: {report['throughput_rps']:.2f} req/s",
+        "",
+        "| Stage | Count | Mean (s) | p50 (s) | p95 (s) | p99 (s) |",
+        "|---|---:|---:|---:|---:|---:|",
+    ]
+    for stage, s in report["stages"].items():
+        lines.append(
+            f"| {stage} | {s['count']} | {s['mean']:.3f} | {s['p50']:.3f} "
+            f"| {s['p95']:.3f} | {s['p99']:.3f} |"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    """Parse command-line options, run the load test and print the report."""
+    parser = argparse.ArgumentParser(description="CrediTrust RAG load generator")
+    parser.add_argument("--questions", type=Path, required=True)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument(
+        "--rate", type=float, default=None, help="arrivals/s (open loop)"
+    )
+    parser.add_argument("--duration", type=float, default=None)
+    parser.add_argument(
+        "--url", default=None, help="server root; omit to drive the chain"
+    )
+    parser.add_argument("--stub", action="store_true", help="use the local Router stub")
+    parser.add_argument("--stub-latency", type=float, default=1.0)
+    parser.add_argument("--stub-jitter", type=float, default=0.5)
+    parser.add_argument("--stub-error-rate", type=float, default=0.0)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+
+    stub = None
+    if args.stub:
+        from src.stub_router import StubRouter
+
+        stub = StubRouter(
+            latency=args.stub_latency,
+            jitter=args.stub_jitter,
+            error_rate=args.stub_error_rate,
+        ).start()
+        os.environ["HF_ROUTER_URL"] = stub.url
+        os.environ.setdefault("HUGGINGFACEHUB_API_TOKEN", "stub-token")
+        logger.info(f"Using local Router stub at {stub.url}")
+
+    if args.url:
+        target = http_target(args.url)
+    else:
+        from src.rag import get_rag_chain
+
+        target = chain_target(get_rag_chain(warm_up=True))
+
+    try:
+        report = run_load(
+            target,
+            load_questions(args.questions),
+            concurrency=args.concurrency,
+            total_requests=args.requests,
+            rate=args.rate,
+            duration=args.duration,
+        )
+    finally:
+        if stub is not None:
+            stub.stop()
+
+    print(format_report(report))
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        logger.info(f"Wrote load-test report to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
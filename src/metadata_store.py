@@ -0,0 +1,385 @@
+"""Compact columnar sidecar for per-complaint metadata.
+
+Instead of copying product, sub-product, date, state, company and
+complaint ID onto every chunk stored in Chroma, ingestion keeps one row
+per complaint in a sidecar next to the index: dictionary-encoded
+``int32`` code arrays for low-cardinality columns, a fixed-width
+complaint-ID array, and UTF-8 bytes plus an offsets array for
+variable-length per-row text (the near-duplicate IDs and the original,
+pre-normalization narrative).  Everything is saved as ``.npy`` files and
+memory-mapped on load.  Chunks carry only ``{"row": int}``; consumers
+resolve the rest lazily with :func:`resolve_metadata` and
+:func:`raw_narrative`.
+
+Rows are sorted by product, sub-product and date within each ingestion
+run, so a product filter becomes a handful of contiguous row ranges
+that Chroma can apply as a ``where`` clause on ``row`` (see
+:meth:`MetadataStore.where`).
+"""
+
+import json
+import os
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+from langchain_core.documents import Document
+
+from src.config import SNAPSHOTS_DIR, SNAPSHOTS_TO_KEEP, VECTOR_STORE_DIR
+from src.logger import logger
+from src.snapshots import current_version
+
+# Sidecar directory name inside a snapshot.
+METADATA_DIRNAME: str = "metadata"
+
+# Dictionary-encoded columns, in ``create_documents`` metadata keys.
+CATEGORICAL_COLUMNS: List[str] = [
+    "product",
+    "sub_product",
+    "date",
+    "state",
+    "company",
+]
+
+# Metadata key carrying the un-normalized narrative (see ``src.normalize``).
+RAW_TEXT_KEY: str = "raw_text"
+
+# Per-row text columns stored as UTF-8 bytes plus offsets (mostly unique
+# values, so a dictionary would just duplicate the column).
+TEXT_COLUMNS: List[str] = ["duplicate_ids", RAW_TEXT_KEY]
+
+# Row order within one ingestion run (enables range filters).
+SORT_COLUMNS: List[str] = ["product", "sub_product", "date"]
+
+
+@dataclass
+class MetadataStore:
+    """Per-complaint metadata, one row per source document.
+
+    Attributes:
+        categories: Distinct values per categorical column; codes index
+            into these lists.  New values are only ever appended, so
+            codes stay valid across incremental runs.
+        codes: ``int32`` code array per categorical column.
+        complaint_ids: Complaint ID of each row (fixed-width unicode).
+        text_bytes: Concatenated UTF-8 values per text column.
+        text_offsets: ``int64`` offsets per text column; row ``i`` spans
+            ``offsets[i]:offsets[i + 1]`` of the column's bytes.
+    """
+
+    categories: Dict[str, List[str]] = field(default_factory=dict)
+    codes: Dict[str, np.ndarray] = field(default_factory=dict)
+    complaint_ids: np.ndarray = field(default_factory=lambda: np.array([], dtype="U1"))
+    text_bytes: Dict[str, np.ndarray] = field(default_factory=dict)
+    text_offsets: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.complaint_ids)
+
+    def text(self, column: str, row: int) -> str:
+        """Return text *column* of *row* (``""`` if not stored)."""
+        offsets = self.text_offsets.get(column)
+        if offsets is None or row + 1 >= len(offsets):
+            return ""
+        start, stop = int(offsets[row]), int(offsets[row + 1])
+        return bytes(self.text_bytes[column][start:stop]).decode("utf-8")
+
+    def record(self, row: int) -> Dict[str, Any]:
+        """Decode one row into the metadata dict ``create_documents`` builds.
+
+        Args:
+            row: Row reference stored on a chunk.
+
+        Returns:
+            Metadata dict.  ``duplicate_count`` / ``duplicate_ids`` are
+            included only for rows that absorbed near-duplicates.
+        """
+        meta: Dict[str, Any] = {
+            column: self.categories[column][int(self.codes[column][row])]
+            for column in CATEGORICAL_COLUMNS
+        }
+        meta["complaint_id"] = str(self.complaint_ids[row])
+        duplicate_ids = self.text("duplicate_ids", row)
+        if duplicate_ids:
+            meta["duplicate_ids"] = duplicate_ids
+            meta["duplicate_count"] = duplicate_ids.count(",") + 1
+        return meta
+
+    def resolve(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Expand a chunk's ``row`` reference into full metadata.
+
+        Args:
+            metadata: Chunk metadata; dicts without ``row`` (e.g. from a
+                pre-sidecar index) are returned unchanged.
+
+        Returns:
+            Full metadata dict.
+        """
+        if "row" not in metadata:
+            return metadata
+        extra = {k: v for k, v in metadata.items() if k not in ("row", "snapshot")}
+        return {**self.record(int(metadata["row"])), **extra}
+
+    def known_ids(self) -> Set[str]:
+        """Return every complaint ID stored, as a row or as a near-duplicate."""
+        known = set(self.complaint_ids.astype(str).tolist())
+        for row in range(len(self)):
+            known.update(i for i in self.text("duplicate_ids", row).split(",") if i)
+        return known
+
+    def narrative(self, row: int) -> Optional[str]:
+        """Return the raw narrative of *row*, or ``None`` if not stored."""
+        return self.text(RAW_TEXT_KEY, row) or None
+
+    def row_ranges(self, column: str, value: str) -> List[Tuple[int, int]]:
+        """Return the half-open row ranges where *column* equals *value*.
+
+        Args:
+            column: One of :data:`CATEGORICAL_COLUMNS`.
+            value: Decoded value to match.
+
+        Returns:
+            Sorted ``(start, stop)`` pairs; one per ingestion run that
+            contained *value* when filtering on a sort column.
+        """
+        if value not in self.categories[column]:
+            return []
+        mask = np.asarray(self.codes[column]) == self.categories[column].index(value)
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.view(np.int8), [0]))))
+        return [(int(a), int(b)) for a, b in zip(edges[::2], edges[1::2])]
+
+    def where(self, column: str, *values: str) -> Dict[str, Any]:
+        """Build a Chroma ``where`` filter on ``row`` for *column* in *values*.
+
+        Args:
+            column: One of :data:`CATEGORICAL_COLUMNS`.
+            *values: Decoded values to match.
+
+        Returns:
+            Filter dict for a retriever's ``filter`` search argument
+            (matches nothing if no value is present).
+        """
+        ranges = sorted(r for value in values for r in self.row_ranges(column, value))
+        clauses = [
+            {"$and": [{"row": {"$gte": start}}, {"row": {"$lt": stop}}]}
+            for start, stop in ranges
+        ]
+        if not clauses:
+            return {"row": {"$lt": 0}}
+        return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+
+def _append_texts(
+    base_bytes: Optional[np.ndarray],
+    base_offsets: Optional[np.ndarray],
+    base_rows: int,
+    values: Iterable[str],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Append *values* to a bytes-plus-offsets text column.
+
+    Base rows saved without the column get empty values.
+
+    Returns:
+        Tuple of ``(bytes, offsets)`` for the combined column.
+    """
+    offsets = np.asarray(base_offsets if base_offsets is not None else [0], np.int64)
+    if len(offsets) != base_rows + 1:
+        offsets = np.zeros(base_rows + 1, np.int64)
+    data = np.asarray(base_bytes if base_bytes is not None else [], np.uint8)
+    encoded = [value.encode("utf-8") for value in values]
+    lengths = np.fromiter((len(b) for b in encoded), np.int64, len(encoded))
+    return (
+        np.concatenate(
+            [data[: offsets[-1]], np.frombuffer(b"".join(encoded), np.uint8)]
+        ),
+        np.concatenate([offsets, offsets[-1] + np.cumsum(lengths)]),
+    )
+
+
+def compact_documents(
+    docs: List[Document], base: Optional[MetadataStore] = None
+) -> Tuple[MetadataStore, List[Document]]:
+    """Move document metadata into a sidecar, leaving only row references.
+
+    Args:
+        docs: Source documents from ``create_documents`` (after
+            near-duplicate collapsing).
+        base: Existing store to append to (incremental ingestion).
+            Documents whose complaint ID *base* already holds (see
+            :meth:`MetadataStore.known_ids`) are skipped, so re-ingesting
+            a sample does not add its complaints again.
+
+    Returns:
+        Tuple of ``(store, compact_docs)``.  *compact_docs* hold only the
+        new documents, sorted by :data:`SORT_COLUMNS`, and carry
+        ``{"row": int}`` metadata only.  The raw narrative is taken from
+        :data:`RAW_TEXT_KEY` metadata, falling back to the page content.
+    """
+    base = base or MetadataStore()
+    known = base.known_ids()
+    if known:
+        fresh = [
+            d for d in docs if str(d.metadata.get("complaint_id", "")) not in known
+        ]
+        logger.info(
+            f"Skipping {len(docs) - len(fresh)} complaints already in the sidecar."
+        )
+        docs = fresh
+    frame = pd.DataFrame(
+        [d.metadata for d in docs],
+        columns=CATEGORICAL_COLUMNS + ["complaint_id", "duplicate_ids"],
+    )
+    frame = frame.fillna("").astype(str)
+    order = frame.sort_values(SORT_COLUMNS, kind="stable").index.to_numpy()
+    frame = frame.iloc[order]
+
+    store = MetadataStore()
+    for column in CATEGORICAL_COLUMNS:
+        values = list(base.categories.get(column, []))
+        lookup = {v: i for i, v in enumerate(values)}
+        for value in frame[column].unique():
+            if value not in lookup:
+                lookup[value] = len(values)
+                values.append(value)
+        store.categories[column] = values
+        store.codes[column] = np.concatenate(
+            [
+                np.asarray(base.codes.get(column, []), dtype=np.int32),
+                frame[column].map(lookup).to_numpy(dtype=np.int32),
+            ]
+        )
+    store.complaint_ids = np.concatenate(
+        [np.asarray(base.complaint_ids, dtype=str), frame["complaint_id"].to_numpy(str)]
+    )
+    raw_texts = [
+        str(docs[i].metadata.get(RAW_TEXT_KEY, docs[i].page_content)) for i in order
+    ]
+    for column, values in (
+        ("duplicate_ids", frame["duplicate_ids"].tolist()),
+        (RAW_TEXT_KEY, raw_texts),
+    ):
+        store.text_bytes[column], store.text_offsets[column] = _append_texts(
+            base.text_bytes.get(column),
+            base.text_offsets.get(column),
+            len(base),
+            values,
+        )
+
+    offset = len(base)
+    compact = [
+        Document(page_content=docs[i].page_content, metadata={"row": offset + pos})
+        for pos, i in enumerate(order)
+    ]
+    return store, compact
+
+
+def _save_array(path: Path, array: np.ndarray) -> None:
+    """Write *array* beside *path* and swap it in, sparing live mmaps."""
+    staging = path.with_name(f"{path.stem}.tmp.npy")
+    np.save(staging, array)
+    os.replace(staging, path)
+
+
+def save_metadata_store(store: MetadataStore, directory: Path) -> None:
+    """Persist a store as ``.npy`` columns plus a JSON dictionary file.
+
+    Args:
+        store: Store to save.
+        directory: Target directory (created if missing).
+
+    Returns:
+        None.  Side-effect: writes ``categories.json``, one ``.npy`` file
+        per categorical column and two per text column.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    for column in CATEGORICAL_COLUMNS:
+        _save_array(directory / f"{column}.npy", store.codes[column])
+    _save_array(directory / "complaint_id.npy", store.complaint_ids)
+    for column in TEXT_COLUMNS:
+        _save_array(directory / f"{column}_bytes.npy", store.text_bytes[column])
+        _save_array(directory / f"{column}_offsets.npy", store.text_offsets[column])
+    (directory / "categories.json").write_text(
+        json.dumps(store.categories), encoding="utf-8"
+    )
+    logger.info(f"Saved metadata for {len(store)} complaints to {directory}")
+
+
+def load_metadata_store(directory: Path) -> Optional[MetadataStore]:
+    """Memory-map a store saved by :func:`save_metadata_store`.
+
+    Args:
+        directory: Directory to read from.
+
+    Returns:
+        The :class:`MetadataStore`, or ``None`` if none exists.
+    """
+    categories_path = directory / "categories.json"
+    if not categories_path.exists():
+        return None
+    texts = [c for c in TEXT_COLUMNS if (directory / f"{c}_offsets.npy").exists()]
+    return MetadataStore(
+        categories=json.loads(categories_path.read_text(encoding="utf-8")),
+        codes={
+            column: np.load(directory / f"{column}.npy", mmap_mode="r")
+            for column in CATEGORICAL_COLUMNS
+        },
+        complaint_ids=np.load(directory / "complaint_id.npy", mmap_mode="r"),
+        text_bytes={
+            column: np.load(directory / f"{column}_bytes.npy", mmap_mode="r")
+            for column in texts
+        },
+        text_offsets={
+            column: np.load(directory / f"{column}_offsets.npy", mmap_mode="r")
+            for column in texts
+        },
+    )
+
+
+@lru_cache(maxsize=SNAPSHOTS_TO_KEEP)
+def store_for_snapshot(version: str) -> Optional[MetadataStore]:
+    """Load (once) the sidecar of snapshot *version*.
+
+    Args:
+        version: Snapshot version, or ``""`` for a pre-snapshot store.
+
+    Returns:
+        The store, or ``None`` if that index has no sidecar.
+    """
+    root = SNAPSHOTS_DIR / version if version else VECTOR_STORE_DIR
+    return load_metadata_store(root / METADATA_DIRNAME)
+
+
+def resolve_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Resolve a retrieved chunk's metadata against its snapshot's sidecar.
+
+    Args:
+        metadata: Chunk metadata, tagged with ``snapshot`` by the
+            retriever.  Dicts without ``row`` are returned unchanged.
+
+    Returns:
+        Full metadata dict (or the input if no sidecar is available).
+    """
+    if "row" not in metadata:
+        return metadata
+    store = store_for_snapshot(metadata.get("snapshot") or current_version() or "")
+    return store.resolve(metadata) if store is not None else metadata
+
+
+def raw_narrative(metadata: Dict[str, Any]) -> Optional[str]:
+    """Return the un-normalized narrative behind a retrieved chunk.
+
+    Args:
+        metadata: Chunk metadata, tagged with ``snapshot`` by the
+            retriever.
+
+    Returns:
+        The complaint's original narrative, or ``None`` if the chunk has
+        no row reference or its sidecar predates raw-text storage.
+    """
+    if "row" not in metadata:
+        return None
+    store = store_for_snapshot(metadata.get("snapshot") or current_version() or "")
+    return store.narrative(int(metadata["row"])) if store is not None else None
@@ -0,0 +1,143 @@
+"""Vectorized normalization of complaint narratives before embedding.
+
+CFPB narratives are padded with redaction masks (``XXXX``,
+``XX/XX/XXXX``), brace-wrapped amounts (``{$25.00}``), salutations,
+sign-offs and runs of whitespace, all of which would otherwise be
+chunked and embedded.  :func:`normalize_narratives` rewrites a whole
+column with a fixed sequence of vectorized ``Series.str.replace`` calls;
+:func:`normalize_frame` keeps the original text in
+:data:`RAW_NARRATIVE_COLUMN` so it can still be shown as evidence.
+"""
+
+import re
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+from src.logger import logger
+
+NARRATIVE_COLUMN: str = "Consumer complaint narrative"
+RAW_NARRATIVE_COLUMN: str = "Raw complaint narrative"
+
+# Placeholders that replace redacted spans.
+REDACTION_TOKEN: str = "[REDACTED]"
+DATE_TOKEN: str = "[DATE]"
+
+_SIGN_OFF = r"(?:sincerely|regards|best regards|respectfully|thank you)"
+
+# (pattern, replacement) pairs, applied in order.  Patterns stay within
+# the RE2 subset (no backreferences or lookarounds) so pyarrow-backed
+# string columns are rewritten natively.
+NORMALIZATION_RULES: List[Tuple[str, str]] = [
+    # Dates: fully masked become one token, partially masked keep the year.
+    (r"\bXX/XX/XX(?:XX)?\b", DATE_TOKEN),
+    (r"\bXX/XX/((?:19|20)\d\d)\b", r"\1"),
+    # Runs of masks such as "XXXX XXXX" or "XXXX-XXXX" become one token.
+    (r"\bX{2,}(?:[\s/.,-]+X{2,})*\b", REDACTION_TOKEN),
+    # Amounts: "{$1,500.00}" -> "$1,500.00".
+    (r"\{\$([\d,]*(?:\.\d+)?)\}", r"$\1"),
+    # Opening salutations.
+    (
+        r"(?i)^\s*(?:to whom it may concern|dear (?:sir or madam|sir|madam"
+        r"|cfpb|consumer financial protection bureau))\s*[,:]?\s*",
+        "",
+    ),
+    # Closing sign-offs, optionally followed by a redacted signature.  A
+    # sign-off must open the text or follow a sentence end, so a closing
+    # "... never said thank you" is content and stays.
+    (
+        r"(?i)(?:^\s*|([.!?])[.!?]*\s+)(?:thank you|thanks)(?: (?:very|so) much)?"
+        r"(?: for (?:your|the) (?:time|help|assistance|attention|consideration))?"
+        rf"[.!]*(?:\s*{_SIGN_OFF}[,.]?)?(?:\s*{re.escape(REDACTION_TOKEN)})*\s*$",
+        r"\1",
+    ),
+    (
+        rf"(?i)(?:^\s*|([.!?])[.!?]*\s+){_SIGN_OFF}[,.]?"
+        rf"(?:\s*{re.escape(REDACTION_TOKEN)})*\s*$",
+        r"\1",
+    ),
+    # Repeated punctuation and whitespace.
+    (r"\.{4,}", "..."),
+    (r"([!?])[!?]+", r"\1"),
+    (r"\s+", " "),
+]
+
+
+def normalize_narratives(texts: pd.Series) -> pd.Series:
+    """Apply :data:`NORMALIZATION_RULES` to a column of narratives.
+
+    Args:
+        texts: Narrative strings.
+
+    Returns:
+        A new Series with the normalized, stripped text (same index).
+    """
+    texts = texts.astype(str)
+    for pattern, replacement in NORMALIZATION_RULES:
+        texts = texts.str.replace(pattern, replacement, regex=True)
+    return texts.str.strip()
+
+
+def normalize_frame(
+    df: pd.DataFrame, column: str = NARRATIVE_COLUMN
+) -> Tuple[pd.DataFrame, Dict[str, float]]:
+    """Normalize the narrative column, keeping the original alongside it.
+
+    Args:
+        df: Complaints with a narrative *column*.
+        column: Column to normalize in place (on a copy of *df*).
+
+    Returns:
+        Tuple of ``(frame, stats)``.  *frame* has the normalized text in
+        *column* and the original in :data:`RAW_NARRATIVE_COLUMN`;
+        *stats* reports ``chars_in``, ``chars_out`` and ``reduction``.
+    """
+    frame = df.copy()
+    frame[RAW_NARRATIVE_COLUMN] = frame[column].astype(str)
+    frame[column] = normalize_narratives(frame[RAW_NARRATIVE_COLUMN])
+
+    chars_in = int(frame[RAW_NARRATIVE_COLUMN].str.len().sum())
+    chars_out = int(frame[column].str.len().sum())
+    stats: Dict[str, float] = {
+        "chars_in": chars_in,
+        "chars_out": chars_out,
+        "reduction": 1.0 - chars_out / chars_in if chars_in else 0.0,
+    }
+    logger.info(
+        f"Normalized {len(frame)} narratives: {chars_in} -> {chars_out} "
+        f"characters ({stats['reduction']:.1%} fewer)."
+    )
+    return frame, stats
+
+
+def log_embedding_savings(
+    raw_chunks: int, chunks: int, embed_seconds: float
+) -> Dict[str, float]:
+    """Report how much chunking and embedding work normalization saved.
+
+    The time saved is an estimate: the chunks that the raw text would
+    have added, at the per-chunk rate measured for this run.
+
+    Args:
+        raw_chunks: Chunk count the raw narratives would have produced.
+        chunks: Chunk count actually embedded.
+        embed_seconds: Wall-clock seconds spent embedding *chunks*.
+
+    Returns:
+        Dict with the chunk counts, ``chunk_reduction``,
+        ``embed_seconds`` and ``embed_seconds_saved``.
+    """
+    per_chunk = embed_seconds / chunks if chunks else 0.0
+    stats: Dict[str, float] = {
+        "raw_chunks": raw_chunks,
+        "chunks": chunks,
+        "chunk_reduction": 1.0 - chunks / raw_chunks if raw_chunks else 0.0,
+        "embed_seconds": embed_seconds,
+        "embed_seconds_saved": max(raw_chunks - chunks, 0) * per_chunk,
+    }
+    logger.info(
+        f"Normalization cut chunks {raw_chunks} -> {chunks} "
+        f"({stats['chunk_reduction']:.1%} fewer); embedding took "
+        f"{embed_seconds:.1f}s, ~{stats['embed_seconds_saved']:.1f}s saved."
+    )
+    return stats
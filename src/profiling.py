@@ -0,0 +1,296 @@
+"""Profiling mode for the ETL, ingestion and query pipelines.
+
+A :class:`Profiler` wraps each pipeline stage with wall-clock and CPU
+timers and ``tracemalloc`` peak tracking, optionally running cProfile
+per stage.  :meth:`Profiler.write` produces one Markdown report with a
+stage table, the hottest functions per stage and collapsed stacks
+(``stage;caller;callee <microseconds>``) that ``flamegraph.pl`` or
+speedscope can render directly; the stacks are also written to a
+``.folded`` file next to the report.
+
+Example::
+
+    python -m src.profiling ingest --cprofile
+    python -m src.profiling query "What are the main issues with money transfers?"
+"""
+
+import argparse
+import cProfile
+import io
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import ContextManager, Dict, Iterator, List, Optional, Set, Tuple
+
+from src.config import (
+    PROFILE_MIN_STACK_FRACTION,
+    PROFILE_STACK_DEPTH,
+    PROFILE_TOP_FUNCTIONS,
+    PROFILES_DIR,
+)
+from src.logger import logger
+
+FunctionKey = Tuple[str, int, str]
+
+
+@dataclass
+class StageStats:
+    """Accumulated measurements for one named stage.
+
+    Attributes:
+        calls: Number of times the stage ran.
+        wall: Total wall-clock seconds.
+        cpu: Total process CPU seconds.
+        peak_bytes: Largest ``tracemalloc`` peak seen in any run.
+        profile: Merged cProfile statistics, if enabled.
+    """
+
+    calls: int = 0
+    wall: float = 0.0
+    cpu: float = 0.0
+    peak_bytes: int = 0
+    profile: Optional[pstats.Stats] = field(default=None, repr=False)
+
+
+def _label(func: FunctionKey) -> str:
+    """Render a pstats function key as ``module:function``."""
+    filename, _, name = func
+    if filename == "~":
+        return name.strip("<>").replace("built-in method ", "")
+    module = Path(filename).stem
+    return f"{module}:{name}"
+
+
+def collapse_stacks(
+    stats: pstats.Stats,
+    prefix: str,
+    max_depth: int = PROFILE_STACK_DEPTH,
+    min_fraction: float = PROFILE_MIN_STACK_FRACTION,
+) -> Dict[str, int]:
+    """Convert cProfile statistics into collapsed flamegraph stacks.
+
+    cProfile only records caller/callee edges, so full stacks are
+    rebuilt by walking the call graph from its roots and apportioning
+    each function's own time along the path in proportion to the edge's
+    share of the function's cumulative time.  The number of paths grows
+    exponentially with depth, so paths carrying less than *min_fraction*
+    of the stage's time (and at least 1 µs) are not expanded; their time
+    is missing from the output.
+
+    Args:
+        stats: Statistics to convert.
+        prefix: Frame prepended to every stack (the stage name).
+        max_depth: Deepest call chain to expand.
+        min_fraction: Smallest share of total time a path may carry.
+
+    Returns:
+        Mapping of ``;``-joined stack to self time in microseconds.
+    """
+    table = stats.stats  # type: ignore[attr-defined]
+    callees: Dict[FunctionKey, Dict[FunctionKey, float]] = {}
+    for func, (_, _, _, _, callers) in table.items():
+        for caller, (_, _, _, edge_ct) in callers.items():
+            callees.setdefault(caller, {})[func] = edge_ct
+
+    roots = [func for func, (*_, callers) in table.items() if not callers]
+    total = sum(table[func][3] for func in roots)
+    threshold = max(total * min_fraction, 1e-6)
+    stacks: Dict[str, int] = {}
+
+    def walk(func: FunctionKey, share: float, path: List[str], seen: Set) -> None:
+        _, _, self_time, cumulative, _ = table[func]
+        scale = share / cumulative if cumulative else 0.0
+        frames = path + [_label(func)]
+        micros = int(self_time * scale * 1e6)
+        if micros:
+            key = ";".join(frames)
+            stacks[key] = stacks.get(key, 0) + micros
+        if len(frames) >= max_depth:
+            return
+        for child, edge_ct in callees.get(func, {}).items():
+            child_share = edge_ct * scale
+            if child_share >= threshold and child not in seen and child in table:
+                walk(child, child_share, frames, seen | {child})
+
+    for func in roots:
+        if table[func][3] >= threshold:
+            walk(func, table[func][3], [prefix], {func})
+    return stacks
+
+
+class Profiler:
+    """Per-stage wall/CPU/memory profiler for one pipeline run.
+
+    Stages are entered with :meth:`stage` and may run many times (e.g.
+    retrieval once per query); measurements accumulate per name.
+    ``tracemalloc`` keeps one process-wide peak, which each stage resets
+    on entry: stages must neither nest nor run concurrently (e.g. queries
+    on several threads), or their peak-memory figures are meaningless.
+    Wall and CPU times stay per stage, though CPU time is per process.
+
+    Attributes:
+        name: Run name used in the report filename.
+        cprofile: Whether each stage also runs under cProfile.
+        stages: Accumulated :class:`StageStats` by stage name.
+    """
+
+    def __init__(self, name: str, cprofile: bool = False) -> None:
+        self.name = name
+        self.cprofile = cprofile
+        self.stages: Dict[str, StageStats] = {}
+        self._lock = threading.Lock()
+        self._started_tracing = False
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Measure the enclosed block as stage *name*."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        tracemalloc.reset_peak()
+        profile = cProfile.Profile() if self.cprofile else None
+        wall, cpu = time.perf_counter(), time.process_time()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            _, peak = tracemalloc.get_traced_memory()
+            with self._lock:
+                stats = self.stages.setdefault(name, StageStats())
+                stats.calls += 1
+                stats.wall += wall
+                stats.cpu += cpu
+                stats.peak_bytes = max(stats.peak_bytes, peak)
+                if profile is not None:
+                    if stats.profile is None:
+                        stats.profile = pstats.Stats(profile)
+                    else:
+                        stats.profile.add(profile)
+
+    def stage_table(self) -> str:
+        """Render the per-stage measurements as a Markdown table."""
+        total = sum(s.wall for s in self.stages.values()) or 1.0
+        lines = [
+            "| Stage | Calls | Wall (s) | CPU (s) | Wall % | Peak memory (MB) |",
+            "|---|---:|---:|---:|---:|---:|",
+        ]
+        for name, s in self.stages.items():
+            lines.append(
+                f"| {name} | {s.calls} | {s.wall:.3f} | {s.cpu:.3f} "
+                f"| {100 * s.wall / total:.1f} | {s.peak_bytes / 1e6:.1f} |"
+            )
+        return "\n".join(lines)
+
+    def collapsed_stacks(self) -> List[str]:
+        """Return flamegraph-ready ``stack count`` lines for all stages."""
+        lines: List[str] = []
+        for name, s in self.stages.items():
+            if s.profile is not None:
+                stacks = collapse_stacks(s.profile, name)
+                lines += [f"{stack} {micros}" for stack, micros in stacks.items()]
+        return lines
+
+    def write(self, output_dir: Path = PROFILES_DIR) -> Path:
+        """Write the report and stop ``tracemalloc`` if this run started it.
+
+        Args:
+            output_dir: Directory for the report.  Defaults to
+                ``config.PROFILES_DIR``.
+
+        Returns:
+            Path of the Markdown report.
+        """
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output_dir.mkdir(parents=True, exist_ok=True)
+        report_path = output_dir / f"{self.name}-{stamp}.md"
+        sections = [f"# Profile: {self.name} ({stamp})", "", self.stage_table()]
+
+        for name, s in self.stages.items():
+            if s.profile is None:
+                continue
+            buffer = io.StringIO()
+            s.profile.stream = buffer  # type: ignore[attr-defined]
+            s.profile.sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+            sections += [
+                "",
+                f"## {name}: top functions",
+                "",
+                "```",
+                buffer.getvalue().strip(),
+                "```",
+            ]
+
+        stacks = self.collapsed_stacks()
+        if stacks:
+            folded_path = report_path.with_suffix(".folded")
+            folded_path.write_text("\n".join(stacks) + "\n", encoding="utf-8")
+            sections += [
+                "",
+                f"## Collapsed stacks (also in `{folded_path.name}`)",
+                "",
+                "```",
+                *stacks,
+                "```",
+            ]
+
+        report_path.write_text("\n".join(sections) + "\n", encoding="utf-8")
+        logger.info(f"Wrote profile report to {report_path}")
+        return report_path
+
+
+def profile_stage(profiler: Optional[Profiler], name: str) -> ContextManager:
+    """Return ``profiler.stage(name)``, or a no-op when profiling is off.
+
+    Args:
+        profiler: Active profiler, or ``None``.
+        name: Stage name.
+
+    Returns:
+        Context manager to wrap the stage with.
+    """
+    return profiler.stage(name) if profiler is not None else nullcontext()
+
+
+def main() -> None:
+    """Run the ETL, ingestion or one query in profiling mode."""
+    parser = argparse.ArgumentParser(description="CrediTrust pipeline profiler")
+    parser.add_argument("target", choices=["etl", "ingest", "query"])
+    parser.add_argument("question", nargs="?", default="What are the main issues?")
+    parser.add_argument("--cprofile", action="store_true", help="cProfile each stage")
+    parser.add_argument("--output", type=Path, default=PROFILES_DIR)
+    args = parser.parse_args()
+
+    profiler = Profiler(args.target, cprofile=args.cprofile)
+    if args.target == "etl":
+        from src.etl import run_etl
+
+        run_etl(profiler=profiler)
+    elif args.target == "ingest":
+        from src.ingest import ingest_data
+
+        ingest_data(profiler=profiler)
+    else:
+        from src.rag import get_rag_chain
+
+        with profiler.stage("chain_setup"):
+            chain = get_rag_chain(profiler=profiler)
+        chain.invoke({"query": args.question})
+
+    print(profiler.write(args.output))
+
+
+if __name__ == "__main__":
+    main()
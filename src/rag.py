@@ -2,43 +2,227 @@
 
 Builds a LangChain Expression Language (LCEL) chain that retrieves
 relevant complaint documents from a Chroma vector store and generates
-analyst-quality answers via the DeepSeek-R1 LLM.
+analyst-quality answers via the DeepSeek-R1 LLM.  The retriever follows
+the published index snapshot (see ``src.snapshots``) and swaps to a new
+one between requests without a restart.
 """
 
-from typing import Any, Dict, List
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
 
 from langchain_chroma import Chroma
 from langchain_core.documents import Document
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import PromptTemplate
-from langchain_core.runnables import Runnable, RunnablePassthrough
+from langchain_core.runnables import Runnable, RunnableLambda, RunnablePassthrough
 from langchain_huggingface import HuggingFaceEmbeddings
 from dotenv import load_dotenv
 import os
 
+from src.clustering import load_clusters
 from src.config import (
     EMBEDDING_MODEL_NAME,
+    LLM_API_URL,
+    LLM_FALLBACK_REPO_ID,
     LLM_REPO_ID,
     LLM_TEMPERATURE,
     RETRIEVER_K,
+    SNAPSHOT_POLL_SECONDS,
+    SNAPSHOTS_DIR,
     VECTOR_STORE_DIR,
 )
 from src.custom_llm import HuggingFaceAPIWrapper
 from src.logger import logger
+from src.metadata_store import store_for_snapshot
+from src.profiling import Profiler, profile_stage
+from src.rollups import load_rollups
+from src.router import build_router, context_products
+from src.snapshots import current_path, current_version
 
 load_dotenv()
 
+# LLM of the most recently built chain, for :func:`hedge_stats`.
+_llm: Dict[str, HuggingFaceAPIWrapper] = {}
 
-def get_rag_chain() -> Runnable:
+
+def index_version() -> str:
+    """Return an identifier that changes whenever the vector store is rebuilt.
+
+    Used to keep cached or coalesced answers from mixing index builds.
+
+    Returns:
+        The published snapshot version; for a pre-snapshot store, the
+        modification time (ns) of its Chroma database file; or an empty
+        string if no store exists.
+    """
+    version = current_version()
+    if version:
+        return version
+    db_file = VECTOR_STORE_DIR / "chroma.sqlite3"
+    return str(db_file.stat().st_mtime_ns) if db_file.exists() else ""
+
+
+class HotSwapRetriever:
+    """Retriever that follows the published index snapshot.
+
+    At most every ``poll_seconds`` a request checks the snapshot pointer.
+    When it names a new version, the new store is opened and warmed up
+    on a background thread while requests keep using the current one;
+    the swap itself is a single attribute assignment, so every request
+    runs against exactly one snapshot.
+
+    The served ``(retriever, version)`` pair is replaced as one tuple.
+    """
+
+    def __init__(
+        self,
+        open_store: Callable[[Path], Any],
+        poll_seconds: float = SNAPSHOT_POLL_SECONDS,
+        warm_up: bool = False,
+        on_swap: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        """Open the currently published store.
+
+        Args:
+            open_store: Builds a retriever for a store directory.
+            poll_seconds: Minimum interval between pointer checks.
+            warm_up: Run one throw-away retrieval on the initial store.
+            on_swap: Called with the new version after each swap, on the
+                loader thread, e.g. to reload artifacts built alongside
+                the snapshot.
+        """
+        self._open_store = open_store
+        self._on_swap = on_swap
+        self._poll_seconds = poll_seconds
+        self._lock = threading.Lock()
+        self._loading: Optional[str] = None
+        self._next_check = time.monotonic() + poll_seconds
+        self._current = (open_store(current_path()), current_version() or "")
+        if warm_up:
+            self._current[0].invoke("warm-up")
+
+    @property
+    def version(self) -> str:
+        """Snapshot version currently served."""
+        return self._current[1]
+
+    def invoke(
+        self, query: str, products: Optional[List[str]] = None
+    ) -> List[Document]:
+        """Retrieve documents for *query* from the served snapshot.
+
+        Chunks that reference the metadata sidecar are tagged with the
+        snapshot they came from so ``metadata_store.resolve_metadata``
+        reads the matching sidecar.
+
+        Args:
+            query: Search text.
+            products: Restrict results to these products.  The filter is
+                pushed down to the vector store as row ranges of the
+                snapshot's metadata sidecar (or, for a pre-sidecar
+                index, as a filter on the chunks' ``product`` metadata).
+        """
+        self.check_for_update()
+        retriever, version = self._current
+        search: Dict[str, Any] = {}
+        if products:
+            store = store_for_snapshot(version)
+            search["filter"] = (
+                store.where("product", *products)
+                if store is not None
+                else {"product": {"$in": products}}
+            )
+        docs = retriever.invoke(query, **search)
+        for doc in docs:
+            if "row" in doc.metadata:
+                doc.metadata["snapshot"] = version
+        return docs
+
+    def check_for_update(self) -> Optional[threading.Thread]:
+        """Start loading a newly published snapshot, if there is one.
+
+        Returns:
+            The background loader thread, or ``None`` if no swap started.
+        """
+        now = time.monotonic()
+        if now < self._next_check:
+            return None
+        with self._lock:
+            if now < self._next_check or self._loading:
+                return None
+            self._next_check = now + self._poll_seconds
+            version = current_version()
+            if not version or version == self.version:
+                return None
+            self._loading = version
+
+        thread = threading.Thread(
+            target=self._swap, args=(version,), name=f"snapshot-{version}", daemon=True
+        )
+        thread.start()
+        return thread
+
+    def _swap(self, version: str) -> None:
+        """Open and warm up snapshot *version*, then start serving it."""
+        try:
+            retriever = self._open_store(SNAPSHOTS_DIR / version)
+            retriever.invoke("warm-up")
+        except Exception as exc:
+            logger.error(f"Could not load index snapshot {version}: {exc}")
+        else:
+            self._current = (retriever, version)
+            logger.info(f"Swapped retriever to index snapshot {version}")
+            if self._on_swap is not None:
+                try:
+                    self._on_swap(version)
+                except Exception as exc:
+                    logger.error(f"Swap hook failed for snapshot {version}: {exc}")
+        finally:
+            self._loading = None
+
+
+def hedge_stats() -> Dict[str, float]:
+    """Return the hedging counters of the most recently built chain's LLM.
+
+    Returns:
+        :meth:`HuggingFaceAPIWrapper.hedge_stats`, or an empty dict if no
+        chain has been built yet.
+    """
+    llm = _llm.get("chain")
+    return llm.hedge_stats() if llm is not None else {}
+
+
+def get_rag_chain(
+    warm_up: bool = False, profiler: Optional[Profiler] = None
+) -> Runnable:
     """Build and return the full RAG chain.
 
     The chain performs the following steps:
+      0. Route count / trend questions to the precomputed rollups and
+         "top issues" questions to the topic clusters (see
+         ``src.router``); everything else continues below.
       1. Map the user query into the expected schema.
       2. Retrieve the top-*k* most relevant complaint documents.
       3. Format the documents and pass them through a prompt template.
       4. Generate an answer with the LLM.
       5. Adapt the output to a standard ``{result, source_documents}`` dict.
 
+    The retriever is a :class:`HotSwapRetriever`, so a long-lived chain
+    picks up newly ingested snapshots on its own; the rollups and topic
+    clusters the router answers from are reloaded on every swap.  Slow
+    LLM requests are hedged with the model named by ``HF_FALLBACK_REPO_ID``
+    (default ``config.LLM_FALLBACK_REPO_ID``); see :func:`hedge_stats`.
+
+    Args:
+        warm_up: If ``True``, run one throw-away retrieval before
+            returning so the embedding model and index are loaded and the
+            first real query pays no cold-start cost.
+        profiler: If given, retrieval and generation are recorded as
+            profiling stages on every query (see ``src.profiling``).
+            The LLM is then invoked without token streaming.
+
     Returns:
         Runnable: A LangChain runnable that accepts ``{"query": str}``
             and returns ``{"result": str, "source_documents": List[Document]}``.
@@ -49,20 +233,36 @@ def get_rag_chain() -> Runnable:
     """
     embedding = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME)
 
-    persist_dir: str = str(VECTOR_STORE_DIR)
-    if not VECTOR_STORE_DIR.exists():
-        logger.warning(
-            f"Vector store at {persist_dir} does not exist. Retrieval may fail."
+    def open_store(path: Path) -> Any:
+        """Open the Chroma store at *path* as a top-*k* retriever."""
+        persist_dir: str = str(path)
+        if not path.exists():
+            logger.warning(
+                f"Vector store at {persist_dir} does not exist. Retrieval may fail."
+            )
+        vector_db = Chroma(persist_directory=persist_dir, embedding_function=embedding)
+        return vector_db.as_retriever(search_kwargs={"k": RETRIEVER_K})
+
+    router: Dict[str, Runnable] = {}
+
+    def reload_router(version: str = "") -> None:
+        """Rebuild the router over freshly loaded rollups and clusters."""
+        router["chain"] = build_router(
+            full_chain | final_adapter, load_rollups(), load_clusters()
         )
+        if version:
+            logger.info(f"Reloaded rollups and clusters for snapshot {version}")
 
-    vector_db = Chroma(persist_directory=persist_dir, embedding_function=embedding)
-    retriever = vector_db.as_retriever(search_kwargs={"k": RETRIEVER_K})
+    retriever = HotSwapRetriever(open_store, warm_up=warm_up, on_swap=reload_router)
 
     llm = HuggingFaceAPIWrapper(
         repo_id=LLM_REPO_ID,
         api_token=os.getenv("HUGGINGFACEHUB_API_TOKEN"),
         temperature=LLM_TEMPERATURE,
+        api_url=os.getenv("HF_ROUTER_URL", LLM_API_URL),
+        fallback_repo_id=os.getenv("HF_FALLBACK_REPO_ID", LLM_FALLBACK_REPO_ID),
     )
+    _llm["chain"] = llm
 
     template = """\
 <s>[INST] You are the **Lead Customer Insights Analyst** at CrediTrust Financial.
@@ -121,10 +321,24 @@ def get_rag_chain() -> Runnable:
         """
         return {"question": inputs["query"]}
 
-    # Chain to get context (documents)
-    retrieval_step = RunnablePassthrough.assign(
-        context=lambda x: retriever.invoke(x["question"])
-    )
+    # Chain to get context (documents), restricted to the product filter
+    # selected in the app / server request, if any.
+    def retrieve(x: Dict[str, Any]) -> List[Document]:
+        """Retrieve context documents for the mapped question."""
+        with profile_stage(profiler, "retrieval"):
+            return retriever.invoke(
+                x["question"], products=context_products(x["question"])
+            )
+
+    retrieval_step = RunnablePassthrough.assign(context=retrieve)
+
+    generate: Runnable = llm
+    if profiler is not None:
+
+        def generate(prompt_value: Any) -> str:
+            """Invoke the LLM inside the ``generation`` profiling stage."""
+            with profiler.stage("generation"):
+                return llm.invoke(prompt_value)
 
     # Chain to generate answer
     generation_step = (
@@ -133,7 +347,7 @@ def get_rag_chain() -> Runnable:
         )
         | (lambda x: {"context": x["formatted_context"], "question": x["question"]})
         | prompt
-        | llm
+        | generate
         | StrOutputParser()
     )
 
@@ -155,4 +369,5 @@ def get_rag_chain() -> Runnable:
         """
         return {"result": x["result"], "source_documents": x["context"]}
 
-    return full_chain | final_adapter
+    reload_router()
+    return RunnableLambda(lambda _: router["chain"])
@@ -0,0 +1,113 @@
+"""Precomputed aggregate rollups for the CrediTrust complaint corpus.
+
+Builds compact count tables (by product, sub-product, state, company and
+month) from the filtered complaints so that count and trend questions can
+be answered without vector retrieval or an LLM call.  Tables are stored
+as Parquet (columnar, dictionary-encoded categoricals).
+"""
+
+from pathlib import Path
+from typing import Dict
+
+import pandas as pd
+
+from src.config import ROLLUP_DIMENSIONS, ROLLUPS_DIR
+from src.logger import logger
+
+# Source CSV column for each rollup dimension.
+DIMENSION_COLUMNS: Dict[str, str] = {
+    "product": "Product",
+    "sub_product": "Sub-product",
+    "state": "State",
+    "company": "Company",
+}
+
+# Name of the table holding plain product x month counts.
+PRODUCT_MONTH_TABLE: str = "product_month"
+
+
+def build_rollups(df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """Aggregate complaint counts into compact rollup tables.
+
+    Every table is keyed by ``product`` and ``month`` (``YYYY-MM``) so
+    that product and year filters can be applied to any of them.  One
+    additional table is produced per entry in
+    ``config.ROLLUP_DIMENSIONS``.
+
+    Args:
+        df: Filtered complaints DataFrame (as produced by
+            ``etl.run_etl()``).  Must contain ``Product`` and
+            ``Date received`` columns.
+
+    Returns:
+        Mapping of table name to a DataFrame with the key columns plus
+        an integer ``count`` column.
+    """
+    logger.info("Building aggregate rollups...")
+
+    base = pd.DataFrame(
+        {
+            "product": df["Product"].fillna("Unknown"),
+            "month": pd.to_datetime(df["Date received"], errors="coerce")
+            .dt.strftime("%Y-%m")
+            .fillna("Unknown"),
+        }
+    )
+    for dim in ROLLUP_DIMENSIONS:
+        column = DIMENSION_COLUMNS[dim]
+        if column in df.columns:
+            base[dim] = df[column].fillna("Unknown")
+        else:
+            base[dim] = "Unknown"
+
+    tables: Dict[str, pd.DataFrame] = {}
+    for name, keys in [(PRODUCT_MONTH_TABLE, ["product", "month"])] + [
+        (dim, ["product", dim, "month"]) for dim in ROLLUP_DIMENSIONS
+    ]:
+        table = base.groupby(keys, observed=True).size().reset_index(name="count")
+        for key in keys:
+            table[key] = table[key].astype("category")
+        table["count"] = table["count"].astype("int32")
+        tables[name] = table
+
+    logger.info(
+        "Built rollups: "
+        + ", ".join(f"{name}={len(table)} rows" for name, table in tables.items())
+    )
+    return tables
+
+
+def save_rollups(
+    tables: Dict[str, pd.DataFrame], rollups_dir: Path = ROLLUPS_DIR
+) -> None:
+    """Persist rollup tables as Parquet files.
+
+    Args:
+        tables: Mapping returned by :func:`build_rollups`.
+        rollups_dir: Target directory.  Defaults to
+            ``config.ROLLUPS_DIR``.
+
+    Returns:
+        None.  Side-effect: writes one ``<name>.parquet`` file per table.
+    """
+    rollups_dir.mkdir(parents=True, exist_ok=True)
+    for name, table in tables.items():
+        table.to_parquet(rollups_dir / f"{name}.parquet", index=False)
+    logger.info(f"Saved {len(tables)} rollup tables to {rollups_dir}")
+
+
+def load_rollups(rollups_dir: Path = ROLLUPS_DIR) -> Dict[str, pd.DataFrame]:
+    """Load previously saved rollup tables.
+
+    Args:
+        rollups_dir: Directory written by :func:`save_rollups`.
+
+    Returns:
+        Mapping of table name to DataFrame, or an empty dict if no
+        rollups have been built yet.
+    """
+    if not rollups_dir.exists():
+        logger.info(f"No rollups found at {rollups_dir}; aggregate routing disabled.")
+        return {}
+
+    return {path.stem: pd.read_parquet(path) for path in rollups_dir.glob("*.parquet")}
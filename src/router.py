@@ -0,0 +1,495 @@
+"""Query routing for the CrediTrust RAG chain.
+
+Sits in front of the retrieval + generation chain and answers questions
+that do not need an LLM directly: greetings and capability questions
+from canned responses, counts and trends from the rollup tables, "top
+issues" from the topic clusters.  Other qualitative questions fall
+through to RAG.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from langchain_core.documents import Document
+from langchain_core.runnables import Runnable, RunnableLambda
+
+from src.clustering import ClusterIndex
+from src.config import CLUSTER_TOP_N, ROLLUP_DIMENSIONS, ROLLUP_TOP_N
+from src.rollups import PRODUCT_MONTH_TABLE
+
+# Phrases that identify a question as a count / trend question.
+AGGREGATE_PATTERN = re.compile(
+    r"\b(how many|number of|count|counts|volume|trend|trends|per month|monthly|"
+    r"over time|by month|each month|by state|per state|which states|"
+    r"by company|per company|which companies|top companies|top states|"
+    r"by sub product|per sub product)\b"
+)
+
+# Phrases selecting the breakdown dimension, checked in order.
+DIMENSION_PATTERNS: List[tuple] = [
+    ("sub_product", re.compile(r"\bsub ?products?\b")),
+    ("state", re.compile(r"\bstates?\b")),
+    ("company", re.compile(r"\b(company|companies)\b")),
+    (
+        "month",
+        re.compile(r"\b(per month|monthly|over time|trends?|by month|each month)\b"),
+    ),
+]
+
+# Lower-case keyword -> canonical ``config.TARGET_PRODUCTS`` entries.
+PRODUCT_ALIASES: Dict[str, List[str]] = {
+    "credit card": ["Credit card", "Credit card or prepaid card"],
+    "prepaid": ["Credit card or prepaid card"],
+    "checking": ["Checking or savings account"],
+    "savings": ["Checking or savings account"],
+    "money transfer": ["Money transfer, virtual currency, or money service"],
+    "virtual currency": ["Money transfer, virtual currency, or money service"],
+    "money service": ["Money transfer, virtual currency, or money service"],
+    "personal loan": ["Personal loan"],
+}
+
+# Phrases that ask for the dominant themes of a product's complaints.
+TOP_ISSUES_PATTERN = re.compile(
+    r"\b(top|main|common|primary|biggest|key|major|recurring) "
+    r"(issues|problems|complaints|themes|topics|pain points)\b"
+)
+
+YEAR_PATTERN = re.compile(r"\b((?:19|20)\d{2})\b")
+
+# Lower-case state name -> the two-letter code used in the CFPB data.
+US_STATES: Dict[str, str] = {
+    "alabama": "AL", "alaska": "AK", "arizona": "AZ", "arkansas": "AR",
+    "california": "CA", "colorado": "CO", "connecticut": "CT",
+    "delaware": "DE", "district of columbia": "DC", "florida": "FL",
+    "georgia": "GA", "hawaii": "HI", "idaho": "ID", "illinois": "IL",
+    "indiana": "IN", "iowa": "IA", "kansas": "KS", "kentucky": "KY",
+    "louisiana": "LA", "maine": "ME", "maryland": "MD",
+    "massachusetts": "MA", "michigan": "MI", "minnesota": "MN",
+    "mississippi": "MS", "missouri": "MO", "montana": "MT",
+    "nebraska": "NE", "nevada": "NV", "new hampshire": "NH",
+    "new jersey": "NJ", "new mexico": "NM", "new york": "NY",
+    "north carolina": "NC", "north dakota": "ND", "ohio": "OH",
+    "oklahoma": "OK", "oregon": "OR", "pennsylvania": "PA",
+    "puerto rico": "PR", "rhode island": "RI", "south carolina": "SC",
+    "south dakota": "SD", "tennessee": "TN", "texas": "TX", "utah": "UT",
+    "vermont": "VT", "virginia": "VA", "washington": "WA",
+    "west virginia": "WV", "wisconsin": "WI", "wyoming": "WY",
+}  # fmt: skip
+
+# Upper-case two-letter codes, matched case-sensitively ("in TX").
+STATE_CODE_PATTERN = re.compile(
+    r"\b(" + "|".join(sorted(set(US_STATES.values()))) + r")\b"
+)
+
+# Legal-form suffixes dropped from company names before matching, so
+# "Wells Fargo" finds "WELLS FARGO & COMPANY".
+COMPANY_SUFFIX_PATTERN = re.compile(
+    r"(?:\s+(?:&|and)?\s*(?:company|co|inc|incorporated|corp|corporation|llc|"
+    r"ltd|plc|lp|n a|na|national association|holdings))+$"
+)
+
+# Words a count / trend question may contain besides the filters the
+# parser resolves.  Any other word names a filter the rollups cannot
+# apply ("this year", "late fees"), so the question goes to RAG.
+AGGREGATE_VOCABULARY = frozenset("""
+    a about account accounts across all altogether an and any are as at
+    breakdown broken by card cards companies company complaint complaints
+    consumers count counts customers did do does down each filed for from
+    get give has have how in is list loan loans many me month monthly
+    months number of on or over overall per product products received
+    show state states sub submitted tell the there these time total trend
+    trends volume volumes was were what which with year years
+    """.split())
+
+NO_DATA_ANSWER: str = "The current dataset lacks sufficient information."
+
+# Filter suffix appended by the app and server, e.g. "(Context: Personal loan)".
+CONTEXT_SUFFIX_PATTERN = re.compile(r"\s*\(context: [^)]*\)\s*$")
+
+# Small-talk intents, checked in order.  Each pattern must match the whole
+# (stripped) message, optionally after a short greeting, so analytic
+# questions that merely start like small talk ("What are you seeing in
+# fraud complaints?") are not answered from the canned replies.
+_GREETING = r"(?:hi|hello|hey|hiya|greetings|good (?:morning|afternoon|evening))"
+_LEAD = rf"^(?:{_GREETING}(?: there)?[\s!.,]+)?"
+_TAIL = r"[\s?!.]*$"
+
+INTENT_PATTERNS: List[tuple] = [
+    (
+        "identity",
+        re.compile(
+            _LEAD + r"(?:who are you|what are you|what(?: is|'s) your name|"
+            r"who (?:made|built|created|developed) you)" + _TAIL
+        ),
+    ),
+    (
+        "capabilities",
+        re.compile(
+            _LEAD + r"(?:what can you do(?: for me)?|what do you do|"
+            r"how can you help(?: me)?|what can i ask(?: you)?|"
+            r"what (?:products )?do you cover|help me get started)" + _TAIL
+        ),
+    ),
+    (
+        "greeting",
+        re.compile(rf"^(?:{_GREETING}|thanks|thank you)(?: there)?[\s!.,]*$"),
+    ),
+]
+
+# Longer messages are treated as analytic even if they contain a greeting.
+SMALL_TALK_MAX_WORDS: int = 12
+
+_CAPABILITIES: str = (
+    "My job is to help Product Managers identify trends in customer "
+    "complaints. I cover these products:\n\n"
+    "- Credit Cards\n"
+    "- Personal Loans\n"
+    "- Savings Accounts\n"
+    "- Money Transfers\n\n"
+    "Ask me about complaint volumes and trends, the top issues for a "
+    "product, or what customers are saying about a specific problem."
+)
+
+# Identity content mirrors MODE 1 of the RAG prompt in ``src.rag``.
+CANNED_ANSWERS: Dict[str, str] = {
+    "identity": (
+        "My name is Miftah, the Key for the company's credit assistance. I "
+        "was developed by Miftah, CrediTrust's internal senior AI Engineer.\n\n"
+        + _CAPABILITIES
+    ),
+    "capabilities": _CAPABILITIES,
+    "greeting": (
+        "Hello! I'm Miftah, CrediTrust's complaint insights assistant. "
+        "What would you like to know about customer complaints?"
+    ),
+}
+
+
+@dataclass
+class AggregateQuery:
+    """Structured form of a count / trend question.
+
+    Attributes:
+        dimension: Breakdown dimension (``"month"``, one of
+            ``config.ROLLUP_DIMENSIONS``) or ``None`` for per-product
+            totals.
+        products: Canonical product names to restrict to (empty = all).
+        years: Four-digit years to restrict to (empty = all).
+        states: Two-letter state codes to restrict to (empty = all).
+        companies: Company names, as stored in the rollups, to restrict
+            to (empty = all).
+    """
+
+    dimension: Optional[str] = None
+    products: List[str] = field(default_factory=list)
+    years: List[str] = field(default_factory=list)
+    states: List[str] = field(default_factory=list)
+    companies: List[str] = field(default_factory=list)
+
+
+def _normalize(question: str) -> str:
+    """Lower-case a question and fold hyphens/underscores into spaces."""
+    return re.sub(r"[-_]", " ", question.lower())
+
+
+def classify_intent(question: str) -> Optional[str]:
+    """Detect greetings and questions about the assistant itself.
+
+    Pure keyword rules, so classification costs microseconds and needs
+    no embedding model.
+
+    Args:
+        question: Raw user question, possibly with a filter suffix.
+
+    Returns:
+        A key of :data:`CANNED_ANSWERS`, or ``None`` for questions that
+        need data analysis.
+    """
+    text = CONTEXT_SUFFIX_PATTERN.sub("", _normalize(question)).strip()
+    if len(text.split()) > SMALL_TALK_MAX_WORDS or extract_products(text):
+        return None
+    for intent, pattern in INTENT_PATTERNS:
+        if pattern.search(text):
+            return intent
+    return None
+
+
+def extract_products(question: str) -> List[str]:
+    """Return the canonical product names mentioned in a question.
+
+    Args:
+        question: Raw user question.
+
+    Returns:
+        De-duplicated list of ``config.TARGET_PRODUCTS`` entries, in
+        order of first mention.
+    """
+    text = _normalize(question)
+    products: List[str] = []
+    for alias, names in PRODUCT_ALIASES.items():
+        if alias in text:
+            products.extend(name for name in names if name not in products)
+    return products
+
+
+def context_products(question: str) -> List[str]:
+    """Return the products named in a question's filter suffix.
+
+    Args:
+        question: Raw user question, e.g. ending in
+            ``"(Context: Credit card)"`` as added by the app and server.
+
+    Returns:
+        Canonical product names of the selected filter (empty if there
+        is no suffix or it names no known product).
+    """
+    match = CONTEXT_SUFFIX_PATTERN.search(_normalize(question))
+    return extract_products(match.group(0)) if match else []
+
+
+def _company_key(name: str) -> str:
+    """Return the lower-case, suffix-free form a question would use."""
+    key = re.sub(r"[^a-z0-9&]+", " ", _normalize(name)).strip()
+    return COMPANY_SUFFIX_PATTERN.sub("", key).strip()
+
+
+def parse_aggregate_query(
+    question: str, companies: Sequence[str] = ()
+) -> Optional[AggregateQuery]:
+    """Detect a count / trend question and extract its parameters.
+
+    Besides the breakdown dimension, products and years, states (by name
+    or upper-case code) and *companies* named in the question become
+    filters.  A question that names anything else, or that needs more
+    than one of the ``config.ROLLUP_DIMENSIONS`` tables at once, is left
+    to RAG rather than answered with an unfiltered total.
+
+    Args:
+        question: Raw user question.
+        companies: Company names present in the rollups.
+
+    Returns:
+        An :class:`AggregateQuery`, or ``None`` if the question should be
+        answered by the RAG chain.
+    """
+    text = _normalize(question)
+    if not AGGREGATE_PATTERN.search(text):
+        return None
+
+    dimension: Optional[str] = None
+    for name, pattern in DIMENSION_PATTERNS:
+        if pattern.search(text):
+            dimension = name
+            break
+
+    # Resolve filters, blanking each match so the leftovers can be checked.
+    suffix = CONTEXT_SUFFIX_PATTERN.search(text)
+    end = suffix.start() if suffix else len(text)
+    chars = list(text[:end])
+    states: List[str] = []
+    for match in STATE_CODE_PATTERN.finditer(question[:end]):
+        chars[match.start() : match.end()] = " " * len(match.group(0))
+        if match.group(0) not in states:
+            states.append(match.group(0))
+    rest = "".join(chars)
+    # Longest names first, so "west virginia" is not read as "virginia".
+    for state_name in sorted(US_STATES, key=len, reverse=True):
+        rest, found = re.subn(rf"\b{state_name}\b", " ", rest)
+        if found and US_STATES[state_name] not in states:
+            states.append(US_STATES[state_name])
+
+    rest = re.sub(r"[^a-z0-9&]+", " ", rest)
+    matched_companies: List[str] = []
+    for company in sorted(companies, key=lambda c: len(_company_key(c)), reverse=True):
+        key = _company_key(company)
+        if key and key not in AGGREGATE_VOCABULARY:
+            rest, found = re.subn(rf"\b{re.escape(key)}\b", " ", rest)
+            if found:
+                matched_companies.append(company)
+
+    for alias in PRODUCT_ALIASES:
+        rest = re.sub(rf"\b{alias}s?\b", " ", rest)
+    rest = YEAR_PATTERN.sub(" ", rest)
+    if any(word not in AGGREGATE_VOCABULARY for word in rest.split()):
+        return None
+
+    tables = {dimension} & set(ROLLUP_DIMENSIONS)
+    tables |= {"state"} if states else set()
+    tables |= {"company"} if matched_companies else set()
+    if len(tables) > 1:
+        return None
+
+    return AggregateQuery(
+        dimension=dimension,
+        products=extract_products(question),
+        years=YEAR_PATTERN.findall(text),
+        states=states,
+        companies=matched_companies,
+    )
+
+
+def answer_aggregate(query: AggregateQuery, rollups: Dict[str, pd.DataFrame]) -> str:
+    """Answer an aggregate question from the rollup tables.
+
+    Args:
+        query: Parsed question from :func:`parse_aggregate_query`.
+        rollups: Tables returned by ``rollups.load_rollups()``.
+
+    Returns:
+        A Markdown answer with an executive summary and a count table.
+    """
+    table_name = query.dimension if query.dimension in ROLLUP_DIMENSIONS else None
+    if query.states:
+        table_name = "state"
+    elif query.companies:
+        table_name = "company"
+    table = rollups[table_name or PRODUCT_MONTH_TABLE]
+
+    mask = pd.Series(True, index=table.index)
+    if query.products:
+        mask &= table["product"].isin(query.products)
+    if query.years:
+        mask &= table["month"].astype(str).str[:4].isin(query.years)
+    if query.states:
+        mask &= table["state"].isin(query.states)
+    if query.companies:
+        mask &= table["company"].isin(query.companies)
+    table = table[mask]
+
+    if table.empty or table["count"].sum() == 0:
+        return NO_DATA_ANSWER
+
+    group_key = query.dimension or "product"
+    counts = table.groupby(group_key, observed=True)["count"].sum()
+    if group_key == "month":
+        counts = counts.sort_index()
+    else:
+        counts = counts.sort_values(ascending=False).head(ROLLUP_TOP_N)
+
+    total = int(table["count"].sum())
+    scope = ", ".join(query.products) if query.products else "all products"
+    if query.companies:
+        scope += f" at {', '.join(query.companies)}"
+    if query.states:
+        scope += f" in {', '.join(query.states)}"
+    period = f" in {', '.join(query.years)}" if query.years else ""
+    label = group_key.replace("_", "-").capitalize()
+
+    lines = [
+        "**Executive Summary**",
+        "",
+        f"There were **{total:,}** complaints for {scope}{period}.",
+        "",
+        f"| {label} | Complaints |",
+        "|---|---:|",
+    ]
+    lines.extend(f"| {key} | {int(value):,} |" for key, value in counts.items())
+    return "\n".join(lines)
+
+
+def is_top_issues_query(question: str) -> bool:
+    """Return ``True`` if *question* asks for the dominant complaint themes.
+
+    Args:
+        question: Raw user question.
+
+    Returns:
+        Whether the question should be served from the topic clusters.
+    """
+    return bool(TOP_ISSUES_PATTERN.search(_normalize(question)))
+
+
+def answer_top_issues(
+    products: List[str], clusters: ClusterIndex
+) -> Tuple[str, List[Document]]:
+    """Summarise the largest topic clusters for the requested products.
+
+    Args:
+        products: Canonical product names (empty = every clustered
+            product).
+        clusters: Index returned by ``clustering.load_clusters()``.
+
+    Returns:
+        Tuple of ``(markdown_answer, source_documents)`` where the
+        documents are the clusters' representative chunks.
+    """
+    products = [p for p in products or clusters.products if p in clusters.products]
+    if not products:
+        return NO_DATA_ANSWER, []
+
+    lines = ["**Executive Summary**", ""]
+    sources: List[Document] = []
+    for product in products:
+        summary = clusters.products[product]
+        total = int(summary.sizes.sum())
+        lines += [f"**{product}** ({total:,} complaint excerpts)", ""]
+        for c in np.argsort(-summary.sizes)[:CLUSTER_TOP_N]:
+            if summary.sizes[c] == 0:
+                continue
+            share = 100.0 * summary.sizes[c] / total
+            lines.append(f"- **{summary.labels[c]}** — {share:.0f}% of excerpts")
+            sources += [
+                Document(
+                    page_content=text,
+                    metadata={"product": product, "cluster": summary.labels[c]},
+                )
+                for text in summary.rep_texts[c][:1]
+            ]
+        lines.append("")
+    return "\n".join(lines).rstrip(), sources
+
+
+def build_router(
+    rag_chain: Runnable,
+    rollups: Dict[str, pd.DataFrame],
+    clusters: Optional[ClusterIndex] = None,
+) -> Runnable:
+    """Wrap a RAG chain with a router that short-circuits precomputable questions.
+
+    Small talk is answered first from :data:`CANNED_ANSWERS`, then
+    aggregate and "top issues" questions from the precomputed artifacts.
+
+    Args:
+        rag_chain: Runnable accepting ``{"query": str}`` and returning
+            ``{"result": str, "source_documents": List[Document]}``.
+        rollups: Tables returned by ``rollups.load_rollups()``.  If
+            empty, aggregate questions go to *rag_chain*.
+        clusters: Index returned by ``clustering.load_clusters()``.  If
+            ``None``, "top issues" questions go to *rag_chain*.
+
+    Returns:
+        Runnable with the same input/output schema as *rag_chain*.
+    """
+
+    companies: List[str] = (
+        list(rollups["company"]["company"].astype(str).unique())
+        if "company" in rollups
+        else []
+    )
+
+    def route(inputs: Dict[str, Any]) -> Runnable:
+        """Pick a precomputed fast path or the RAG chain for one query."""
+        question: str = inputs["query"]
+        intent = classify_intent(question)
+        if intent is not None:
+            return RunnableLambda(
+                lambda _: {"result": CANNED_ANSWERS[intent], "source_documents": []}
+            )
+        if rollups:
+            query = parse_aggregate_query(question, companies)
+            if query is not None:
+                answer = answer_aggregate(query, rollups)
+                return RunnableLambda(
+                    lambda _: {"result": answer, "source_documents": []}
+                )
+        if clusters is not None and is_top_issues_query(question):
+            answer, sources = answer_top_issues(extract_products(question), clusters)
+            return RunnableLambda(
+                lambda _: {"result": answer, "source_documents": sources}
+            )
+        return rag_chain
+
+    return RunnableLambda(route)
@@ -0,0 +1,390 @@
+"""Headless HTTP API for the CrediTrust RAG Complaint Intelligence Platform.
+
+Exposes the chain from ``rag.get_rag_chain()`` over ASGI (FastAPI) so
+dashboards and scripts can query it programmatically:
+
+* ``POST /query`` — answer one question.
+* ``POST /query/stream`` — answer one question as NDJSON token events.
+* ``POST /batch`` — answer several questions in one request.
+* ``GET /healthz`` — liveness (process is up).
+* ``GET /readyz`` — readiness (chain built and warmed up).
+* ``GET /metrics`` — request-coalescing and LLM hedging counters.
+
+Each worker builds the chain once in the background at start-up and
+reports ready only after a warm-up retrieval.  All workers open the
+same persisted vector store read-only.  Concurrency is bounded per
+worker: once ``SERVER_MAX_CONCURRENCY`` queries are running and
+``SERVER_MAX_QUEUE`` are waiting, new requests get ``429`` instead of
+queuing without limit.  Identical concurrent questions are coalesced
+into one chain execution (see ``src.singleflight``).
+
+Run with::
+
+    python -m src.server --workers 4
+"""
+
+import argparse
+import asyncio
+import json
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Tuple
+
+import uvicorn
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+from langchain_core.documents import Document
+from langchain_core.runnables import Runnable
+from pydantic import BaseModel, Field
+from starlette.types import Receive, Scope, Send
+
+from src.config import (
+    SERVER_BATCH_CONCURRENCY,
+    SERVER_HOST,
+    SERVER_MAX_BATCH,
+    SERVER_MAX_CONCURRENCY,
+    SERVER_MAX_QUEUE,
+    SERVER_PORT,
+    SERVER_RETRY_AFTER_SECONDS,
+    SERVER_WORKERS,
+)
+from src.logger import logger
+from src.metadata_store import resolve_metadata
+from src.rag import get_rag_chain, hedge_stats, index_version
+from src.singleflight import SingleFlight, make_key
+
+
+# ---------------------------------------------------------------------------
+# Schemas
+# ---------------------------------------------------------------------------
+class QueryRequest(BaseModel):
+    """A single question, optionally scoped to one product."""
+
+    query: str = Field(..., min_length=1)
+    product: Optional[str] = None
+
+
+class BatchRequest(BaseModel):
+    """Several questions answered in one round trip."""
+
+    queries: List[QueryRequest] = Field(..., min_length=1, max_length=SERVER_MAX_BATCH)
+
+
+class SourceDocument(BaseModel):
+    """A retrieved complaint excerpt."""
+
+    page_content: str
+    metadata: Dict[str, Any]
+
+
+class QueryResponse(BaseModel):
+    """Answer plus the evidence it was grounded on."""
+
+    result: str
+    source_documents: List[SourceDocument]
+
+
+class BatchResponse(BaseModel):
+    """Answers in the same order as the submitted questions."""
+
+    results: List[QueryResponse]
+
+
+# ---------------------------------------------------------------------------
+# Admission control
+# ---------------------------------------------------------------------------
+class AdmissionLimiter:
+    """Bounded concurrency with a bounded wait queue.
+
+    Up to *max_concurrency* slots are held at once and up to *max_queue*
+    more may be waited for; anyone beyond that is rejected immediately.
+    A holder may take several slots at once (a batch charges one per
+    query it runs concurrently); waiters are served in arrival order.
+
+    Attributes:
+        max_concurrency: Number of slots that may be held at once.
+        max_queue: Number of slots that may be waited for.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int) -> None:
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self._running = 0
+        self._admitted = 0
+        self._waiters: Deque[Tuple[int, "asyncio.Future[None]"]] = deque()
+
+    async def acquire(self, slots: int = 1) -> None:
+        """Take *slots* slots together, waiting if needed.
+
+        Args:
+            slots: Number of slots to hold until :meth:`release`.
+
+        Raises:
+            HTTPException: ``429`` if both the running and waiting
+                capacity are exhausted.
+            ValueError: If *slots* exceeds ``max_concurrency``.
+        """
+        if self._admitted + slots > self.max_concurrency + self.max_queue:
+            raise HTTPException(
+                status_code=429,
+                detail="Server is at capacity; retry later.",
+                headers={"Retry-After": str(SERVER_RETRY_AFTER_SECONDS)},
+            )
+        if slots > self.max_concurrency:
+            raise ValueError(
+                f"Cannot hold {slots} slots with max_concurrency="
+                f"{self.max_concurrency}."
+            )
+        self._admitted += slots
+        if not self._waiters and self._running + slots <= self.max_concurrency:
+            self._running += slots
+            return
+
+        future: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        self._waiters.append((slots, future))
+        try:
+            await future
+        except BaseException:
+            self._admitted -= slots
+            if future.done() and not future.cancelled():
+                self._running -= slots  # granted just as we were cancelled
+            else:
+                self._waiters.remove((slots, future))
+            self._wake()
+            raise
+
+    def release(self, slots: int = 1) -> None:
+        """Return *slots* slots taken with :meth:`acquire`."""
+        self._running -= slots
+        self._admitted -= slots
+        self._wake()
+
+    def _wake(self) -> None:
+        """Grant slots to waiters, in order, while they fit."""
+        while self._waiters:
+            slots, future = self._waiters[0]
+            if self._running + slots > self.max_concurrency:
+                return
+            self._waiters.popleft()
+            self._running += slots
+            future.set_result(None)
+
+
+class _SlotStreamingResponse(StreamingResponse):
+    """``StreamingResponse`` that returns an admission slot when it ends.
+
+    Releasing here rather than in the body generator's ``finally`` also
+    covers clients that disconnect before the body is first iterated,
+    in which case the generator never starts and never cleans up.
+    """
+
+    def __init__(
+        self, content: AsyncIterator[str], release: Callable[[], None], **kwargs: Any
+    ) -> None:
+        super().__init__(content, **kwargs)
+        self._release = release
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self._release()
+
+
+class _ServerState:
+    """Per-worker runtime state populated during start-up."""
+
+    chain: Optional[Runnable] = None
+    ready: bool = False
+    error: Optional[str] = None
+    limiter: Optional[AdmissionLimiter] = None
+
+
+state = _ServerState()
+flight = SingleFlight()
+
+
+async def _warm_up() -> None:
+    """Build and warm the RAG chain without blocking the event loop."""
+    try:
+        state.chain = await asyncio.to_thread(get_rag_chain, warm_up=True)
+        state.ready = True
+        logger.info("RAG chain warmed up; worker is ready.")
+    except Exception as exc:
+        state.error = str(exc)
+        logger.error(f"Failed to initialise the RAG chain: {exc}")
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    """Start warm-up in the background so liveness answers immediately."""
+    state.chain, state.ready, state.error = None, False, None
+    state.limiter = AdmissionLimiter(SERVER_MAX_CONCURRENCY, SERVER_MAX_QUEUE)
+    task = asyncio.create_task(_warm_up())
+    yield
+    task.cancel()
+
+
+app = FastAPI(title="CrediTrust RAG API", lifespan=lifespan)
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+def _chain_input(request: QueryRequest) -> Dict[str, str]:
+    """Build the chain input, applying the product filter like ``app.py``."""
+    query = (
+        f"{request.query} (Context: {request.product})"
+        if request.product and request.product != "All Products"
+        else request.query
+    )
+    return {"query": query}
+
+
+def _flight_key(request: QueryRequest) -> str:
+    """Coalescing key for a request against the current index."""
+    return make_key(request.query, {"product": request.product}, index_version())
+
+
+def _serialize(response: Dict[str, Any]) -> QueryResponse:
+    """Convert a chain response to the API schema."""
+    docs: List[Document] = response["source_documents"]
+    return QueryResponse(
+        result=response["result"],
+        source_documents=[
+            SourceDocument(
+                page_content=d.page_content, metadata=resolve_metadata(d.metadata)
+            )
+            for d in docs
+        ],
+    )
+
+
+async def _answer(chain: Runnable, request: QueryRequest) -> QueryResponse:
+    """Run (or join an identical in-flight run of) one question."""
+    response = await flight.ado(
+        _flight_key(request), lambda: chain.ainvoke(_chain_input(request))
+    )
+    return _serialize(response)
+
+
+async def _stream_events(chain: Runnable, request: QueryRequest) -> AsyncIterator[str]:
+    """Produce the NDJSON event lines for one streamed question."""
+    try:
+        async for event in chain.astream_events(_chain_input(request), version="v2"):
+            if event["event"] == "on_llm_stream":
+                token = event["data"]["chunk"].text
+                if token:
+                    yield json.dumps({"type": "token", "content": token}) + "\n"
+            elif event["event"] == "on_chain_end" and not event["parent_ids"]:
+                final = _serialize(event["data"]["output"])
+                yield json.dumps({"type": "result", **final.model_dump()}) + "\n"
+    except Exception as exc:
+        logger.error(f"Streaming query failed: {exc}")
+        yield json.dumps({"type": "error", "detail": str(exc)}) + "\n"
+
+
+def _require_ready() -> Runnable:
+    """Return the chain, or raise ``503`` until warm-up has finished."""
+    if not state.ready or state.chain is None:
+        raise HTTPException(status_code=503, detail="Model is warming up.")
+    return state.chain
+
+
+# ---------------------------------------------------------------------------
+# Endpoints
+# ---------------------------------------------------------------------------
+@app.get("/healthz")
+async def healthz() -> Dict[str, str]:
+    """Liveness probe: the worker process is serving HTTP."""
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+async def readyz() -> JSONResponse:
+    """Readiness probe: ``200`` once the chain is built and warmed up."""
+    if state.ready:
+        return JSONResponse({"status": "ready"})
+    status = "failed" if state.error else "warming_up"
+    return JSONResponse({"status": status, "detail": state.error}, status_code=503)
+
+
+@app.get("/metrics")
+async def metrics() -> Dict[str, Dict[str, float]]:
+    """Report query coalescing and how often the LLM was hedged."""
+    return {"singleflight": dict(flight.metrics), "hedging": hedge_stats()}
+
+
+@app.post("/query", response_model=QueryResponse)
+async def query(request: QueryRequest) -> QueryResponse:
+    """Answer a single question."""
+    chain = _require_ready()
+    await state.limiter.acquire()
+    try:
+        return await _answer(chain, request)
+    finally:
+        state.limiter.release()
+
+
+@app.post("/query/stream")
+async def query_stream(request: QueryRequest) -> StreamingResponse:
+    """Answer a single question as newline-delimited JSON events.
+
+    Emits ``{"type": "token", "content": ...}`` for each generated token
+    and finishes with ``{"type": "result", ...}`` carrying the full
+    answer and source documents (or ``{"type": "error", ...}``).
+    """
+    chain = _require_ready()
+    await state.limiter.acquire()
+    events = flight.astream(
+        _flight_key(request), lambda: _stream_events(chain, request)
+    )
+    return _SlotStreamingResponse(
+        events, state.limiter.release, media_type="application/x-ndjson"
+    )
+
+
+@app.post("/batch", response_model=BatchResponse)
+async def batch(request: BatchRequest) -> BatchResponse:
+    """Answer several questions, at most ``SERVER_BATCH_CONCURRENCY`` at a time.
+
+    The batch holds one admission slot per query it runs concurrently,
+    so batches count against ``SERVER_MAX_CONCURRENCY`` like the same
+    number of single queries.
+    """
+    chain = _require_ready()
+    slots = max(
+        min(
+            len(request.queries),
+            SERVER_BATCH_CONCURRENCY,
+            state.limiter.max_concurrency,
+        ),
+        1,
+    )
+    await state.limiter.acquire(slots)
+    try:
+        semaphore = asyncio.Semaphore(slots)
+
+        async def run(item: QueryRequest) -> QueryResponse:
+            async with semaphore:
+                return await _answer(chain, item)
+
+        results = await asyncio.gather(*(run(item) for item in request.queries))
+        return BatchResponse(results=list(results))
+    finally:
+        state.limiter.release(slots)
+
+
+def main() -> None:
+    """Parse command-line options and start the multi-worker server."""
+    parser = argparse.ArgumentParser(description="CrediTrust RAG HTTP API")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS)
+    args = parser.parse_args()
+
+    uvicorn.run("src.server:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""Single-flight request coalescing for the CrediTrust RAG chain.
+
+When several callers ask the same question at the same time, only the
+first one (the *leader*) runs the embedding, search and LLM call; the
+others wait for and share its result.  Works for synchronous callers
+(threads, e.g. Streamlit sessions), asynchronous callers (the HTTP
+server) and streamed responses.
+"""
+
+import asyncio
+import hashlib
+import json
+import re
+import threading
+from concurrent.futures import Future
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+T = TypeVar("T")
+
+
+def make_key(
+    query: str,
+    filters: Optional[Dict[str, Any]] = None,
+    index_version: str = "",
+) -> str:
+    """Build the coalescing key for a query.
+
+    Queries that differ only in case or whitespace share a key; filters
+    are compared order-independently.
+
+    Args:
+        query: Raw user question.
+        filters: Optional filters applied to the query (e.g. product).
+        index_version: Version of the index the query runs against, so
+            that requests straddling a re-index are not merged.
+
+    Returns:
+        Hex SHA-256 digest identifying the request.
+    """
+    normalized = re.sub(r"\s+", " ", query).strip().casefold()
+    payload = json.dumps(
+        [normalized, filters or {}, index_version], sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _Broadcast:
+    """Replayable buffer of one in-flight stream's items."""
+
+    def __init__(self) -> None:
+        self.items: List[Any] = []
+        self.done: bool = False
+        self.error: Optional[BaseException] = None
+        self.condition = asyncio.Condition()
+        self.subscribers: int = 0
+        self.pump: Optional[asyncio.Task] = None
+
+    async def subscribe(self) -> AsyncIterator[Any]:
+        """Yield every item from the start, then follow live until done."""
+        position = 0
+        while True:
+            async with self.condition:
+                await self.condition.wait_for(
+                    lambda: position < len(self.items) or self.done
+                )
+                pending = self.items[position:]
+                finished = self.done
+            for item in pending:
+                yield item
+            position += len(pending)
+            if finished and position >= len(self.items):
+                if self.error is not None:
+                    raise self.error
+                return
+
+
+class SingleFlight:
+    """Coalesce concurrent executions that share a key.
+
+    Results (and exceptions) of the leader are delivered to every caller
+    that joined while it was in flight.  Nothing is cached afterwards:
+    the next call with the same key starts a new execution.
+
+    Attributes:
+        metrics: Counters ``executed`` (leader runs), ``coalesced``
+            (callers that shared a leader's work) and ``in_flight``.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+        self._streams: Dict[str, _Broadcast] = {}
+        # Strong references to background tasks (stream pumps and shared
+        # async calls) so they are not garbage-collected mid-flight.
+        self._tasks: Set[asyncio.Task] = set()
+        self.metrics: Dict[str, int] = {"executed": 0, "coalesced": 0, "in_flight": 0}
+
+    def _join(self, key: str) -> Tuple[Future, bool]:
+        """Register interest in *key*; return ``(future, is_leader)``."""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self.metrics["coalesced"] += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            self.metrics["executed"] += 1
+            self.metrics["in_flight"] += 1
+            return future, True
+
+    def _finish(self, key: str) -> None:
+        """Remove a completed leader so later calls start afresh."""
+        with self._lock:
+            self._calls.pop(key, None)
+            self.metrics["in_flight"] -= 1
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        """Run *fn* once for all concurrent synchronous callers of *key*.
+
+        Args:
+            key: Coalescing key, usually from :func:`make_key`.
+            fn: Zero-argument callable performing the work.
+
+        Returns:
+            The leader's result.
+
+        Raises:
+            Exception: Whatever the leader's *fn* raised.
+        """
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as exc:
+            if not future.done():
+                future.set_exception(exc)
+            raise
+        else:
+            if not future.done():
+                future.set_result(result)
+            return result
+        finally:
+            self._finish(key)
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Async counterpart of :meth:`do`.
+
+        Async and sync callers of the same key share one execution.  The
+        work runs as a background task and every caller, the leader
+        included, awaits it through :func:`asyncio.shield`, so cancelling
+        one caller (e.g. a client disconnecting) leaves the others
+        unaffected.
+
+        Args:
+            key: Coalescing key, usually from :func:`make_key`.
+            fn: Zero-argument coroutine function performing the work.
+
+        Returns:
+            The leader's result.
+
+        Raises:
+            Exception: Whatever the leader's *fn* raised.
+        """
+        future, leader = self._join(key)
+        if leader:
+            try:
+                task = asyncio.ensure_future(fn())
+            except BaseException as exc:
+                future.set_exception(exc)
+                self._finish(key)
+                raise
+            self._tasks.add(task)
+            task.add_done_callback(lambda t: self._settle(key, future, t))
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    def _settle(self, key: str, future: Future, task: asyncio.Task) -> None:
+        """Publish a finished shared task's outcome to its future."""
+        self._tasks.discard(task)
+        if not future.done():
+            if task.cancelled():
+                future.cancel()
+            elif task.exception() is not None:
+                future.set_exception(task.exception())
+            else:
+                future.set_result(task.result())
+        self._finish(key)
+
+    async def astream(
+        self, key: str, fn: Callable[[], AsyncIterator[T]]
+    ) -> AsyncIterator[T]:
+        """Share one in-flight stream among concurrent async callers.
+
+        The source stream is driven by a background task, so a leader
+        disconnecting does not stall the other subscribers.  Late joiners
+        receive the items produced so far, then follow live.  When the
+        last subscriber leaves, the source is cancelled rather than
+        drained for nobody.  Streams are coalesced within one event loop
+        (i.e. per server worker).
+
+        Args:
+            key: Coalescing key, usually from :func:`make_key`.
+            fn: Zero-argument callable returning an async iterator.
+
+        Yields:
+            The items produced by the leader's stream.
+
+        Raises:
+            Exception: Whatever the leader's stream raised.
+            RuntimeError: If the shared stream was cancelled before it
+                finished (e.g. on shutdown).
+        """
+        with self._lock:
+            broadcast = self._streams.get(key)
+            if broadcast is None:
+                broadcast = _Broadcast()
+                self._streams[key] = broadcast
+                self.metrics["executed"] += 1
+                self.metrics["in_flight"] += 1
+                broadcast.pump = asyncio.get_running_loop().create_task(
+                    self._pump(key, broadcast, fn())
+                )
+                self._tasks.add(broadcast.pump)
+                broadcast.pump.add_done_callback(self._tasks.discard)
+            else:
+                self.metrics["coalesced"] += 1
+            broadcast.subscribers += 1
+
+        try:
+            async for item in broadcast.subscribe():
+                yield item
+        finally:
+            with self._lock:
+                broadcast.subscribers -= 1
+                abandoned = broadcast.subscribers == 0 and not broadcast.pump.done()
+                if abandoned and self._streams.get(key) is broadcast:
+                    # Later callers start afresh instead of joining a dying stream.
+                    del self._streams[key]
+            if abandoned:
+                broadcast.pump.cancel()
+
+    async def _pump(
+        self, key: str, broadcast: _Broadcast, source: AsyncIterator[Any]
+    ) -> None:
+        """Drain *source* into *broadcast* and wake subscribers."""
+        try:
+            async for item in source:
+                async with broadcast.condition:
+                    broadcast.items.append(item)
+                    broadcast.condition.notify_all()
+        except asyncio.CancelledError:
+            broadcast.error = RuntimeError("Shared stream was cancelled.")
+            raise
+        except Exception as exc:
+            broadcast.error = exc
+        finally:
+            with self._lock:
+                if self._streams.get(key) is broadcast:
+                    del self._streams[key]
+                self.metrics["in_flight"] -= 1
+            aclose = getattr(source, "aclose", None)
+            if aclose is not None:
+                await aclose()
+            async with broadcast.condition:
+                broadcast.done = True
+                broadcast.condition.notify_all()
@@ -0,0 +1,191 @@
+"""Versioned vector-store snapshots with an atomically flipped pointer.
+
+Each ingestion run writes a complete Chroma store into its own directory
+under ``config.SNAPSHOTS_DIR`` and only then publishes it by replacing
+the ``config.SNAPSHOT_POINTER`` file with ``os.replace``, so readers
+always see either the previous or the new store, never a half-written
+one.  Old published snapshots beyond ``config.SNAPSHOTS_TO_KEEP`` are
+removed; a failed ingestion removes its own unpublished snapshot.
+
+Stores built before snapshots existed live directly in
+``config.VECTOR_STORE_DIR``; they are served until the first snapshot
+is published.
+"""
+
+import os
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional
+
+from src.config import (
+    SNAPSHOT_POINTER,
+    SNAPSHOTS_DIR,
+    SNAPSHOTS_TO_KEEP,
+    VECTOR_STORE_DIR,
+)
+from src.logger import logger
+
+LEGACY_DB_FILE: str = "chroma.sqlite3"
+
+# Written into a snapshot directory when it is published; retention only
+# ranks marked snapshots, so unpublished ones never push good ones out.
+PUBLISHED_MARKER: str = ".published"
+
+
+def new_version() -> str:
+    """Return a fresh, lexicographically sortable snapshot version."""
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+
+
+def current_version(pointer: Path = SNAPSHOT_POINTER) -> Optional[str]:
+    """Read the published snapshot version.
+
+    Args:
+        pointer: Pointer file written by :func:`publish_snapshot`.
+
+    Returns:
+        The version string, or ``None`` if nothing has been published.
+    """
+    try:
+        return pointer.read_text(encoding="utf-8").strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def current_path(
+    pointer: Path = SNAPSHOT_POINTER,
+    snapshots_dir: Path = SNAPSHOTS_DIR,
+    legacy_dir: Path = VECTOR_STORE_DIR,
+) -> Path:
+    """Return the directory of the store that should be served.
+
+    Args:
+        pointer: Pointer file written by :func:`publish_snapshot`.
+        snapshots_dir: Parent directory of all snapshots.
+        legacy_dir: Pre-snapshot store location, used when no pointer
+            exists yet.
+
+    Returns:
+        Path of the published snapshot, or *legacy_dir*.
+    """
+    version = current_version(pointer)
+    return snapshots_dir / version if version else legacy_dir
+
+
+def create_snapshot(
+    version: str,
+    base: Optional[Path] = None,
+    snapshots_dir: Path = SNAPSHOTS_DIR,
+) -> Path:
+    """Create an unpublished snapshot directory.
+
+    Args:
+        version: Version from :func:`new_version`.
+        base: Existing store to copy in (for incremental ingestion), or
+            ``None`` to start empty.
+        snapshots_dir: Parent directory of all snapshots.
+
+    Returns:
+        Path of the new snapshot directory.
+    """
+    target = snapshots_dir / version
+    snapshots_dir.mkdir(parents=True, exist_ok=True)
+    if base is not None and (base / LEGACY_DB_FILE).exists():
+        logger.info(f"Copying vector store {base} into snapshot {version}")
+        # A legacy store shares its directory with the snapshots themselves.
+        shutil.copytree(
+            base,
+            target,
+            ignore=shutil.ignore_patterns(
+                snapshots_dir.name, SNAPSHOT_POINTER.name, PUBLISHED_MARKER
+            ),
+        )
+    else:
+        target.mkdir()
+    return target
+
+
+def publish_snapshot(
+    version: str,
+    pointer: Path = SNAPSHOT_POINTER,
+    snapshots_dir: Path = SNAPSHOTS_DIR,
+    keep: int = SNAPSHOTS_TO_KEEP,
+) -> None:
+    """Atomically make *version* the served snapshot and prune old ones.
+
+    Args:
+        version: Snapshot created with :func:`create_snapshot`.
+        pointer: Pointer file to replace.
+        snapshots_dir: Parent directory of all snapshots.
+        keep: Number of most recent snapshots to retain.
+
+    Raises:
+        FileNotFoundError: If the snapshot directory does not exist.
+    """
+    if not (snapshots_dir / version).is_dir():
+        raise FileNotFoundError(f"Snapshot {version} not found in {snapshots_dir}")
+
+    (snapshots_dir / version / PUBLISHED_MARKER).touch()
+    staging = pointer.with_name(f"{pointer.name}.{os.getpid()}.tmp")
+    staging.write_text(version, encoding="utf-8")
+    os.replace(staging, pointer)
+    logger.info(f"Published vector-store snapshot {version}")
+    cleanup_snapshots(keep, pointer, snapshots_dir)
+
+
+def cleanup_snapshots(
+    keep: int = SNAPSHOTS_TO_KEEP,
+    pointer: Path = SNAPSHOT_POINTER,
+    snapshots_dir: Path = SNAPSHOTS_DIR,
+) -> List[str]:
+    """Delete all but the *keep* newest published snapshots.
+
+    The current snapshot is never deleted.  Older versions are kept
+    briefly so processes that have not swapped yet can finish their
+    in-flight requests.  Snapshots that were never published (still
+    being built, or left by a crashed run) are not counted or removed
+    here; see :func:`discard_snapshot`.
+
+    Args:
+        keep: Number of most recent snapshots to retain.
+        pointer: Pointer file naming the published snapshot.
+        snapshots_dir: Parent directory of all snapshots.
+
+    Returns:
+        Versions that were removed.
+    """
+    if not snapshots_dir.exists():
+        return []
+    current = current_version(pointer)
+    versions = sorted(
+        p.name
+        for p in snapshots_dir.iterdir()
+        if (p / PUBLISHED_MARKER).exists() or p.name == current
+    )
+    stale = [v for v in versions[: max(len(versions) - keep, 0)] if v != current]
+    for version in stale:
+        shutil.rmtree(snapshots_dir / version, ignore_errors=True)
+        logger.info(f"Removed old vector-store snapshot {version}")
+    return stale
+
+
+def discard_snapshot(
+    version: str,
+    pointer: Path = SNAPSHOT_POINTER,
+    snapshots_dir: Path = SNAPSHOTS_DIR,
+) -> None:
+    """Delete an unpublished snapshot, e.g. after a failed ingestion.
+
+    Args:
+        version: Snapshot created with :func:`create_snapshot`.
+        pointer: Pointer file naming the published snapshot.
+        snapshots_dir: Parent directory of all snapshots.
+
+    Raises:
+        ValueError: If *version* is the published snapshot.
+    """
+    if version == current_version(pointer):
+        raise ValueError(f"Snapshot {version} is being served; not discarding it.")
+    shutil.rmtree(snapshots_dir / version, ignore_errors=True)
+    logger.info(f"Discarded unpublished vector-store snapshot {version}")
@@ -0,0 +1,226 @@
+"""Incremental complaint-volume spike detection.
+
+Keeps rolling daily complaint counts per product and per
+(product, sub-product) in a small JSON state file, together with a
+``Complaint ID`` watermark.  Each ETL run folds in only the rows above
+the watermark, re-scores the series those rows touched with an EWMA
+z-score, and writes the flagged windows to an alerts file for the app.
+"""
+
+import json
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+import pandas as pd
+
+from src.config import (
+    SPIKE_ALERTS_FILE,
+    SPIKE_EWMA_ALPHA,
+    SPIKE_HISTORY_DAYS,
+    SPIKE_MIN_COUNT,
+    SPIKE_STATE_FILE,
+    SPIKE_WARMUP_DAYS,
+    SPIKE_Z_THRESHOLD,
+)
+from src.logger import logger
+
+# Separates product and sub-product in series keys.
+SERIES_SEPARATOR: str = " | "
+
+Alert = Dict[str, Any]
+
+
+def series_key(product: str, sub_product: Optional[str] = None) -> str:
+    """Return the state key of a product or (product, sub-product) series."""
+    return (
+        product if sub_product is None else f"{product}{SERIES_SEPARATOR}{sub_product}"
+    )
+
+
+def load_state(path: Path = SPIKE_STATE_FILE) -> Dict[str, Any]:
+    """Read the rolling-count state, or an empty state on the first run.
+
+    Args:
+        path: State file written by :func:`save_state`.
+
+    Returns:
+        Dict with ``watermark`` (highest Complaint ID folded in, or
+        ``None``), ``last_day`` (ISO date) and ``series`` mapping each
+        series key to ``{ISO date: count}``.
+    """
+    if not path.exists():
+        return {"watermark": None, "last_day": None, "series": {}}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save_state(state: Dict[str, Any], path: Path = SPIKE_STATE_FILE) -> None:
+    """Persist the rolling-count state as JSON."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(state), encoding="utf-8")
+
+
+def update_state(state: Dict[str, Any], df: pd.DataFrame) -> Set[str]:
+    """Fold complaints above the watermark into the daily counts.
+
+    Args:
+        state: State from :func:`load_state`, updated in place.
+        df: Filtered complaints with ``Complaint ID``, ``Product``,
+            ``Sub-product`` and ``Date received`` columns.
+
+    Returns:
+        Keys of the series that received new rows.
+    """
+    ids = pd.to_numeric(df["Complaint ID"], errors="coerce")
+    if state["watermark"] is not None:
+        df, ids = df[ids > state["watermark"]], ids[ids > state["watermark"]]
+    if df.empty:
+        return set()
+
+    days = pd.to_datetime(df["Date received"], errors="coerce").dt.strftime("%Y-%m-%d")
+    frame = pd.DataFrame(
+        {
+            "product": df["Product"].fillna("Unknown"),
+            "sub_product": df["Sub-product"].fillna("Unknown"),
+            "day": days,
+        }
+    ).dropna(subset=["day"])
+    # Undated rows are never counted, so they still advance the watermark.
+    if ids.notna().any():
+        state["watermark"] = int(max(ids.max(), state["watermark"] or 0))
+    if frame.empty:
+        return set()
+
+    touched: Set[str] = set()
+    series: Dict[str, Dict[str, int]] = state["series"]
+    for keys in (["product"], ["product", "sub_product"]):
+        for (*group, day), count in frame.groupby(keys + ["day"]).size().items():
+            key = series_key(*group)
+            counts = series.setdefault(key, {})
+            counts[day] = counts.get(day, 0) + int(count)
+            touched.add(key)
+
+    last_day = max(frame["day"].max(), state["last_day"] or "")
+    state["last_day"] = last_day
+    cutoff = (
+        date.fromisoformat(last_day) - timedelta(days=SPIKE_HISTORY_DAYS)
+    ).isoformat()
+    for key in list(series):
+        series[key] = {d: c for d, c in series[key].items() if d > cutoff}
+        if not series[key]:
+            del series[key]
+    return touched
+
+
+def detect_spikes(counts: Dict[str, int], last_day: str) -> List[Alert]:
+    """Flag windows where daily volume jumps above its EWMA baseline.
+
+    Each day's count is compared with the EWMA mean and standard
+    deviation of the days *before* it; days with a z-score of at least
+    ``config.SPIKE_Z_THRESHOLD`` (and at least ``config.SPIKE_MIN_COUNT``
+    complaints) are flagged, and consecutive flagged days merge into one
+    window.
+
+    Args:
+        counts: ``{ISO date: count}`` for one series.
+        last_day: Last day of the observation period (missing days
+            count as zero).
+
+    Returns:
+        Windows with ``start``, ``end``, ``peak_count``, ``expected``
+        (baseline on the peak day) and ``z`` (peak z-score).
+    """
+    if not counts:
+        return []
+    observed = pd.Series(counts, dtype=float)
+    observed.index = pd.to_datetime(observed.index)
+    daily = observed.reindex(
+        pd.date_range(observed.index.min(), pd.Timestamp(last_day)), fill_value=0.0
+    )
+
+    ewm = daily.ewm(alpha=SPIKE_EWMA_ALPHA, adjust=False)
+    mean, std = ewm.mean().shift(1), ewm.std().shift(1)
+    z = (daily - mean) / std.clip(lower=1.0)
+    flagged = (z >= SPIKE_Z_THRESHOLD) & (daily >= SPIKE_MIN_COUNT)
+    flagged.iloc[:SPIKE_WARMUP_DAYS] = False
+
+    windows: List[Alert] = []
+    run_ids = (flagged != flagged.shift()).cumsum()[flagged]
+    for _, days in run_ids.groupby(run_ids):
+        peak = z[days.index].idxmax()
+        windows.append(
+            {
+                "start": days.index[0].strftime("%Y-%m-%d"),
+                "end": days.index[-1].strftime("%Y-%m-%d"),
+                "peak_count": int(daily[peak]),
+                "expected": round(float(mean[peak]), 1),
+                "z": round(float(z[peak]), 1),
+            }
+        )
+    return windows
+
+
+def load_alerts(path: Path = SPIKE_ALERTS_FILE) -> List[Alert]:
+    """Read flagged spike windows, most recent first.
+
+    Args:
+        path: Alerts file written by :func:`update_spike_alerts`.
+
+    Returns:
+        List of alert dicts (empty if none have been computed).
+    """
+    if not path.exists():
+        return []
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def update_spike_alerts(
+    df: pd.DataFrame,
+    state_path: Path = SPIKE_STATE_FILE,
+    alerts_path: Path = SPIKE_ALERTS_FILE,
+) -> List[Alert]:
+    """Fold new complaints into the state and refresh the spike alerts.
+
+    Only series that received rows above the watermark are re-scored;
+    alerts for the others are kept (minus windows that aged out of the
+    history).  The first run processes every row.
+
+    Args:
+        df: Filtered complaints DataFrame (as produced by
+            ``etl.run_etl()``).
+        state_path: Rolling-count state file.
+        alerts_path: Output alerts file.
+
+    Returns:
+        All current alerts, most recent first.  Each alert is a window
+        from :func:`detect_spikes` plus ``product`` and ``sub_product``
+        (``None`` for product-level series).
+    """
+    state = load_state(state_path)
+    touched = update_state(state, df)
+    save_state(state, state_path)
+    if not touched:
+        logger.info("No new complaints since the last spike check.")
+        return load_alerts(alerts_path)
+
+    oldest = min((min(c) for c in state["series"].values()), default="")
+    alerts = [
+        a
+        for a in load_alerts(alerts_path)
+        if series_key(a["product"], a["sub_product"]) not in touched
+        and a["end"] >= oldest
+    ]
+    for key in touched:
+        product, _, sub_product = key.partition(SERIES_SEPARATOR)
+        for window in detect_spikes(state["series"].get(key, {}), state["last_day"]):
+            alerts.append(
+                {"product": product, "sub_product": sub_product or None, **window}
+            )
+
+    alerts.sort(key=lambda a: (a["end"], a["z"]), reverse=True)
+    alerts_path.parent.mkdir(parents=True, exist_ok=True)
+    alerts_path.write_text(json.dumps(alerts, indent=2), encoding="utf-8")
+    logger.info(
+        f"Scored {len(touched)} updated series; {len(alerts)} spike windows flagged."
+    )
+    return alerts
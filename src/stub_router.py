@@ -0,0 +1,179 @@
+"""Local stand-in for the HuggingFace Router chat-completions endpoint.
+
+Serves an OpenAI-compatible ``POST /v1/chat/completions`` (plain and
+server-sent-event streaming) with configurable latency and error
+injection, so load tests and latency experiments can run without
+network access or API cost.
+
+Run standalone with::
+
+    python -m src.stub_router --port 8081 --latency 2.0 --error-rate 0.05
+
+and point the chain at it by exporting
+``HF_ROUTER_URL=http://127.0.0.1:8081/v1/chat/completions``.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+STUB_ANSWER: str = (
+    "<think>Stub reasoning.</think>**Executive Summary**\n\n"
+    "Customers report repeated fee disputes and slow resolutions."
+)
+
+
+class StubRouter:
+    """Threaded HTTP server imitating the Router chat-completions API.
+
+    Attributes:
+        latency: Seconds before the first byte of every response.
+        jitter: Extra uniformly-random latency (seconds) per request.
+        error_rate: Probability of answering ``503`` instead.
+        model_latency: Per-model override of *latency*.
+        model_error_rate: Per-model override of *error_rate*.
+        token_delay: Seconds between streamed tokens.
+        requests: Number of requests received, by model.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        model_latency: Optional[Dict[str, float]] = None,
+        model_error_rate: Optional[Dict[str, float]] = None,
+        token_delay: float = 0.0,
+        answer: str = STUB_ANSWER,
+    ) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.model_latency = model_latency or {}
+        self.model_error_rate = model_error_rate or {}
+        self.token_delay = token_delay
+        self.answer = answer
+        self.requests: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Chat-completions URL to pass as ``api_url`` / ``HF_ROUTER_URL``."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1/chat/completions"
+
+    def start(self) -> "StubRouter":
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Shut the server down and release its port."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubRouter":
+        return self.start()
+
+    def __exit__(self, *_: object) -> None:
+        self.stop()
+
+    def _handler(self) -> type:
+        """Build a request-handler class bound to this stub's settings."""
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *_: object) -> None:
+                """Silence per-request logging."""
+
+            def do_POST(self) -> None:
+                """Answer one chat-completions request."""
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                model: str = payload.get("model", "")
+                with stub._lock:
+                    stub.requests[model] = stub.requests.get(model, 0) + 1
+
+                delay = stub.model_latency.get(model, stub.latency)
+                time.sleep(delay + random.uniform(0.0, stub.jitter))
+
+                if random.random() < stub.model_error_rate.get(model, stub.error_rate):
+                    self._send(503, b'{"error": "Injected stub failure"}')
+                    return
+
+                try:
+                    if payload.get("stream"):
+                        self._stream(model)
+                    else:
+                        body = {
+                            "model": model,
+                            "choices": [{"message": {"content": stub.answer}}],
+                        }
+                        self._send(200, json.dumps(body).encode("utf-8"))
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # Client cancelled (e.g. a losing hedged request).
+
+            def _send(self, status: int, body: bytes) -> None:
+                """Write a complete JSON response."""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _stream(self, model: str) -> None:
+                """Write the answer as server-sent-event token deltas."""
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.end_headers()
+                for token in stub.answer.split(" "):
+                    delta = {"choices": [{"delta": {"content": token + " "}}]}
+                    self.wfile.write(f"data: {json.dumps(delta)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                    time.sleep(stub.token_delay)
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+
+        return Handler
+
+
+def main() -> None:
+    """Run the stub from the command line until interrupted."""
+    parser = argparse.ArgumentParser(description="Local HuggingFace Router stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--token-delay", type=float, default=0.0)
+    args = parser.parse_args()
+
+    stub = StubRouter(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        token_delay=args.token_delay,
+    )
+    stub.start()
+    print(f"Stub Router listening on {stub.url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,398 @@
+"""Retrieval parameter sweep for the CrediTrust RAG pipeline.
+
+Evaluates a grid of chunking (``CHUNK_SIZE`` / ``CHUNK_OVERLAP``),
+embedding-model and ``k`` settings against a labeled question set
+without calling the LLM.  Source documents are built once, every index
+variant is built in parallel, and chunk embeddings are cached on disk
+by content so identical chunks are never embedded twice (across
+variants or across runs).
+
+For every variant the sweep reports recall@k, MRR, query latency and
+index size, and marks the Pareto-optimal settings.
+
+Example::
+
+    python -m src.sweep --questions data/labeled_questions.jsonl \\
+        --grid grid.json --output sweep.csv
+
+The labeled question file holds one ``{"query": str, "relevant_ids":
+[complaint_id, ...]}`` object per line.
+"""
+
+import argparse
+import itertools
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set
+
+import numpy as np
+import pandas as pd
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from src.config import (
+    FILTERED_CSV,
+    SAMPLE_PER_CLASS,
+    SWEEP_CACHE_DIR,
+    SWEEP_GRID,
+    SWEEP_WORKERS,
+)
+from src.data_processing import create_documents, stratified_sample
+from src.dedup import collapse_duplicates
+from src.embeddings import CachedEmbeddings
+from src.logger import logger
+from src.normalize import normalize_frame
+
+EmbeddingsFactory = Callable[[str], CachedEmbeddings]
+
+
+@dataclass
+class IndexVariant:
+    """An in-memory index built with one chunking + embedding setting.
+
+    Attributes:
+        chunk_size: Splitter chunk size in characters.
+        chunk_overlap: Splitter overlap in characters.
+        embedding_model: Embedding model name.
+        vectors: Unit-normalized chunk embeddings, shape ``(n, dim)``.
+        complaint_ids: Complaint ID of each chunk.
+        size_bytes: Vector plus text payload size.
+        build_seconds: Wall time to split and embed.
+    """
+
+    chunk_size: int
+    chunk_overlap: int
+    embedding_model: str
+    vectors: np.ndarray
+    complaint_ids: List[str]
+    size_bytes: int
+    build_seconds: float
+
+
+def load_labeled_questions(path: Path) -> List[Dict[str, Any]]:
+    """Read labeled questions from a JSONL file.
+
+    Args:
+        path: File with ``{"query", "relevant_ids"}`` objects per line.
+
+    Returns:
+        List of question dicts.
+    """
+    with open(path, encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+def source_documents() -> List[Document]:
+    """Build the source documents exactly as ``ingest.ingest_data`` does.
+
+    Returns:
+        Sampled, de-duplicated complaint documents.
+    """
+    df = pd.read_csv(FILTERED_CSV, low_memory=False)
+    df, _ = normalize_frame(stratified_sample(df, n_per_class=SAMPLE_PER_CLASS))
+    docs = create_documents(df)
+    docs, _ = collapse_duplicates(docs)
+    return docs
+
+
+def default_embeddings(model_name: str) -> CachedEmbeddings:
+    """Create a disk-cached HuggingFace embedding model.
+
+    Args:
+        model_name: Sentence-transformers model name.
+
+    Returns:
+        Embeddings backed by ``config.SWEEP_CACHE_DIR/<model>.npz``.
+    """
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    slug = re.sub(r"[^A-Za-z0-9_.-]", "_", model_name)
+    return CachedEmbeddings(
+        HuggingFaceEmbeddings(model_name=model_name),
+        cache_path=SWEEP_CACHE_DIR / f"{slug}.npz",
+    )
+
+
+def build_variant(
+    docs: List[Document],
+    chunk_size: int,
+    chunk_overlap: int,
+    embedding_model: str,
+    embeddings: CachedEmbeddings,
+) -> IndexVariant:
+    """Split and embed *docs* with one setting.
+
+    Args:
+        docs: Shared source documents.
+        chunk_size: Splitter chunk size.
+        chunk_overlap: Splitter overlap.
+        embedding_model: Name recorded on the variant.
+        embeddings: Cached embedding model for *embedding_model*, shared
+            with the other variants built concurrently.
+
+    Returns:
+        The built :class:`IndexVariant`.
+    """
+    start = time.perf_counter()
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=chunk_overlap
+    )
+    chunks = splitter.split_documents(docs)
+    texts = [chunk.page_content for chunk in chunks]
+    vectors = embeddings.as_array(texts)
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+    return IndexVariant(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        embedding_model=embedding_model,
+        vectors=vectors,
+        complaint_ids=[str(c.metadata.get("complaint_id", "")) for c in chunks],
+        size_bytes=vectors.nbytes + sum(len(t.encode("utf-8")) for t in texts),
+        build_seconds=time.perf_counter() - start,
+    )
+
+
+def evaluate_variant(
+    variant: IndexVariant,
+    query_vectors: np.ndarray,
+    query_seconds: np.ndarray,
+    relevant: List[Set[str]],
+    ks: List[int],
+) -> List[Dict[str, Any]]:
+    """Compute retrieval quality and latency for every *k*.
+
+    Retrieval is exact cosine search over the variant's vectors, so
+    latencies are comparable between variants rather than absolute
+    Chroma timings.
+
+    Args:
+        variant: Index to evaluate.
+        query_vectors: Unit-normalized query embeddings.
+        query_seconds: Time spent embedding each query.
+        relevant: Relevant complaint IDs per query.
+        ks: Retrieval depths to report.
+
+    Returns:
+        One result row per *k*.
+
+    Raises:
+        ValueError: If there are no queries or depths, or the variant
+            has no chunks to search.
+    """
+    if not len(query_vectors) or not ks:
+        raise ValueError("evaluate_variant needs at least one query and one k.")
+    if not len(variant.vectors):
+        raise ValueError(
+            f"Variant chunk_size={variant.chunk_size}, chunk_overlap="
+            f"{variant.chunk_overlap} has no chunks to search."
+        )
+    max_k = min(max(ks), len(variant.vectors))
+    ids = np.asarray(variant.complaint_ids)
+    rankings: List[np.ndarray] = []
+    latencies = np.empty(len(query_vectors))
+    for i, query in enumerate(query_vectors):
+        start = time.perf_counter()
+        scores = variant.vectors @ query
+        top = np.argpartition(-scores, max_k - 1)[:max_k]
+        rankings.append(ids[top[np.argsort(-scores[top])]])
+        latencies[i] = time.perf_counter() - start + query_seconds[i]
+
+    rows: List[Dict[str, Any]] = []
+    for k in ks:
+        recalls, reciprocal_ranks = [], []
+        for ranked, wanted in zip(rankings, relevant):
+            hits = [rank for rank, cid in enumerate(ranked[:k]) if cid in wanted]
+            recalls.append(
+                len(wanted & set(ranked[:k])) / len(wanted) if wanted else 0.0
+            )
+            reciprocal_ranks.append(1.0 / (hits[0] + 1) if hits else 0.0)
+        rows.append(
+            {
+                "chunk_size": variant.chunk_size,
+                "chunk_overlap": variant.chunk_overlap,
+                "embedding_model": variant.embedding_model,
+                "k": k,
+                "n_chunks": len(variant.vectors),
+                "index_mb": variant.size_bytes / 1e6,
+                "build_s": variant.build_seconds,
+                "recall_at_k": float(np.mean(recalls)),
+                "mrr": float(np.mean(reciprocal_ranks)),
+                "latency_ms": float(latencies.mean() * 1000),
+                "p95_latency_ms": float(np.percentile(latencies, 95) * 1000),
+            }
+        )
+    return rows
+
+
+def pareto_front(results: pd.DataFrame) -> pd.Series:
+    """Flag rows not dominated on (recall ↑, latency ↓, index size ↓).
+
+    Args:
+        results: Sweep results with ``recall_at_k``, ``latency_ms`` and
+            ``index_mb`` columns.
+
+    Returns:
+        Boolean Series, ``True`` for Pareto-optimal rows.
+    """
+    points = np.column_stack(
+        [-results["recall_at_k"], results["latency_ms"], results["index_mb"]]
+    )
+    no_worse = (points[:, None, :] >= points[None, :, :]).all(axis=2)
+    better = (points[:, None, :] > points[None, :, :]).any(axis=2)
+    dominated = (no_worse & better).any(axis=1)
+    return pd.Series(~dominated, index=results.index)
+
+
+def _validate(grid: Dict[str, List], questions: List[Dict[str, Any]]) -> None:
+    """Reject a sweep that would have no variants, queries or depths.
+
+    Raises:
+        ValueError: Describing the first problem found.
+    """
+    for name in ("chunk_size", "chunk_overlap", "embedding_model", "k"):
+        if not grid.get(name):
+            raise ValueError(f"Sweep grid needs at least one {name!r} value.")
+    if any(not isinstance(k, int) or k < 1 for k in grid["k"]):
+        raise ValueError(f"Sweep 'k' values must be positive integers: {grid['k']}")
+    if not any(o < s for s in grid["chunk_size"] for o in grid["chunk_overlap"]):
+        raise ValueError("Every sweep chunk_overlap is >= every chunk_size.")
+    if not questions:
+        raise ValueError("The sweep needs at least one labeled question.")
+
+
+def run_sweep(
+    docs: List[Document],
+    questions: List[Dict[str, Any]],
+    grid: Optional[Dict[str, List]] = None,
+    embeddings_factory: EmbeddingsFactory = default_embeddings,
+    workers: int = SWEEP_WORKERS,
+) -> pd.DataFrame:
+    """Build and evaluate every index variant in the grid.
+
+    Args:
+        docs: Source documents (built once, shared by all variants).
+        questions: Labeled questions from :func:`load_labeled_questions`.
+        grid: Lists of ``chunk_size``, ``chunk_overlap``,
+            ``embedding_model`` and ``k`` values.  Defaults to
+            ``config.SWEEP_GRID``.
+        embeddings_factory: Creates one cached embedding model per name.
+        workers: Number of variants built concurrently.
+
+    Returns:
+        One row per (variant, k), sorted by recall, with a ``pareto``
+        column.
+
+    Raises:
+        ValueError: If the grid yields no variant or depth, or there are
+            no questions.
+    """
+    grid = {**SWEEP_GRID, **(grid or {})}
+    _validate(grid, questions)
+    models = {name: embeddings_factory(name) for name in grid["embedding_model"]}
+    # Collapsed near-duplicates count as hits on their representative.
+    aliases = {
+        dup: str(doc.metadata.get("complaint_id", ""))
+        for doc in docs
+        for dup in str(doc.metadata.get("duplicate_ids", "")).split(",")
+        if dup
+    }
+    relevant = [
+        {aliases.get(str(i), str(i)) for i in q["relevant_ids"]} for q in questions
+    ]
+
+    settings = [
+        (size, overlap, model)
+        for size, overlap, model in itertools.product(
+            grid["chunk_size"], grid["chunk_overlap"], grid["embedding_model"]
+        )
+        if overlap < size
+    ]
+    logger.info(f"Building {len(settings)} index variants with {workers} workers...")
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        variants = list(
+            pool.map(
+                lambda s: build_variant(docs, *s, models[s[2]]),
+                settings,
+            )
+        )
+
+    query_embeddings: Dict[str, tuple] = {}
+    for name, model in models.items():
+        seconds, vectors = [], []
+        for q in questions:
+            start = time.perf_counter()
+            vectors.append(model.embed_query(q["query"]))
+            seconds.append(time.perf_counter() - start)
+        matrix = np.asarray(vectors, dtype=np.float32)
+        matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        query_embeddings[name] = (matrix, np.asarray(seconds))
+        model.persist()
+
+    rows: List[Dict[str, Any]] = []
+    for variant in variants:
+        vectors, seconds = query_embeddings[variant.embedding_model]
+        rows.extend(evaluate_variant(variant, vectors, seconds, relevant, grid["k"]))
+
+    results = pd.DataFrame(rows)
+    results["pareto"] = pareto_front(results)
+    return results.sort_values(
+        ["recall_at_k", "latency_ms"], ascending=[False, True]
+    ).reset_index(drop=True)
+
+
+def format_results(results: pd.DataFrame) -> str:
+    """Render sweep results as a Markdown table (Pareto rows starred).
+
+    Args:
+        results: Output of :func:`run_sweep`.
+
+    Returns:
+        Markdown table text.
+    """
+    lines = [
+        "| | chunk | overlap | model | k | chunks | index MB | recall@k | MRR "
+        "| latency ms | p95 ms |",
+        "|---|---:|---:|---|---:|---:|---:|---:|---:|---:|---:|",
+    ]
+    for row in results.itertuples():
+        lines.append(
+            f"| {'★' if row.pareto else ''} | {row.chunk_size} | {row.chunk_overlap} "
+            f"| {row.embedding_model} | {row.k} | {row.n_chunks} "
+            f"| {row.index_mb:.2f} | {row.recall_at_k:.3f} | {row.mrr:.3f} "
+            f"| {row.latency_ms:.2f} | {row.p95_latency_ms:.2f} |"
+        )
+    return "\n".join(lines)
+
+
+def main() -> None:
+    """Parse command-line options, run the sweep and write the results."""
+    parser = argparse.ArgumentParser(description="CrediTrust retrieval sweep")
+    parser.add_argument("--questions", type=Path, required=True)
+    parser.add_argument("--grid", type=Path, default=None, help="JSON grid override")
+    parser.add_argument("--workers", type=int, default=SWEEP_WORKERS)
+    parser.add_argument(
+        "--output", type=Path, default=SWEEP_CACHE_DIR / "sweep_results.csv"
+    )
+    args = parser.parse_args()
+
+    grid = json.loads(args.grid.read_text(encoding="utf-8")) if args.grid else None
+    results = run_sweep(
+        source_documents(),
+        load_labeled_questions(args.questions),
+        grid=grid,
+        workers=args.workers,
+    )
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    results.to_csv(args.output, index=False)
+    print(format_results(results))
+    logger.info(f"Wrote sweep results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
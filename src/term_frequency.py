@@ -0,0 +1,180 @@
+"""Streaming, parallel term-frequency engine for complaint word clouds.
+
+Tokenizes narratives in fixed-size batches across a process pool into
+mergeable ``Counter`` objects, dropping CFPB ``XXXX`` redaction tokens
+and stopwords.  Frequencies can be accumulated overall or per product /
+per month from chunked CSV reads, so the full corpus never has to be
+held in memory as one string.
+"""
+
+import os
+import re
+from collections import Counter, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import chain, islice
+from pathlib import Path
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import pandas as pd
+from wordcloud import STOPWORDS
+
+from src.config import FILTERED_CSV, TERM_FREQ_BATCH_SIZE, TERM_FREQ_CSV_CHUNKSIZE
+
+NARRATIVE_COLUMN: str = "Consumer complaint narrative"
+
+# Words with no analytical signal in CFPB narratives beyond the defaults.
+DOMAIN_STOPWORDS: Set[str] = {"also", "would", "could", "said", "told", "will"}
+
+_TOKEN_PATTERN = re.compile(r"[a-z][a-z']+")
+_REDACTION_PATTERN = re.compile(r"^x{2,}$")
+_STOPWORDS: Set[str] = {w.lower() for w in STOPWORDS} | DOMAIN_STOPWORDS
+
+
+def count_terms(texts: Iterable[str]) -> Counter:
+    """Count content words in a batch of narratives.
+
+    Args:
+        texts: Narrative strings (non-strings such as ``NaN`` are skipped).
+
+    Returns:
+        ``Counter`` of lower-cased tokens, excluding stopwords and
+        redaction masks such as ``XXXX``.
+    """
+    counts: Counter = Counter()
+    for text in texts:
+        if not isinstance(text, str):
+            continue
+        counts.update(
+            token
+            for token in _TOKEN_PATTERN.findall(text.lower())
+            if token not in _STOPWORDS and not _REDACTION_PATTERN.match(token)
+        )
+    return counts
+
+
+def _batches(texts: Iterable[str], size: int) -> Iterator[List[str]]:
+    """Yield successive lists of at most *size* texts."""
+    iterator = iter(texts)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def term_frequencies(
+    texts: Iterable[str],
+    batch_size: int = TERM_FREQ_BATCH_SIZE,
+    workers: Optional[int] = None,
+) -> Counter:
+    """Count terms over an arbitrarily large stream of narratives.
+
+    Batches are tokenized in a process pool with a bounded number of
+    pending tasks, so memory stays proportional to the vocabulary rather
+    than the corpus.  Small inputs are counted in-process.
+
+    Args:
+        texts: Iterable of narratives (may be a generator).
+        batch_size: Narratives per worker task.
+        workers: Process-pool size (``None`` = CPU count).
+
+    Returns:
+        Merged ``Counter`` of term frequencies.
+    """
+    batches = _batches(texts, batch_size)
+    first = next(batches, None)
+    if first is None:
+        return Counter()
+    second = next(batches, None)
+    if second is None:
+        return count_terms(first)
+
+    counters = _count_parallel(
+        (("", batch) for batch in chain([first, second], batches)), workers
+    )
+    return counters.get("", Counter())
+
+
+def _count_parallel(
+    keyed_batches: Iterable[Tuple[str, List[str]]], workers: Optional[int]
+) -> Dict[str, Counter]:
+    """Count keyed batches in a process pool with bounded pending work."""
+    max_pending = 2 * (workers or os.cpu_count() or 1)
+    counters: Dict[str, Counter] = {}
+    pending: Deque[Tuple[str, Future]] = deque()
+
+    def drain_one() -> None:
+        key, future = pending.popleft()
+        counters.setdefault(key, Counter()).update(future.result())
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for key, batch in keyed_batches:
+            if len(pending) >= max_pending:
+                drain_one()
+            pending.append((key, pool.submit(count_terms, batch)))
+        while pending:
+            drain_one()
+    return counters
+
+
+def _group_keys(frame: pd.DataFrame, by: str) -> pd.Series:
+    """Return the grouping key per row for ``by`` = product or month."""
+    if by == "product":
+        return frame["Product"].fillna("Unknown")
+    if by == "month":
+        return (
+            pd.to_datetime(frame["Date received"], errors="coerce")
+            .dt.strftime("%Y-%m")
+            .fillna("Unknown")
+        )
+    raise ValueError(f"Unsupported grouping {by!r}; use 'product' or 'month'.")
+
+
+def grouped_frequencies(
+    frames: Iterable[pd.DataFrame],
+    by: str = "product",
+    counters: Optional[Dict[str, Counter]] = None,
+    workers: Optional[int] = None,
+) -> Dict[str, Counter]:
+    """Accumulate per-product or per-month term frequencies incrementally.
+
+    Args:
+        frames: DataFrame chunks (e.g. from :func:`iter_narratives`)
+            with the narrative column plus ``Product`` or
+            ``Date received``.
+        by: ``"product"`` or ``"month"``.
+        counters: Existing counters to update in place (for incremental
+            runs); a new dict is created if omitted.
+        workers: Process-pool size (``None`` = CPU count).
+
+    Returns:
+        Mapping of group key to ``Counter``.
+    """
+    counters = {} if counters is None else counters
+
+    def keyed_batches() -> Iterator[Tuple[str, List[str]]]:
+        for frame in frames:
+            keys = _group_keys(frame, by)
+            for key, texts in frame[NARRATIVE_COLUMN].groupby(keys):
+                for batch in _batches(texts, TERM_FREQ_BATCH_SIZE):
+                    yield key, batch
+
+    for key, counts in _count_parallel(keyed_batches(), workers).items():
+        counters.setdefault(key, Counter()).update(counts)
+    return counters
+
+
+def iter_narratives(
+    csv_path: Path = FILTERED_CSV, chunksize: int = TERM_FREQ_CSV_CHUNKSIZE
+) -> Iterator[pd.DataFrame]:
+    """Stream the narrative, product and date columns of a complaints CSV.
+
+    Args:
+        csv_path: CSV to read.  Defaults to ``config.FILTERED_CSV``.
+        chunksize: Rows per yielded DataFrame.
+
+    Yields:
+        DataFrame chunks with only the columns needed for frequencies.
+    """
+    yield from pd.read_csv(
+        csv_path,
+        usecols=[NARRATIVE_COLUMN, "Product", "Date received"],
+        chunksize=chunksize,
+    )
@@ -1,11 +1,12 @@
 """Visualization and text-processing utilities.
 
-Provides helpers for saving Matplotlib figures, generating word clouds,
-and parsing the ``<think>...</think>`` blocks from DeepSeek-R1 responses.
+Provides helpers for saving Matplotlib figures, generating word clouds
+from streamed term frequencies, and parsing the ``<think>...</think>``
+blocks from DeepSeek-R1 responses.
 """
 
 import re
-from typing import List, Optional, Tuple
+from typing import Iterable, Mapping, Optional, Tuple
 
 import matplotlib
 import matplotlib.pyplot as plt
@@ -13,14 +14,18 @@ from matplotlib.figure import Figure
 from wordcloud import WordCloud
 
 from src.config import IMAGES_DIR
+from src.logger import logger
+from src.term_frequency import term_frequencies
 
 
-def save_plot(fig: Figure, filename: str) -> None:
+def save_plot(fig: Figure, filename: str, close: bool = True) -> None:
     """Save a Matplotlib figure to the project images directory.
 
     Args:
         fig: The Matplotlib ``Figure`` object to persist.
         filename: Target filename (e.g. ``"wordcloud.png"``).
+        close: Close the figure after saving.  Pass ``False`` to keep
+            displaying it.
 
     Returns:
         None.  Side-effect: writes the figure to
@@ -29,39 +34,52 @@ def save_plot(fig: Figure, filename: str) -> None:
     IMAGES_DIR.mkdir(parents=True, exist_ok=True)
     path = IMAGES_DIR / filename
     fig.savefig(path, bbox_inches="tight")
-    plt.close(fig)
+    if close:
+        plt.close(fig)
     print(f"Saved plot to {path}")
 
 
-def generate_wordcloud(text_data: List[str], filename: str = "wordcloud.png") -> None:
-    """Generate a word cloud image and save it to disk.
+def generate_wordcloud(
+    text_data: Optional[Iterable[str]] = None,
+    filename: Optional[str] = "wordcloud.png",
+    frequencies: Optional[Mapping[str, int]] = None,
+) -> Optional[Figure]:
+    """Generate a word cloud, save it to disk and display it.
+
+    Term frequencies are computed in streamed, parallel batches (see
+    ``src.term_frequency``) rather than by joining every narrative into
+    one string, and the figure is displayed directly instead of being
+    re-read from disk.
 
     Args:
-        text_data: List of text strings to combine into the word cloud.
-        filename: Output filename within the images directory.
+        text_data: Iterable of narratives (may be a generator).  Ignored
+            when *frequencies* is given.
+        filename: Output filename within the images directory, or
+            ``None`` to skip saving.
+        frequencies: Precomputed term frequencies, e.g. from
+            ``term_frequency.term_frequencies()``.
 
     Returns:
-        None.  Side-effect: writes the word cloud image to
-        ``config.IMAGES_DIR / filename``.
+        The Matplotlib ``Figure`` holding the word cloud, or ``None`` if
+        there are no terms to draw (e.g. no narratives, or only
+        stopwords).
     """
-    wc = WordCloud(width=800, height=400, background_color="white").generate(
-        " ".join(text_data)
-    )
-    plt.figure(figsize=(10, 5))
-    plt.imshow(wc, interpolation="bilinear")
-    plt.axis("off")
-    # Save first
-    save_plot(plt.gcf(), filename)
-    # Re-display for notebook
-    try:
-        image_path = IMAGES_DIR / filename
-        img = plt.imread(str(image_path))
-        plt.figure(figsize=(10, 5))
-        plt.imshow(img)
-        plt.axis("off")
-        plt.show()
-    except Exception:
-        pass
+    if frequencies is None:
+        frequencies = term_frequencies(text_data or [])
+    if not frequencies:
+        logger.info("No terms to draw; skipping word cloud.")
+        return None
+    wc = WordCloud(
+        width=800, height=400, background_color="white"
+    ).generate_from_frequencies(frequencies)
+
+    fig, ax = plt.subplots(figsize=(10, 5))
+    ax.imshow(wc, interpolation="bilinear")
+    ax.axis("off")
+    if filename:
+        save_plot(fig, filename, close=False)
+    plt.show()
+    return fig
 
 
 def parse_deepseek_response(
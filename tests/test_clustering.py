@@ -0,0 +1,104 @@
+"""Unit tests for offline topic clustering."""
+
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from langchain_core.documents import Document
+
+from src.clustering import (
+    ClusterIndex,
+    label_clusters,
+    load_clusters,
+    minibatch_kmeans,
+    save_clusters,
+    update_clusters,
+)
+from src.router import build_router
+
+
+def _blobs(n_per_blob: int, seed: int = 0) -> np.ndarray:
+    """Return points around three orthogonal directions in 8-d space."""
+    rng = np.random.default_rng(seed)
+    centers = np.eye(8)[:3]
+    points = np.concatenate(
+        [c + 0.05 * rng.standard_normal((n_per_blob, 8)) for c in centers]
+    )
+    return points.astype(np.float32)
+
+
+def _chunks(n_per_blob: int, start_id: int = 0) -> list:
+    """Return one chunk per blob point, labelled by topic."""
+    topics = ["fees", "fraud", "transfer"]
+    return [
+        Document(
+            page_content=f"{topics[i // n_per_blob]} complaint {i}",
+            metadata={"product": "Personal loan", "complaint_id": str(start_id + i)},
+        )
+        for i in range(3 * n_per_blob)
+    ]
+
+
+class TestClustering(unittest.TestCase):
+    """Verify k-means, incremental updates, labelling and persistence."""
+
+    def test_minibatch_kmeans_separates_blobs(self) -> None:
+        """Each well-separated blob should get its own centroid."""
+        x = _blobs(50)
+        x /= np.linalg.norm(x, axis=1, keepdims=True)
+        centroids = minibatch_kmeans(x, k=3, batch_size=32, n_iter=50)
+        nearest_axis = sorted(np.argmax(centroids, axis=1).tolist())
+        self.assertEqual(nearest_axis, [0, 1, 2])
+
+    def test_incremental_update_and_label_cache(self) -> None:
+        """New complaints update sizes; unchanged clusters keep cached labels."""
+        index = ClusterIndex()
+        with patch("src.clustering.CLUSTERS_PER_PRODUCT", 3):
+            update_clusters(index, _chunks(20), _blobs(20))
+        labeler = MagicMock(side_effect=lambda texts: texts[0].split()[0])
+        self.assertEqual(label_clusters(index, labeler), 3)
+        self.assertEqual(
+            sorted(index.products["Personal loan"].labels),
+            ["fees", "fraud", "transfer"],
+        )
+
+        # Re-sending already-seen complaints is a no-op.
+        self.assertEqual(update_clusters(index, _chunks(20), _blobs(20)), 0)
+        self.assertEqual(label_clusters(index, labeler), 0)
+
+        added = update_clusters(index, _chunks(5, start_id=1000), _blobs(5, seed=1))
+        self.assertEqual(added, 15)
+        self.assertEqual(int(index.products["Personal loan"].sizes.sum()), 75)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            save_clusters(index, Path(tmp))
+            loaded = load_clusters(Path(tmp))
+        self.assertEqual(loaded.seen_ids, index.seen_ids)
+        np.testing.assert_allclose(
+            loaded.products["Personal loan"].centroids,
+            index.products["Personal loan"].centroids,
+        )
+
+    def test_router_serves_top_issues(self) -> None:
+        """Top-issues questions are answered from clusters, not RAG."""
+        index = ClusterIndex()
+        with patch("src.clustering.CLUSTERS_PER_PRODUCT", 3):
+            update_clusters(index, _chunks(10), _blobs(10))
+        label_clusters(index, lambda texts: texts[0].split()[0])
+
+        rag_chain = MagicMock()
+        router = build_router(rag_chain, {}, index)
+        result = router.invoke(
+            {"query": "What are the top issues with Personal loans?"}
+        )
+
+        rag_chain.invoke.assert_not_called()
+        self.assertIn("Personal loan", result["result"])
+        self.assertIn("fees", result["result"])
+        self.assertEqual(len(result["source_documents"]), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+"""Tests for request hedging in the HuggingFace Router LLM wrapper."""
+
+import unittest
+
+from src.custom_llm import HuggingFaceAPIWrapper
+from src.stub_router import StubRouter
+
+
+def _hedging_llm(url: str, hedge_after: float) -> HuggingFaceAPIWrapper:
+    """Return a wrapper that hedges ``primary`` with ``fallback``."""
+    return HuggingFaceAPIWrapper(
+        repo_id="primary",
+        api_token="t",
+        api_url=url,
+        fallback_repo_id="fallback",
+        hedge_after=hedge_after,
+    )
+
+
+class TestHedging(unittest.TestCase):
+    """Verify when the fallback model is raced and which answer is kept."""
+
+    def test_slow_primary_is_hedged_with_fallback(self) -> None:
+        """A late first token starts the fallback, which wins and is kept."""
+        with StubRouter(
+            answer="Fast answer.", model_latency={"primary": 1.0, "fallback": 0.0}
+        ) as stub:
+            llm = _hedging_llm(stub.url, hedge_after=0.1)
+            self.assertEqual(llm.invoke("q").strip(), "Fast answer.")
+            self.assertEqual("".join(llm.stream("q")).strip(), "Fast answer.")
+
+            self.assertEqual(stub.requests["fallback"], 2)
+            stats = llm.hedge_stats()
+            self.assertEqual(stats["hedged"], 2)
+            self.assertEqual(stats["fallback_wins"], 2)
+            self.assertAlmostEqual(stats["hedge_rate"], 1.0)
+
+    def test_cancelled_primary_records_a_censored_sample(self) -> None:
+        """The primary's latency is kept as at least the hedge deadline."""
+        with StubRouter(model_latency={"primary": 1.0, "fallback": 0.0}) as stub:
+            llm = _hedging_llm(stub.url, hedge_after=0.1)
+            llm.invoke("q")
+
+            samples = list(llm._first_token_latencies)
+            self.assertEqual(len(samples), 1)
+            self.assertGreaterEqual(samples[0], 0.1)
+
+    def test_fast_primary_is_not_hedged(self) -> None:
+        """No fallback request is made when the primary answers in time."""
+        with StubRouter(answer="Primary answer.") as stub:
+            llm = _hedging_llm(stub.url, hedge_after=5.0)
+            self.assertEqual(llm.invoke("q").strip(), "Primary answer.")
+            self.assertNotIn("fallback", stub.requests)
+            self.assertEqual(llm.hedge_stats()["hedged"], 0)
+            self.assertEqual(len(llm._first_token_latencies), 1)
+
+    def test_failing_primary_fails_over_without_waiting(self) -> None:
+        """A primary error starts the fallback before the hedge deadline."""
+        with StubRouter(
+            answer="Fallback answer.", model_error_rate={"primary": 1.0}
+        ) as stub:
+            llm = _hedging_llm(stub.url, hedge_after=30.0)
+            self.assertEqual(llm.invoke("q").strip(), "Fallback answer.")
+
+            self.assertEqual(stub.requests["fallback"], 1)
+            stats = llm.hedge_stats()
+            self.assertEqual(stats["hedged"], 1)
+            self.assertEqual(stats["fallback_wins"], 1)
+            self.assertEqual(len(llm._first_token_latencies), 0)
+
+    def test_stream_commits_to_the_first_token(self) -> None:
+        """A hedged stream keeps the primary if its token arrives first."""
+        with StubRouter(
+            answer="Primary answer.",
+            model_latency={"primary": 0.3, "fallback": 1.0},
+        ) as stub:
+            llm = _hedging_llm(stub.url, hedge_after=0.1)
+            self.assertEqual("".join(llm.stream("q")).strip(), "Primary answer.")
+
+            stats = llm.hedge_stats()
+            self.assertEqual(stats["hedged"], 1)
+            self.assertEqual(stats["primary_wins"], 1)
+            self.assertEqual(stats["fallback_wins"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
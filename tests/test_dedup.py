@@ -0,0 +1,92 @@
+"""Unit tests for MinHash/LSH near-duplicate collapsing."""
+
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from unittest.mock import patch
+
+from langchain_core.documents import Document
+
+from src.dedup import collapse_duplicates, minhash_signatures
+
+TEMPLATE = (
+    "I am writing to dispute a charge of {amount} on my account ending in XXXX. "
+    "I contacted the bank several times and they refused to reverse the fee. "
+    "I request that the charge be removed and my account be credited."
+)
+
+
+class TestDedup(unittest.TestCase):
+    """Verify that templated complaints collapse and distinct ones survive."""
+
+    def test_identical_texts_share_signature(self) -> None:
+        """Identical texts must produce identical MinHash signatures."""
+        sigs = minhash_signatures([TEMPLATE, TEMPLATE, "something else entirely"])
+        self.assertTrue((sigs[0] == sigs[1]).all())
+        self.assertFalse((sigs[0] == sigs[2]).all())
+
+    def test_collapse_near_duplicates(self) -> None:
+        """Near-identical letters collapse into one doc that records the others."""
+        docs = [
+            Document(
+                page_content=TEMPLATE.format(amount="$25.00"),
+                metadata={"complaint_id": "1"},
+            ),
+            Document(
+                page_content=TEMPLATE.format(amount="$25.00"),
+                metadata={"complaint_id": "2"},
+            ),
+            Document(
+                page_content=TEMPLATE.format(amount="$40.00"),
+                metadata={"complaint_id": "3"},
+            ),
+            Document(
+                page_content="My wire transfer to family abroad never arrived "
+                "and customer service keeps closing my tickets.",
+                metadata={"complaint_id": "4"},
+            ),
+        ]
+
+        kept, stats = collapse_duplicates(docs)
+
+        self.assertEqual(len(kept), 2)
+        self.assertEqual(kept[0].metadata["complaint_id"], "1")
+        self.assertEqual(kept[0].metadata["duplicate_count"], 2)
+        self.assertEqual(kept[0].metadata["duplicate_ids"], "2,3")
+        self.assertNotIn("duplicate_count", kept[1].metadata)
+        self.assertEqual(stats["documents_in"], 4)
+        self.assertGreater(stats["embedding_saved"], 0.5)
+
+    def test_parallel_and_serial_signatures_agree(self) -> None:
+        """The process-pool path returns the same signatures in order."""
+        texts = [TEMPLATE.format(amount=f"${i}.00") for i in range(12)]
+        serial = minhash_signatures(texts, workers=1)
+        with patch("src.dedup.ProcessPoolExecutor", wraps=ProcessPoolExecutor) as pool:
+            parallel = minhash_signatures(
+                texts, workers=2, parallel_min=0, batch_size=5
+            )
+        pool.assert_called_once_with(max_workers=2)
+        self.assertTrue((serial == parallel).all())
+
+    def test_duplicates_are_not_merged_across_products(self) -> None:
+        """The same letter filed under two products is kept once per product."""
+        docs = [
+            Document(
+                page_content=TEMPLATE.format(amount="$25.00"),
+                metadata={"complaint_id": str(i), "product": product},
+            )
+            for i, product in enumerate(
+                ["Credit card", "Personal loan", "Credit card"], start=1
+            )
+        ]
+
+        kept, _ = collapse_duplicates(docs)
+
+        self.assertEqual(
+            [d.metadata["product"] for d in kept], ["Credit card", "Personal loan"]
+        )
+        self.assertEqual(kept[0].metadata["duplicate_ids"], "3")
+        self.assertNotIn("duplicate_ids", kept[1].metadata)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,19 +2,29 @@
 
 Mocks the LLM and Chroma retriever to validate that the chain
 returns the expected ``{result, source_documents}`` schema without
-requiring live API keys or a populated vector store.
+requiring live API keys or a populated vector store.  Rollups and topic
+clusters are stubbed out so every query reaches the RAG chain whatever
+has been built under ``data/processed``.
 """
 
 import unittest
+from typing import Optional
 from unittest.mock import MagicMock, patch
 
 from langchain_core.documents import Document
 
 
+def _getenv(key: str, default: Optional[str] = None) -> Optional[str]:
+    """Return a fake API token and the defaults for every other variable."""
+    return "fake-token" if key == "HUGGINGFACEHUB_API_TOKEN" else default
+
+
 class TestRAGIntegration(unittest.TestCase):
     """End-to-end test of the RAG chain with mocked externals."""
 
-    @patch("src.rag.os.getenv", return_value="fake-token")
+    @patch("src.rag.load_clusters", return_value=None)
+    @patch("src.rag.load_rollups", return_value={})
+    @patch("src.rag.os.getenv", side_effect=_getenv)
     @patch("src.rag.HuggingFaceEmbeddings")
     @patch("src.rag.Chroma")
     def test_pipeline_returns_expected_schema(
@@ -22,6 +32,8 @@ class TestRAGIntegration(unittest.TestCase):
         mock_chroma: MagicMock,
         mock_embed: MagicMock,
         mock_getenv: MagicMock,
+        mock_rollups: MagicMock,
+        mock_clusters: MagicMock,
     ) -> None:
         """Invoke the chain and assert the output dict has required keys."""
         from src.rag import get_rag_chain
@@ -73,7 +85,9 @@ class TestRAGIntegration(unittest.TestCase):
         self.assertIsInstance(result["result"], str)
         self.assertIn("Duplicate charges", result["result"])
 
-    @patch("src.rag.os.getenv", return_value="fake-token")
+    @patch("src.rag.load_clusters", return_value=None)
+    @patch("src.rag.load_rollups", return_value={})
+    @patch("src.rag.os.getenv", side_effect=_getenv)
     @patch("src.rag.HuggingFaceEmbeddings")
     @patch("src.rag.Chroma")
     def test_pipeline_handles_empty_retrieval(
@@ -81,6 +95,8 @@ class TestRAGIntegration(unittest.TestCase):
         mock_chroma: MagicMock,
         mock_embed: MagicMock,
         mock_getenv: MagicMock,
+        mock_rollups: MagicMock,
+        mock_clusters: MagicMock,
     ) -> None:
         """Chain should not crash when the retriever returns no documents."""
         from src.rag import get_rag_chain
@@ -110,6 +126,27 @@ class TestRAGIntegration(unittest.TestCase):
         self.assertIn("source_documents", result)
         self.assertEqual(len(result["source_documents"]), 0)
 
+    @patch("src.rag.load_clusters", return_value=None)
+    @patch("src.rag.load_rollups", return_value={})
+    @patch("src.rag.HuggingFaceEmbeddings")
+    @patch("src.rag.Chroma")
+    def test_fallback_model_read_from_environment(self, *_: MagicMock) -> None:
+        """``HF_FALLBACK_REPO_ID`` enables hedging on the chain's LLM."""
+        from src import rag
+
+        env = {
+            "HUGGINGFACEHUB_API_TOKEN": "fake-token",
+            "HF_FALLBACK_REPO_ID": "fast-model",
+        }
+        with patch("src.rag.os.getenv", side_effect=lambda k, d=None: env.get(k, d)):
+            rag.get_rag_chain()
+        self.assertEqual(rag._llm["chain"].fallback_repo_id, "fast-model")
+        self.assertEqual(rag.hedge_stats()["hedged"], 0)
+
+        with patch("src.rag.os.getenv", side_effect=_getenv):
+            rag.get_rag_chain()
+        self.assertIsNone(rag._llm["chain"].fallback_repo_id)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,53 @@
+"""Tests for the load-testing harness and the local Router stub."""
+
+import unittest
+
+from src.custom_llm import HuggingFaceAPIWrapper
+from src.loadtest import run_load, summarize
+from src.stub_router import StubRouter
+
+
+class TestLoadTest(unittest.TestCase):
+    """Verify the stub endpoint, load driver and report statistics."""
+
+    def test_stub_serves_plain_streamed_and_failing_requests(self) -> None:
+        """The wrapper talks to the stub exactly as to the real Router."""
+        with StubRouter(answer="Fees are the top issue.") as stub:
+            llm = HuggingFaceAPIWrapper(repo_id="m", api_token="t", api_url=stub.url)
+            self.assertEqual(llm.invoke("q"), "Fees are the top issue.")
+            self.assertEqual(
+                "".join(llm.stream("q")).strip(), "Fees are the top issue."
+            )
+
+            stub.error_rate = 1.0
+            self.assertTrue(llm.invoke("q").startswith("Error 503"))
+            self.assertEqual(stub.requests["m"], 3)
+
+    def test_run_load_counts_requests_and_errors(self) -> None:
+        """Closed- and open-loop runs report every request."""
+        questions = [{"query": "ok"}, {"query": "fail", "weight": 0.0001}]
+
+        def target(question: dict) -> tuple:
+            return question["query"] == "ok", {"generation": 0.01}
+
+        report = run_load(target, questions, concurrency=4, total_requests=40)
+        self.assertEqual(report["requests"], 40)
+        self.assertEqual(set(report["stages"]), {"queue", "generation", "total"})
+
+        report = run_load(target, questions, concurrency=2, total_requests=10, rate=500)
+        self.assertEqual(report["requests"], 10)
+
+    def test_summarize_percentiles(self) -> None:
+        """Percentiles and error rate follow the recorded samples."""
+        samples = [(i % 10 != 0, {"total": float(i)}) for i in range(1, 101)]
+        report = summarize(samples, wall_seconds=10.0)
+
+        self.assertEqual(report["errors"], 10)
+        self.assertAlmostEqual(report["error_rate"], 0.1)
+        self.assertAlmostEqual(report["throughput_rps"], 9.0)
+        self.assertAlmostEqual(report["stages"]["total"]["p50"], 50.5)
+        self.assertAlmostEqual(report["stages"]["total"]["p99"], 99.01)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,190 @@
+"""Unit tests for the columnar per-complaint metadata sidecar."""
+
+import tempfile
+import unittest
+from functools import partial
+from pathlib import Path
+from typing import List
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from src.metadata_store import (
+    METADATA_DIRNAME,
+    compact_documents,
+    load_metadata_store,
+    save_metadata_store,
+)
+from src.rag import HotSwapRetriever
+
+
+def _doc(complaint_id: str, product: str, date: str, **extra: object) -> Document:
+    """Return a source document shaped like ``create_documents`` output."""
+    metadata = {
+        "product": product,
+        "sub_product": "Unknown",
+        "date": date,
+        "state": "CA",
+        "company": "Bank A",
+        "complaint_id": complaint_id,
+        **extra,
+    }
+    return Document(page_content=f"narrative {complaint_id}", metadata=metadata)
+
+
+class TestMetadataStore(unittest.TestCase):
+    """Verify compaction, memory-mapped round trips and row-range filters."""
+
+    def test_compact_round_trip(self) -> None:
+        """Documents keep only a row ref that resolves to their metadata."""
+        docs = [
+            _doc("3", "Personal loan", "2023-02-01"),
+            _doc("1", "Credit card", "2023-01-01", duplicate_ids="7,8"),
+            _doc("2", "Personal loan", "2023-01-01"),
+        ]
+        store, compact = compact_documents(docs)
+        self.assertEqual([d.metadata for d in compact], [{"row": i} for i in range(3)])
+        self.assertEqual(compact[0].page_content, "narrative 1")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            save_metadata_store(store, Path(tmp))
+            loaded = load_metadata_store(Path(tmp))
+            self.assertEqual(loaded.record(0)["duplicate_count"], 2)
+            self.assertEqual(
+                loaded.resolve({"row": 2, "snapshot": "v1"}),
+                docs[0].metadata,
+            )
+            self.assertEqual(loaded.record(0)["duplicate_ids"], "7,8")
+            self.assertNotIn("duplicate_ids", loaded.record(1))
+            self.assertNotIn("duplicate_ids", loaded.categories)
+        self.assertIsNone(load_metadata_store(Path(tmp)))
+
+    def test_incremental_append_and_where(self) -> None:
+        """Appended runs keep old rows valid and filters become row ranges."""
+        store, _ = compact_documents(
+            [_doc("1", "Credit card", "2023"), _doc("2", "Personal loan", "2023")]
+        )
+        store, compact = compact_documents(
+            [_doc("3", "Personal loan", "2024"), _doc("4", "Savings", "2024")], store
+        )
+        self.assertEqual(compact[0].metadata, {"row": 2})
+        self.assertEqual(store.record(1)["complaint_id"], "2")
+        self.assertEqual(store.row_ranges("product", "Personal loan"), [(1, 3)])
+        self.assertEqual(
+            store.where("product", "Personal loan"),
+            {"$and": [{"row": {"$gte": 1}}, {"row": {"$lt": 3}}]},
+        )
+        self.assertEqual(store.where("product", "Mortgage"), {"row": {"$lt": 0}})
+        self.assertEqual(
+            store.where("product", "Savings", "Credit card"),
+            {
+                "$or": [
+                    {"$and": [{"row": {"$gte": 0}}, {"row": {"$lt": 1}}]},
+                    {"$and": [{"row": {"$gte": 3}}, {"row": {"$lt": 4}}]},
+                ]
+            },
+        )
+
+    def test_retriever_pushes_product_filter_down(self) -> None:
+        """A product filter reaches the vector store as row ranges."""
+        store, _ = compact_documents(
+            [_doc("1", "Credit card", "2023"), _doc("2", "Personal loan", "2023")]
+        )
+        inner = MagicMock()
+        inner.invoke.return_value = [Document(page_content="x", metadata={"row": 1})]
+        with patch("src.rag.current_version", return_value="v1"), patch(
+            "src.rag.current_path"
+        ), patch("src.rag.store_for_snapshot", return_value=store):
+            retriever = HotSwapRetriever(lambda _: inner, poll_seconds=60)
+            retriever.invoke("fees", products=["Personal loan"])
+            inner.invoke.assert_called_with(
+                "fees",
+                filter={"$and": [{"row": {"$gte": 1}}, {"row": {"$lt": 2}}]},
+            )
+            retriever.invoke("fees")
+            inner.invoke.assert_called_with("fees")
+
+    def test_raw_narratives_survive_append_and_reload(self) -> None:
+        """Raw text is stored per row, falling back to the page content."""
+        store, _ = compact_documents(
+            [_doc("1", "Credit card", "2023", raw_text="Dear CFPB, café XXXX")]
+        )
+        store, _ = compact_documents([_doc("2", "Credit card", "2024")], store)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            save_metadata_store(store, Path(tmp))
+            loaded = load_metadata_store(Path(tmp))
+            self.assertEqual(loaded.narrative(0), "Dear CFPB, café XXXX")
+            self.assertEqual(loaded.narrative(1), "narrative 2")
+            self.assertNotIn("raw_text", loaded.record(0))
+            self.assertIsNone(loaded.narrative(2))
+
+    def test_reingest_does_not_duplicate_rows(self) -> None:
+        """An incremental ingest of the same sample adds no rows; new ones do."""
+        from src import ingest, snapshots
+
+        class FakeEmbeddings(Embeddings):
+            def embed_documents(self, texts: List[str]) -> List[List[float]]:
+                return [[float(len(t)), 1.0] for t in texts]
+
+            def embed_query(self, text: str) -> List[float]:
+                return [float(len(text)), 1.0]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            csv, snaps, pointer = root / "filtered.csv", root / "snaps", root / "CUR"
+            rows = {
+                "Consumer complaint narrative": [
+                    "Late fee charged twice on my card",
+                    "My wire transfer never arrived",
+                    "Savings account frozen without notice",
+                ],
+                "Product": ["Credit card", "Money transfer", "Savings"],
+                "Date received": ["2023-01-01", "2023-02-01", "2023-03-01"],
+                "Complaint ID": [1, 2, 3],
+            }
+            pd.DataFrame(rows).iloc[:2].to_csv(csv, index=False)
+
+            def sidecar_rows() -> int:
+                version = snapshots.current_version(pointer)
+                return len(load_metadata_store(snaps / version / METADATA_DIRNAME))
+
+            with patch.multiple(
+                "src.ingest",
+                FILTERED_CSV=csv,
+                HuggingFaceEmbeddings=lambda **_: FakeEmbeddings(),
+                Chroma=MagicMock(),
+                load_clusters=MagicMock(return_value=None),
+                update_clusters=MagicMock(),
+                label_clusters=MagicMock(),
+                save_clusters=MagicMock(),
+                llm_labeler=MagicMock(),
+                create_snapshot=partial(snapshots.create_snapshot, snapshots_dir=snaps),
+                current_path=partial(snapshots.current_path, pointer, snaps, root),
+                current_version=partial(snapshots.current_version, pointer),
+                publish_snapshot=partial(
+                    snapshots.publish_snapshot, pointer=pointer, snapshots_dir=snaps
+                ),
+                discard_snapshot=partial(
+                    snapshots.discard_snapshot, pointer=pointer, snapshots_dir=snaps
+                ),
+            ):
+                ingest.ingest_data(reset_db=True)
+                self.assertEqual(sidecar_rows(), 2)
+                # The copied snapshot needs a store file to be copied from.
+                version = snapshots.current_version(pointer)
+                (snaps / version / "chroma.sqlite3").write_text("db", encoding="utf-8")
+
+                ingest.ingest_data(reset_db=False)
+                self.assertEqual(snapshots.current_version(pointer), version)
+                self.assertEqual(sidecar_rows(), 2)
+
+                pd.DataFrame(rows).to_csv(csv, index=False)
+                ingest.ingest_data(reset_db=False)
+                self.assertEqual(sidecar_rows(), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+"""Unit tests for vectorized narrative normalization."""
+
+import unittest
+
+import pandas as pd
+
+from src.normalize import (
+    NARRATIVE_COLUMN,
+    RAW_NARRATIVE_COLUMN,
+    log_embedding_savings,
+    normalize_frame,
+    normalize_narratives,
+)
+
+NARRATIVE = (
+    "Dear CFPB,  On XX/XX/XXXX I paid {$1,500.00} to XXXX XXXX   bank on "
+    "XX/XX/2019!!! They charged {$35.00}.... Thank you for your time. "
+    "Sincerely, XXXX XXXX"
+)
+
+
+class TestNormalize(unittest.TestCase):
+    """Verify placeholder collapsing, boilerplate removal and reporting."""
+
+    def test_normalize_narratives(self) -> None:
+        """Masks, amounts, salutations and sign-offs are rewritten."""
+        texts = pd.Series(
+            [
+                NARRATIVE,
+                "To whom it may concern: account XXXX-XXXX was closed. Regards, XXXX",
+                "The rep said thanks for nothing and hung up.",
+            ]
+        )
+        self.assertEqual(
+            normalize_narratives(texts).tolist(),
+            [
+                "On [DATE] I paid $1,500.00 to [REDACTED] bank on 2019! "
+                "They charged $35.00.",
+                "account [REDACTED] was closed.",
+                "The rep said thanks for nothing and hung up.",
+            ],
+        )
+
+    def test_sign_off_must_follow_a_sentence_end(self) -> None:
+        """Thanks inside a sentence is content; only a closing one goes."""
+        texts = pd.Series(
+            [
+                "The agent never said thank you",
+                "I was refunded {$5.00}!!! Thanks so much",
+                "I hold the bank in high regards",
+                "Thank you.",
+            ]
+        )
+        self.assertEqual(
+            normalize_narratives(texts).tolist(),
+            [
+                "The agent never said thank you",
+                "I was refunded $5.00!",
+                "I hold the bank in high regards",
+                "",
+            ],
+        )
+
+    def test_object_and_string_dtypes_agree(self) -> None:
+        """The rules give the same result on any string backend."""
+        texts = [
+            NARRATIVE,
+            "Payment XX/XX/XX was lost... Thanks so much!",
+            "The agent never said thank you",
+        ]
+        self.assertEqual(
+            normalize_narratives(pd.Series(texts, dtype=object)).tolist(),
+            normalize_narratives(pd.Series(texts, dtype="string")).tolist(),
+        )
+
+    def test_normalize_frame_keeps_raw_text(self) -> None:
+        """The original narrative is kept and the reduction reported."""
+        df = pd.DataFrame({NARRATIVE_COLUMN: [NARRATIVE], "Product": ["Card"]})
+        frame, stats = normalize_frame(df)
+
+        self.assertEqual(frame[RAW_NARRATIVE_COLUMN].iloc[0], NARRATIVE)
+        self.assertEqual(df[NARRATIVE_COLUMN].iloc[0], NARRATIVE)
+        self.assertEqual(stats["chars_in"], len(NARRATIVE))
+        self.assertLess(stats["chars_out"], stats["chars_in"])
+        self.assertGreater(stats["reduction"], 0.3)
+
+    def test_log_embedding_savings(self) -> None:
+        """Saved time is extrapolated at the measured per-chunk rate."""
+        stats = log_embedding_savings(raw_chunks=120, chunks=100, embed_seconds=5.0)
+        self.assertAlmostEqual(stats["chunk_reduction"], 1 / 6)
+        self.assertAlmostEqual(stats["embed_seconds_saved"], 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+"""Unit tests for the pipeline profiling mode."""
+
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.profiling import Profiler, collapse_stacks, profile_stage
+
+
+def _busy(n: int) -> int:
+    """Burn a little CPU and allocate some memory."""
+    return sum(len(str(i) * 10) for i in range(n))
+
+
+class TestProfiling(unittest.TestCase):
+    """Verify stage accumulation, the no-op switch and the report."""
+
+    def test_stages_accumulate(self) -> None:
+        """Repeated stages add up; ``None`` disables measurement."""
+        profiler = Profiler("unit")
+        for _ in range(2):
+            with profile_stage(profiler, "work"):
+                _busy(20_000)
+        with profile_stage(None, "ignored"):
+            _busy(10)
+
+        stats = profiler.stages["work"]
+        self.assertEqual(list(profiler.stages), ["work"])
+        self.assertEqual(stats.calls, 2)
+        self.assertGreater(stats.wall, 0.0)
+        self.assertGreater(stats.peak_bytes, 0)
+
+    def test_report_with_collapsed_stacks(self) -> None:
+        """cProfile runs produce a report and flamegraph-ready stacks."""
+        profiler = Profiler("unit", cprofile=True)
+        with profiler.stage("work"):
+            _busy(50_000)
+
+        stacks = profiler.collapsed_stacks()
+        self.assertTrue(any("work;" in line and "_busy" in line for line in stacks))
+        for line in stacks:
+            frames, count = line.rsplit(" ", 1)
+            self.assertTrue(frames.startswith("work"))
+            self.assertGreater(int(count), 0)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            report = profiler.write(Path(tmp))
+            text = report.read_text(encoding="utf-8")
+            self.assertIn("| work | 1 |", text)
+            self.assertTrue(report.with_suffix(".folded").exists())
+
+    def test_collapse_is_fast_on_a_real_pandas_profile(self) -> None:
+        """Deep library call graphs collapse quickly and keep most time."""
+        profiler = Profiler("unit", cprofile=True)
+        with profiler.stage("pandas"):
+            df = pd.DataFrame(
+                {
+                    "a": np.arange(20_000) % 50,
+                    "b": np.linspace(0, 1, 20_000),
+                    "d": pd.date_range("2020-01-01", periods=20_000, freq="h"),
+                }
+            )
+            for _ in range(3):
+                df.groupby("a")["b"].agg(["mean", "sum"])
+                df.pivot_table(index="a", values="b")
+                df["d"].dt.strftime("%Y-%m")
+
+        stats = profiler.stages["pandas"].profile
+        start = time.perf_counter()
+        stacks = collapse_stacks(stats, "pandas")
+        self.assertLess(time.perf_counter() - start, 2.0)
+
+        total = sum(row[3] for row in stats.stats.values() if not row[4])
+        self.assertGreater(sum(stacks.values()) / 1e6, 0.9 * total)
+
+
+if __name__ == "__main__":
+    unittest.main()
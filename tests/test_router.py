@@ -0,0 +1,174 @@
+"""Unit tests for the rollup builder and aggregate query router."""
+
+import unittest
+from unittest.mock import MagicMock
+
+import pandas as pd
+from langchain_core.runnables import RunnableLambda
+
+from src.rollups import build_rollups
+from src.router import (
+    CANNED_ANSWERS,
+    build_router,
+    classify_intent,
+    context_products,
+    parse_aggregate_query,
+)
+
+
+def _complaints() -> pd.DataFrame:
+    """Return a tiny filtered-complaints frame spanning two years."""
+    return pd.DataFrame(
+        {
+            "Product": ["Money transfer, virtual currency, or money service"] * 3
+            + ["Personal loan"] * 2,
+            "Sub-product": [
+                "Domestic",
+                "Domestic",
+                "International",
+                None,
+                "Installment",
+            ],
+            "State": ["CA", "NY", "CA", "TX", "TX"],
+            "Company": [
+                "WELLS FARGO & COMPANY",
+                "WELLS FARGO & COMPANY",
+                "JPMORGAN CHASE & CO.",
+                "CAPITAL ONE FINANCIAL CORPORATION",
+                "CAPITAL ONE FINANCIAL CORPORATION",
+            ],
+            "Date received": [
+                "2023-01-05",
+                "2023-01-20",
+                "2023-03-02",
+                "2022-07-01",
+                "2023-07-01",
+            ],
+        }
+    )
+
+
+class TestRouter(unittest.TestCase):
+    """Verify aggregate parsing and the rollup fast path."""
+
+    def test_parse_aggregate_query(self) -> None:
+        """Count questions are parsed; qualitative ones are left to RAG."""
+        query = parse_aggregate_query(
+            "How many money-transfer complaints per month in 2023?"
+        )
+        self.assertIsNotNone(query)
+        self.assertEqual(query.dimension, "month")
+        self.assertEqual(
+            query.products, ["Money transfer, virtual currency, or money service"]
+        )
+        self.assertEqual(query.years, ["2023"])
+
+        self.assertIsNone(parse_aggregate_query("Why are customers unhappy?"))
+        self.assertIsNone(parse_aggregate_query("Problems with my savings account"))
+
+    def test_parse_state_and_company_filters(self) -> None:
+        """States and known companies become filters; unknown ones go to RAG."""
+        companies = ["WELLS FARGO & COMPANY", "JPMORGAN CHASE & CO."]
+
+        query = parse_aggregate_query("How many complaints in Texas?", companies)
+        self.assertEqual(query.states, ["TX"])
+        query = parse_aggregate_query("How many complaints in TX?", companies)
+        self.assertEqual(query.states, ["TX"])
+        query = parse_aggregate_query("Number of complaints in West Virginia")
+        self.assertEqual(query.states, ["WV"])
+        query = parse_aggregate_query(
+            "How many complaints about Wells Fargo?", companies
+        )
+        self.assertEqual(query.companies, ["WELLS FARGO & COMPANY"])
+        self.assertEqual(query.states, [])
+
+        for question in [
+            "How many complaints about Wells Fargo?",  # company not in rollups
+            "How many complaints about Citibank?",
+            "How many complaints about late fees?",
+            "How many credit card complaints this year?",
+            "How many complaints in Texas by company?",  # needs two tables
+        ]:
+            self.assertIsNone(parse_aggregate_query(question), question)
+
+    def test_router_answers_from_rollups(self) -> None:
+        """Aggregate questions bypass the RAG chain entirely."""
+        rag_chain = MagicMock()
+        router = build_router(rag_chain, build_rollups(_complaints()))
+
+        result = router.invoke(
+            {"query": "How many money transfer complaints per month in 2023?"}
+        )
+
+        rag_chain.invoke.assert_not_called()
+        self.assertEqual(result["source_documents"], [])
+        self.assertIn("**3**", result["result"])
+        self.assertIn("| 2023-01 | 2 |", result["result"])
+        self.assertIn("| 2023-03 | 1 |", result["result"])
+
+        result = router.invoke({"query": "Personal loan complaints by state"})
+        self.assertIn("| TX | 2 |", result["result"])
+
+        result = router.invoke({"query": "How many complaints in Texas?"})
+        self.assertIn("**2**", result["result"])
+        result = router.invoke({"query": "How many complaints about Wells Fargo?"})
+        self.assertIn("**2**", result["result"])
+        self.assertIn("WELLS FARGO & COMPANY", result["result"])
+        rag_chain.invoke.assert_not_called()
+
+    def test_unresolved_filters_fall_through_to_rag(self) -> None:
+        """A count question naming an unknown filter is not answered from rollups."""
+        rag_chain = RunnableLambda(lambda _: {"result": "rag", "source_documents": []})
+        router = build_router(rag_chain, build_rollups(_complaints()))
+
+        for question in [
+            "How many complaints about Citibank?",
+            "How many complaints about late fees?",
+        ]:
+            result = router.invoke({"query": question})
+            self.assertEqual(result["result"], "rag", question)
+
+    def test_classify_intent(self) -> None:
+        """Small talk is recognised; analytic questions are not."""
+        self.assertEqual(classify_intent("Hello!"), "greeting")
+        self.assertEqual(classify_intent("Hi there (Context: All)"), "greeting")
+        self.assertEqual(classify_intent("Who are you?"), "identity")
+        self.assertEqual(classify_intent("What can you do?"), "capabilities")
+        self.assertEqual(classify_intent("Hi, who are you?"), "identity")
+        self.assertEqual(classify_intent("How can you help me?"), "capabilities")
+        for question in [
+            "What are you seeing in fraud complaints?",
+            "What do you do with disputed charges complaints?",
+            "How can you help me understand overdraft fee complaints?",
+        ]:
+            self.assertIsNone(classify_intent(question), question)
+        self.assertIsNone(classify_intent("Hello, why are savings customers upset?"))
+        self.assertIsNone(
+            classify_intent(
+                "Hi, what are the most common reasons customers dispute charges "
+                "on their cards this year?"
+            )
+        )
+
+    def test_context_products(self) -> None:
+        """Only the filter suffix selects products for retrieval."""
+        self.assertEqual(
+            context_products("Why are fees high? (Context: Personal loan)"),
+            ["Personal loan"],
+        )
+        self.assertEqual(context_products("Personal loan fees?"), [])
+        self.assertEqual(context_products("Fees? (Context: Mortgage)"), [])
+
+    def test_router_answers_small_talk(self) -> None:
+        """Greetings skip retrieval and generation entirely."""
+        rag_chain = MagicMock()
+        router = build_router(rag_chain, {})
+        result = router.invoke({"query": "Who are you?"})
+
+        rag_chain.invoke.assert_not_called()
+        self.assertEqual(result["result"], CANNED_ANSWERS["identity"])
+        self.assertEqual(result["source_documents"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,184 @@
+"""Tests for the headless HTTP API server."""
+
+import asyncio
+import json
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+from fastapi.testclient import TestClient
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableLambda
+
+
+def _fake_chain(**_: object) -> RunnableLambda:
+    """Return a chain echoing the query with one source document."""
+    return RunnableLambda(
+        lambda x: {
+            "result": f"Answer to: {x['query']}",
+            "source_documents": [
+                Document(page_content="Charged twice.", metadata={"product": "A"})
+            ],
+        }
+    )
+
+
+class TestServer(unittest.TestCase):
+    """Exercise the endpoints against a fake chain."""
+
+    def _client(self) -> TestClient:
+        """Start the app and wait until warm-up has finished."""
+        from src.server import app, state
+
+        client = TestClient(app)
+        client.__enter__()
+        self.addCleanup(client.__exit__, None, None, None)
+        for _ in range(100):
+            if state.ready or state.error:
+                break
+            time.sleep(0.01)
+        return client
+
+    @patch("src.server.hedge_stats", return_value={"requests": 3, "hedged": 1})
+    @patch("src.server.get_rag_chain", side_effect=_fake_chain)
+    def test_query_batch_and_probes(self, *_: object) -> None:
+        """Ready workers answer single, batched and streamed queries."""
+        client = self._client()
+        executed = client.get("/metrics").json()["singleflight"]["executed"]
+
+        self.assertEqual(client.get("/healthz").status_code, 200)
+        self.assertEqual(client.get("/readyz").json(), {"status": "ready"})
+
+        response = client.post(
+            "/query", json={"query": "Fees?", "product": "Credit card"}
+        )
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["result"], "Answer to: Fees? (Context: Credit card)")
+        self.assertEqual(body["source_documents"][0]["metadata"], {"product": "A"})
+
+        response = client.post(
+            "/batch", json={"queries": [{"query": "One"}, {"query": "Two"}]}
+        )
+        results = [r["result"] for r in response.json()["results"]]
+        self.assertEqual(results, ["Answer to: One", "Answer to: Two"])
+
+        response = client.post("/query/stream", json={"query": "Fees?"})
+        events = [json.loads(line) for line in response.text.splitlines()]
+        self.assertEqual(events[-1]["type"], "result")
+        self.assertEqual(events[-1]["result"], "Answer to: Fees?")
+
+        metrics = client.get("/metrics").json()
+        counters = metrics["singleflight"]
+        self.assertEqual(counters["executed"] - executed, 4)
+        self.assertEqual(counters["in_flight"], 0)
+        self.assertEqual(metrics["hedging"], {"requests": 3, "hedged": 1})
+
+    @patch("src.server.SERVER_MAX_QUEUE", 0)
+    @patch("src.server.SERVER_MAX_CONCURRENCY", 0)
+    @patch("src.server.get_rag_chain", side_effect=_fake_chain)
+    def test_rejects_when_at_capacity(self, *_: object) -> None:
+        """With no capacity left the server answers 429 rather than queuing."""
+        client = self._client()
+
+        response = client.post("/query", json={"query": "Fees?"})
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response.headers)
+
+    @patch("src.server.SERVER_MAX_QUEUE", 0)
+    @patch("src.server.SERVER_MAX_CONCURRENCY", 4)
+    @patch("src.server.get_rag_chain")
+    def test_batch_holds_a_slot_per_concurrent_query(
+        self, get_chain: MagicMock
+    ) -> None:
+        """A running batch fills the limiter, so a single query gets 429."""
+        from src.server import state
+
+        release = threading.Event()
+
+        def answer(x: dict) -> dict:
+            release.wait(5)
+            return {"result": x["query"], "source_documents": []}
+
+        get_chain.return_value = RunnableLambda(answer)
+        client = self._client()
+
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            batch = pool.submit(
+                client.post,
+                "/batch",
+                json={"queries": [{"query": f"q{i}"} for i in range(6)]},
+            )
+            for _ in range(200):
+                if state.limiter._admitted:
+                    break
+                time.sleep(0.01)
+            self.assertEqual(state.limiter._admitted, 4)
+            response = client.post("/query", json={"query": "Fees?"})
+            self.assertEqual(response.status_code, 429)
+            release.set()
+            self.assertEqual(batch.result().status_code, 200)
+
+        self.assertEqual(state.limiter._admitted, 0)
+
+    def test_limiter_grants_multi_slot_requests_in_order(self) -> None:
+        """A waiting multi-slot holder is not overtaken by later single ones."""
+        from src.server import AdmissionLimiter
+
+        async def scenario() -> list:
+            limiter = AdmissionLimiter(max_concurrency=4, max_queue=4)
+            order = []
+            await limiter.acquire(3)
+
+            async def take(name: str, slots: int) -> None:
+                await limiter.acquire(slots)
+                order.append(name)
+
+            big = asyncio.create_task(take("big", 2))
+            small = asyncio.create_task(take("small", 1))
+            await asyncio.sleep(0)
+            self.assertEqual(order, [])  # "small" fits but queues behind "big"
+            limiter.release(3)
+            await asyncio.gather(big, small)
+            return order
+
+        self.assertEqual(asyncio.run(scenario()), ["big", "small"])
+
+    @patch("src.server.get_rag_chain", side_effect=RuntimeError("no index"))
+    def test_not_ready_until_chain_builds(self, _: object) -> None:
+        """Failed warm-up keeps the worker out of rotation."""
+        client = self._client()
+
+        self.assertEqual(client.get("/healthz").status_code, 200)
+        self.assertEqual(client.get("/readyz").status_code, 503)
+        self.assertEqual(client.post("/query", json={"query": "x"}).status_code, 503)
+
+    def test_stream_slot_released_when_client_leaves_early(self) -> None:
+        """A stream abandoned before its first chunk still frees its slot."""
+        from starlette.requests import ClientDisconnect
+
+        from src.server import AdmissionLimiter, _SlotStreamingResponse
+
+        async def scenario() -> int:
+            limiter = AdmissionLimiter(max_concurrency=1, max_queue=0)
+            await limiter.acquire()
+
+            async def body():
+                yield "never sent\n"
+
+            async def send(_: dict) -> None:
+                raise OSError("client went away")
+
+            response = _SlotStreamingResponse(body(), limiter.release)
+            scope = {"type": "http", "asgi": {"spec_version": "2.4"}}
+            with self.assertRaises(ClientDisconnect):
+                await response(scope, None, send)
+            return limiter._admitted
+
+        self.assertEqual(asyncio.run(scenario()), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
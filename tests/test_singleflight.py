@@ -0,0 +1,172 @@
+"""Unit tests for single-flight request coalescing."""
+
+import asyncio
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from src.singleflight import SingleFlight, make_key
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Verify that concurrent identical calls share one execution."""
+
+    def test_make_key_normalizes_query_and_filters(self) -> None:
+        """Case/whitespace and filter order do not change the key."""
+        a = make_key("Top  Fees?", {"product": "A", "state": "CA"}, "v1")
+        b = make_key(" top fees? ", {"state": "CA", "product": "A"}, "v1")
+        self.assertEqual(a, b)
+        self.assertNotEqual(a, make_key("top fees?", {"product": "A"}, "v1"))
+        self.assertNotEqual(
+            a, make_key("top fees?", {"product": "A", "state": "CA"}, "v2")
+        )
+
+    def test_sync_callers_share_one_execution(self) -> None:
+        """Threads asking the same key concurrently run the work once."""
+        flight = SingleFlight()
+        calls = []
+        release = threading.Event()
+
+        def work() -> str:
+            calls.append(1)
+            release.wait(timeout=5)
+            return "answer"
+
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            futures = [pool.submit(flight.do, "k", work) for _ in range(5)]
+            while flight.metrics["executed"] + flight.metrics["coalesced"] < 5:
+                time.sleep(0.01)
+            release.set()
+            results = [f.result() for f in futures]
+
+        self.assertEqual(results, ["answer"] * 5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flight.metrics["coalesced"], 4)
+        self.assertEqual(flight.metrics["in_flight"], 0)
+
+    def test_async_callers_and_errors(self) -> None:
+        """Async callers share results and the leader's exception."""
+        flight = SingleFlight()
+        calls = []
+
+        async def work() -> str:
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "answer"
+
+        async def fail() -> str:
+            await asyncio.sleep(0.05)
+            raise ValueError("router down")
+
+        async def scenario() -> list:
+            ok = await asyncio.gather(*(flight.ado("k", work) for _ in range(3)))
+            bad = await asyncio.gather(
+                *(flight.ado("e", fail) for _ in range(2)), return_exceptions=True
+            )
+            return ok + bad
+
+        results = asyncio.run(scenario())
+        self.assertEqual(results[:3], ["answer"] * 3)
+        self.assertTrue(all(isinstance(r, ValueError) for r in results[3:]))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flight.metrics["coalesced"], 3)
+
+    def test_cancelled_callers_do_not_cancel_the_others(self) -> None:
+        """Cancelling a follower, or the leader, leaves the rest served."""
+        flight = SingleFlight()
+
+        async def work() -> str:
+            await asyncio.sleep(0.05)
+            return "answer"
+
+        async def scenario() -> list:
+            tasks = [asyncio.ensure_future(flight.ado("k", work)) for _ in range(4)]
+            await asyncio.sleep(0.01)
+            tasks[0].cancel()  # the leader
+            tasks[2].cancel()  # a follower
+            return await asyncio.gather(*tasks, return_exceptions=True)
+
+        results = asyncio.run(scenario())
+        self.assertIsInstance(results[0], asyncio.CancelledError)
+        self.assertIsInstance(results[2], asyncio.CancelledError)
+        self.assertEqual([results[1], results[3]], ["answer", "answer"])
+        self.assertEqual(flight.metrics["executed"], 1)
+        self.assertEqual(flight.metrics["in_flight"], 0)
+
+    def test_streams_are_broadcast(self) -> None:
+        """Every subscriber sees the full stream, produced once."""
+        flight = SingleFlight()
+        produced = []
+
+        async def tokens():
+            for token in ["a", "b", "c"]:
+                produced.append(token)
+                await asyncio.sleep(0.01)
+                yield token
+
+        async def consume() -> list:
+            return [t async for t in flight.astream("k", tokens)]
+
+        async def scenario() -> list:
+            return await asyncio.gather(consume(), consume(), consume())
+
+        results = asyncio.run(scenario())
+        self.assertEqual(results, [["a", "b", "c"]] * 3)
+        self.assertEqual(produced, ["a", "b", "c"])
+        self.assertEqual(flight.metrics["coalesced"], 2)
+
+    def test_stream_stops_when_every_subscriber_leaves(self) -> None:
+        """The source is cancelled once nobody is listening."""
+        flight = SingleFlight()
+        produced, closed = [], []
+
+        async def tokens():
+            try:
+                for i in range(100):
+                    produced.append(i)
+                    await asyncio.sleep(0.01)
+                    yield i
+            finally:
+                closed.append(True)
+
+        async def first_item() -> int:
+            stream = flight.astream("k", tokens)
+            item = await anext(stream)
+            await stream.aclose()
+            return item
+
+        async def scenario() -> list:
+            items = await asyncio.gather(first_item(), first_item())
+            await asyncio.sleep(0.05)
+            return items
+
+        self.assertEqual(asyncio.run(scenario()), [0, 0])
+        self.assertEqual(closed, [True])
+        self.assertLess(len(produced), 5)
+        self.assertEqual(flight.metrics["in_flight"], 0)
+
+    def test_cancelled_stream_is_reported_to_subscribers(self) -> None:
+        """A cancelled source ends subscribers with an error, not silently."""
+        flight = SingleFlight()
+
+        async def tokens():
+            yield "a"
+            await asyncio.sleep(10)
+            yield "b"
+
+        async def scenario() -> list:
+            received = []
+            with self.assertRaises(RuntimeError):
+                async for token in flight.astream("k", tokens):
+                    received.append(token)
+                    (pump,) = flight._tasks
+                    pump.cancel()
+            return received
+
+        self.assertEqual(asyncio.run(scenario()), ["a"])
+        self.assertEqual(flight.metrics["in_flight"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+"""Unit tests for versioned index snapshots and retriever hot-swapping."""
+
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from langchain_core.documents import Document
+
+from src.rag import HotSwapRetriever
+from src.snapshots import (
+    PUBLISHED_MARKER,
+    cleanup_snapshots,
+    create_snapshot,
+    current_path,
+    current_version,
+    discard_snapshot,
+    publish_snapshot,
+)
+
+
+class TestSnapshots(unittest.TestCase):
+    """Verify publishing, legacy fallback, cleanup and hot-swap."""
+
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        self.snapshots = self.root / "snapshots"
+        self.pointer = self.root / "CURRENT"
+
+    def tearDown(self) -> None:
+        self._tmp.cleanup()
+
+    def test_publish_flips_pointer_and_prunes(self) -> None:
+        """Only the newest snapshots survive and the pointer names the latest."""
+        self.assertEqual(
+            current_path(self.pointer, self.snapshots, self.root), self.root
+        )
+        for version in ["v1", "v2", "v3"]:
+            create_snapshot(version, snapshots_dir=self.snapshots)
+            publish_snapshot(version, self.pointer, self.snapshots, keep=2)
+
+        self.assertEqual(current_version(self.pointer), "v3")
+        self.assertEqual(sorted(p.name for p in self.snapshots.iterdir()), ["v2", "v3"])
+        self.assertEqual(
+            current_path(self.pointer, self.snapshots, self.root), self.snapshots / "v3"
+        )
+        with self.assertRaises(FileNotFoundError):
+            publish_snapshot("missing", self.pointer, self.snapshots)
+
+    def test_cleanup_never_removes_current(self) -> None:
+        """An older published snapshot is kept even when beyond *keep*."""
+        for version in ["v1", "v2"]:
+            create_snapshot(version, snapshots_dir=self.snapshots)
+        publish_snapshot("v1", self.pointer, self.snapshots, keep=5)
+        self.assertEqual(cleanup_snapshots(1, self.pointer, self.snapshots), [])
+
+    def test_unpublished_snapshots_do_not_count_toward_keep(self) -> None:
+        """Orphans from failed runs never push out published snapshots."""
+        for version in ["v1", "v2"]:
+            create_snapshot(version, snapshots_dir=self.snapshots)
+            publish_snapshot(version, self.pointer, self.snapshots, keep=2)
+        for orphan in ["v3", "v4"]:
+            create_snapshot(orphan, snapshots_dir=self.snapshots)
+
+        self.assertEqual(cleanup_snapshots(2, self.pointer, self.snapshots), [])
+        (self.snapshots / "v2" / "chroma.sqlite3").write_text("db", encoding="utf-8")
+        copy = create_snapshot(
+            "v5", base=self.snapshots / "v2", snapshots_dir=self.snapshots
+        )
+        self.assertTrue((copy / "chroma.sqlite3").exists())
+        self.assertFalse((copy / PUBLISHED_MARKER).exists())
+
+        discard_snapshot("v3", self.pointer, self.snapshots)
+        self.assertFalse((self.snapshots / "v3").exists())
+        with self.assertRaises(ValueError):
+            discard_snapshot("v2", self.pointer, self.snapshots)
+        self.assertTrue((self.snapshots / "v1").exists())
+
+    def test_copy_from_legacy_store(self) -> None:
+        """Incremental runs copy the legacy store but not the snapshots dir."""
+        (self.root / "chroma.sqlite3").write_text("db", encoding="utf-8")
+        create_snapshot("v0", snapshots_dir=self.snapshots)
+        target = create_snapshot("v1", base=self.root, snapshots_dir=self.snapshots)
+        self.assertTrue((target / "chroma.sqlite3").exists())
+        self.assertFalse((target / "snapshots").exists())
+
+    def test_hot_swap_between_requests(self) -> None:
+        """A newly published version is warmed up, then served."""
+        old, new = MagicMock(), MagicMock()
+        old.invoke.return_value = [Document(page_content="old")]
+        new.invoke.side_effect = lambda _: [
+            Document(page_content="new", metadata={"row": 0})
+        ]
+        opened = {self.root: old, self.snapshots / "v2": new}
+
+        with patch("src.rag.SNAPSHOTS_DIR", self.snapshots), patch(
+            "src.rag.current_path", return_value=self.root
+        ), patch("src.rag.current_version", return_value=None) as version:
+            retriever = HotSwapRetriever(opened.__getitem__, poll_seconds=0)
+            self.assertEqual(retriever.invoke("q")[0].page_content, "old")
+
+            version.return_value = "v2"
+            thread = retriever.check_for_update()
+            self.assertIsNotNone(thread)
+            thread.join()
+
+        new.invoke.assert_called_with("warm-up")
+        self.assertEqual(retriever.version, "v2")
+        (doc,) = retriever.invoke("q")
+        self.assertEqual(doc.page_content, "new")
+        self.assertEqual(doc.metadata["snapshot"], "v2")
+
+    def test_swap_hook_runs_after_swap(self) -> None:
+        """The swap hook sees the new version once it is being served."""
+        seen = []
+        with patch("src.rag.SNAPSHOTS_DIR", self.snapshots), patch(
+            "src.rag.current_path", return_value=self.root
+        ), patch("src.rag.current_version", return_value=None) as version:
+            retriever = HotSwapRetriever(
+                lambda _: MagicMock(),
+                poll_seconds=0,
+                on_swap=lambda v: seen.append((v, retriever.version)),
+            )
+            version.return_value = "v2"
+            retriever.check_for_update().join()
+
+        self.assertEqual(seen, [("v2", "v2")])
+
+
+if __name__ == "__main__":
+    unittest.main()
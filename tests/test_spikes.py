@@ -0,0 +1,69 @@
+"""Unit tests for incremental complaint-volume spike detection."""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+import pandas as pd
+
+from src.spikes import load_state, series_key, update_spike_alerts, update_state
+
+
+def _complaints(start_id: int, days: pd.DatetimeIndex, per_day: int) -> pd.DataFrame:
+    """Return *per_day* credit-card complaints on each of *days*."""
+    dates = [d.strftime("%Y-%m-%d") for d in days for _ in range(per_day)]
+    return pd.DataFrame(
+        {
+            "Complaint ID": range(start_id, start_id + len(dates)),
+            "Product": "Credit card",
+            "Sub-product": "General-purpose credit card",
+            "Date received": dates,
+        }
+    )
+
+
+class TestSpikes(unittest.TestCase):
+    """Verify watermarking, incremental counting and spike flagging."""
+
+    def test_incremental_spike_detection(self) -> None:
+        """A burst in new rows is flagged; re-runs add nothing."""
+        with tempfile.TemporaryDirectory() as tmp:
+            state_path = Path(tmp) / "state.json"
+            alerts_path = Path(tmp) / "alerts.json"
+            baseline = _complaints(1, pd.date_range("2023-01-01", periods=30), 2)
+
+            self.assertEqual(update_spike_alerts(baseline, state_path, alerts_path), [])
+            burst = _complaints(1000, pd.date_range("2023-01-31", periods=1), 20)
+            corpus = pd.concat([baseline, burst])
+
+            alerts = update_spike_alerts(corpus, state_path, alerts_path)
+            self.assertEqual(len(alerts), 2)  # product and sub-product series
+            self.assertEqual({a["start"] for a in alerts}, {"2023-01-31"})
+            self.assertEqual(alerts[0]["peak_count"], 20)
+
+            state = load_state(state_path)
+            self.assertEqual(state["watermark"], 1019)
+            self.assertEqual(
+                state["series"][series_key("Credit card")]["2023-01-31"], 20
+            )
+
+            # Nothing above the watermark: counts and alerts are unchanged.
+            self.assertEqual(
+                update_spike_alerts(corpus, state_path, alerts_path), alerts
+            )
+            self.assertEqual(load_state(state_path), state)
+
+    def test_undated_rows_only_advance_watermark(self) -> None:
+        """A batch with no parseable dates counts nothing and does not raise."""
+        state = {"watermark": None, "last_day": None, "series": {}}
+        undated = _complaints(1, pd.date_range("2023-01-01", periods=1), 3)
+        undated["Date received"] = ["not a date", None, ""]
+
+        self.assertEqual(update_state(state, undated), set())
+        self.assertEqual(state["watermark"], 3)
+        self.assertIsNone(state["last_day"])
+        self.assertEqual(state["series"], {})
+
+
+if __name__ == "__main__":
+    unittest.main()
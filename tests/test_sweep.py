@@ -0,0 +1,147 @@
+"""Unit tests for the retrieval parameter sweep."""
+
+import threading
+import time
+import unittest
+import zlib
+from typing import List
+
+import numpy as np
+import pandas as pd
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from src.embeddings import CachedEmbeddings
+from src.sweep import pareto_front, run_sweep
+
+
+class BagOfWordsEmbeddings(Embeddings):
+    """Deterministic hashed bag-of-words vectors that count calls."""
+
+    def __init__(self) -> None:
+        self.embedded: List[str] = []
+
+    def _vector(self, text: str) -> List[float]:
+        vec = np.zeros(64)
+        for word in text.lower().split():
+            vec[zlib.crc32(word.encode()) % 64] += 1.0
+        return vec.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.embedded.extend(texts)
+        return [self._vector(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._vector(text)
+
+
+class TestSweep(unittest.TestCase):
+    """Verify metrics, embedding reuse and the Pareto front."""
+
+    def test_sweep_metrics_and_embedding_reuse(self) -> None:
+        """Short documents yield identical chunks that are embedded once."""
+        docs = [
+            Document(
+                page_content="late fee charged twice on credit card",
+                metadata={"complaint_id": "1"},
+            ),
+            Document(
+                page_content="wire transfer never arrived abroad",
+                metadata={"complaint_id": "2", "duplicate_ids": "5"},
+            ),
+            Document(
+                page_content="savings account frozen without notice",
+                metadata={"complaint_id": "3"},
+            ),
+        ]
+        questions = [
+            {"query": "credit card late fee", "relevant_ids": ["1"]},
+            {"query": "transfer never arrived", "relevant_ids": ["5"]},
+        ]
+        base = BagOfWordsEmbeddings()
+
+        results = run_sweep(
+            docs,
+            questions,
+            grid={
+                "chunk_size": [100, 200],
+                "chunk_overlap": [0],
+                "embedding_model": ["bow"],
+                "k": [1, 3],
+            },
+            embeddings_factory=lambda _: CachedEmbeddings(base),
+            workers=2,
+        )
+
+        self.assertEqual(len(results), 4)
+        self.assertEqual(len(base.embedded), 3)
+        top = results[results["k"] == 1].iloc[0]
+        self.assertEqual(top["recall_at_k"], 1.0)
+        self.assertEqual(top["mrr"], 1.0)
+        self.assertTrue(results["pareto"].any())
+
+    def test_shared_embeddings_embed_concurrently(self) -> None:
+        """Threads sharing one model embed in parallel, each text once."""
+
+        class SlowEmbeddings(BagOfWordsEmbeddings):
+            def embed_documents(self, texts: List[str]) -> List[List[float]]:
+                time.sleep(0.2)
+                return super().embed_documents(texts)
+
+        base = SlowEmbeddings()
+        cached = CachedEmbeddings(base)
+        batches = [["shared", "alpha"], ["shared", "beta"], ["gamma"], ["delta"]]
+        start = time.perf_counter()
+        threads = [
+            threading.Thread(target=cached.as_array, args=(batch,)) for batch in batches
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertLess(time.perf_counter() - start, 0.6)
+        self.assertEqual(
+            sorted(base.embedded), ["alpha", "beta", "delta", "gamma", "shared"]
+        )
+
+    def test_invalid_grid_is_rejected_up_front(self) -> None:
+        """Empty depths, queries or variants raise before anything is built."""
+        docs = [Document(page_content="late fee", metadata={"complaint_id": "1"})]
+        questions = [{"query": "late fee", "relevant_ids": ["1"]}]
+        base = BagOfWordsEmbeddings()
+        grid = {
+            "chunk_size": [100],
+            "chunk_overlap": [0],
+            "embedding_model": ["bow"],
+            "k": [1],
+        }
+        for override, qs in [
+            ({"k": []}, questions),
+            ({"k": [0]}, questions),
+            ({"chunk_overlap": [100]}, questions),
+            ({}, []),
+        ]:
+            with self.assertRaises(ValueError, msg=override):
+                run_sweep(
+                    docs,
+                    qs,
+                    grid={**grid, **override},
+                    embeddings_factory=lambda _: CachedEmbeddings(base),
+                )
+        self.assertEqual(base.embedded, [])
+
+    def test_pareto_front(self) -> None:
+        """Dominated settings are excluded from the front."""
+        results = pd.DataFrame(
+            {
+                "recall_at_k": [0.9, 0.8, 0.9, 0.5],
+                "latency_ms": [5.0, 2.0, 6.0, 2.0],
+                "index_mb": [10.0, 10.0, 10.0, 1.0],
+            }
+        )
+        self.assertEqual(pareto_front(results).tolist(), [True, True, False, True])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+"""Unit tests for the streaming, parallel term-frequency engine."""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+import pandas as pd
+
+from src.term_frequency import (
+    count_terms,
+    grouped_frequencies,
+    iter_narratives,
+    term_frequencies,
+)
+from src.utils import generate_wordcloud
+
+NARRATIVE = "XXXX charged me a late fee on XX/XX/XXXX and the fee was never refunded"
+
+
+class TestTermFrequency(unittest.TestCase):
+    """Verify token filtering and that parallel counts merge exactly."""
+
+    def test_drops_redactions_and_stopwords(self) -> None:
+        """Redaction masks, stopwords and non-strings must not be counted."""
+        counts = count_terms([NARRATIVE, float("nan")])
+        self.assertEqual(counts["fee"], 2)
+        self.assertNotIn("xxxx", counts)
+        self.assertNotIn("xx", counts)
+        self.assertNotIn("the", counts)
+
+    def test_parallel_matches_serial(self) -> None:
+        """Batched process-pool counts must equal a single in-process count."""
+        texts = [NARRATIVE, "Mortgage servicer lost my payment"] * 50
+        parallel = term_frequencies(iter(texts), batch_size=7, workers=2)
+        self.assertEqual(parallel, count_terms(texts))
+
+    def test_grouped_by_product_and_month(self) -> None:
+        """Chunks accumulate into per-product and per-month counters."""
+        frame = pd.DataFrame(
+            {
+                "Consumer complaint narrative": [NARRATIVE, "Payment lost"],
+                "Product": ["Credit card", "Mortgage"],
+                "Date received": ["2023-01-15", "2023-02-01"],
+            }
+        )
+        by_product = grouped_frequencies([frame, frame], by="product", workers=1)
+        self.assertEqual(by_product["Credit card"]["fee"], 4)
+        self.assertEqual(by_product["Mortgage"]["payment"], 2)
+
+        by_month = grouped_frequencies([frame], by="month", workers=1)
+        self.assertEqual(set(by_month), {"2023-01", "2023-02"})
+        with self.assertRaises(ValueError):
+            grouped_frequencies([frame], by="state")
+
+    def test_csv_chunks_update_existing_counters(self) -> None:
+        """A chunked CSV read folds into the counters of an earlier run."""
+        frame = pd.DataFrame(
+            {
+                "Consumer complaint narrative": [NARRATIVE, "Payment lost"] * 3,
+                "Product": ["Credit card", "Mortgage"] * 3,
+                "Date received": ["2023-01-15", "2023-02-01"] * 3,
+                "State": ["CA", "TX"] * 3,
+            }
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "complaints.csv"
+            frame.to_csv(path, index=False)
+            chunks = list(iter_narratives(path, chunksize=2))
+            counters = grouped_frequencies(chunks[:1], by="product", workers=1)
+            grouped_frequencies(
+                iter_narratives(path, chunksize=2), counters=counters, workers=1
+            )
+
+        self.assertEqual(len(chunks), 3)
+        self.assertNotIn("State", chunks[0].columns)
+        self.assertEqual(counters["Credit card"]["fee"], 2 * 4)
+        self.assertEqual(counters["Mortgage"]["payment"], 4)
+
+    def test_empty_word_cloud_is_skipped(self) -> None:
+        """No terms means no figure rather than a WordCloud error."""
+        self.assertIsNone(generate_wordcloud(frequencies={}, filename=None))
+        self.assertIsNone(generate_wordcloud(["the and XXXX"], filename=None))
+
+
+if __name__ == "__main__":
+    unittest.main()